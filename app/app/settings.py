@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 from app.email_settings import get_email_backend
@@ -31,6 +32,8 @@ SECRET_KEY = os.environ.get(
 
 DEBUG = os.environ.get("DEBUG", "True").lower() == "true"
 
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
+
 
 # Application definition
 
@@ -53,6 +56,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -199,6 +203,76 @@ else:
     STRIPE_SECRET_KEY = os.environ.get("STRIPE_SECRET_KEY", "")
     STRIPE_PUBLIC_KEY = os.environ.get("STRIPE_PUBLIC_KEY", "")
 
+STRIPE_WEBHOOK_SECRET = os.environ.get("STRIPE_WEBHOOK_SECRET", "")
+
+# Client used for every Stripe API call. Tests swap in an in-memory fake so
+# no request ever leaves the test run.
+STRIPE_CLIENT = os.environ.get(
+    "STRIPE_CLIENT",
+    "finance.fake_stripe_client.FakeStripeClient"
+    if TESTING
+    else "finance.stripe_gateway.StripeClient",
+)
+
+# Seconds a user's resolved business/client/team-member ids are cached
+# between requests, in the cache alias named by TENANT_SHARED_CACHE. That
+# alias must be shared by every worker (e.g. Redis or Memcached) so saves
+# invalidate everywhere; without one nothing is cached. Off in tests,
+# whose rolled-back rows can reuse ids.
+TENANT_SHARED_CACHE = os.environ.get("TENANT_SHARED_CACHE", "")
+TENANT_CACHE_TIMEOUT = 0 if TESTING else int(
+    os.environ.get("TENANT_CACHE_TIMEOUT", 60)
+)
+
+# API tokens expire this many seconds after their last use. Use extends
+# the expiry, written at most once per TOKEN_REFRESH_INTERVAL seconds.
+TOKEN_TTL = int(os.environ.get("TOKEN_TTL", 14 * 24 * 60 * 60))
+TOKEN_REFRESH_INTERVAL = int(os.environ.get("TOKEN_REFRESH_INTERVAL", 60 * 60))
+
+# Token -> user lookups are cached per process, and in the named cache
+# alias when one is set, for this many seconds. Other processes only see
+# a deactivated user or deleted token once their entry expires.
+TOKEN_AUTH_CACHE_TIMEOUT = int(os.environ.get("TOKEN_AUTH_CACHE_TIMEOUT", 30))
+TOKEN_AUTH_CACHE_MAX_SIZE = int(os.environ.get("TOKEN_AUTH_CACHE_MAX_SIZE", 10000))
+TOKEN_AUTH_SHARED_CACHE = os.environ.get("TOKEN_AUTH_SHARED_CACHE", "")
+
+# Seconds between last_login writes for the same user. Off in tests, whose
+# rolled-back users can reuse ids.
+LAST_LOGIN_UPDATE_INTERVAL = 0 if TESTING else int(
+    os.environ.get("LAST_LOGIN_UPDATE_INTERVAL", 300)
+)
+
+# =========================
+# Query instrumentation
+# =========================
+
+# Adds Server-Timing headers and a per-request query log line. Always on in
+# tests so QUERY_BUDGETS fail the suite instead of only logging a warning.
+QUERY_INSTRUMENTATION = TESTING or (
+    os.environ.get("QUERY_INSTRUMENTATION", "False").lower() == "true"
+)
+QUERY_BUDGET_RAISE = TESTING
+
+# Maximum queries per request, keyed by "ViewClass.action".
+QUERY_BUDGETS = {
+    "DashboardView.get": 8,
+    "InvoiceViewSet.list": 8,
+    "PayoutViewSet.list": 8,
+    "ClientViewSet.list": 8,
+    "ServiceViewSet.list": 10,
+    "QuoteViewSet.list": 10,
+    "JobViewSet.list": 10,
+}
+
+# Geocoder used by the geocode_services command to fill Service
+# latitude/longitude for route planning. The default resolves nothing.
+GEOCODER = os.environ.get("GEOCODER", "operations.geocoding.NullGeocoder")
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Largest job photo upload accepted; the photo worker then caps originals
+# at 2560px and adds small renditions.
+JOB_PHOTO_MAX_UPLOAD_SIZE = int(
+    os.environ.get("JOB_PHOTO_MAX_UPLOAD_SIZE", 15 * 1024 * 1024)
+)
@@ -0,0 +1,16 @@
+"""
+Standalone performance benchmarks.
+
+Run from the ``app`` directory, e.g.::
+
+    python -m benchmarks.timezone_serialization
+"""
+import os
+
+import django
+
+
+def setup():
+    """Configure Django so benchmarks can import models and serializers."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    django.setup()
@@ -0,0 +1,81 @@
+"""
+Benchmark the streaming CSV/XLSX export writers on 200k invoice rows.
+
+Rows come from a generator shaped like ``export_rows`` output, so no
+database is needed. Reports time to first chunk, total time and peak
+Python memory; peak memory should not grow with the row count.
+"""
+import time
+import tracemalloc
+from datetime import date, datetime
+from decimal import Decimal
+
+from benchmarks import setup
+
+setup()
+
+import pytz  # noqa: E402
+
+from core.exports import stream_csv, stream_xlsx  # noqa: E402
+from core.utils import localize_datetime  # noqa: E402
+from finance.views import InvoiceViewSet  # noqa: E402
+
+
+ROW_COUNTS = (20_000, 200_000)
+HEADER = [title for title, _ in InvoiceViewSet.export_columns]
+
+
+def generate_rows(count):
+    tz = pytz.timezone("America/Edmonton")
+    created = datetime(2026, 1, 1, 12, 0, tzinfo=pytz.utc)
+    for index in range(count):
+        yield [
+            f"INV-2026-{index:06d}",
+            "PAID",
+            "Jordan Client",
+            "client@example.com",
+            "Lawn care",
+            date(2026, 1, 1),
+            date(2026, 1, 31),
+            "CAD",
+            Decimal("100.00"),
+            Decimal("5.00"),
+            Decimal("5.00"),
+            Decimal("105.00"),
+            localize_datetime(created, tz),
+            localize_datetime(created, tz),
+        ]
+
+
+def measure(writer, count):
+    start = time.perf_counter()
+    chunks = writer(HEADER, generate_rows(count))
+    size = len(next(chunks))
+    first_chunk = time.perf_counter() - start
+    for chunk in chunks:
+        size += len(chunk)
+    total = time.perf_counter() - start
+
+    # Memory is traced in a second pass; tracemalloc slows Python down.
+    tracemalloc.start()
+    for _ in writer(HEADER, generate_rows(count)):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_chunk, total, peak, size
+
+
+def main():
+    for name, writer in (("csv", stream_csv), ("xlsx", stream_xlsx)):
+        for count in ROW_COUNTS:
+            first_chunk, total, peak, size = measure(writer, count)
+            print(
+                f"{name:4} {count:>7} rows: first chunk "
+                f"{first_chunk * 1000:6.1f} ms, total {total:5.2f} s, "
+                f"peak memory {peak / 1024:7.0f} KiB, "
+                f"output {size / 1024 / 1024:6.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
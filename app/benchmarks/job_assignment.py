@@ -0,0 +1,114 @@
+"""
+Benchmark workload-balanced assignment of 5,000 jobs to 300 members.
+
+Compares ``WorkloadBalancer`` against a naive scan of every member per
+job (``naive_pick`` below). Members, loads and jobs are generated in
+memory, so no database is needed.
+"""
+import random
+import timeit
+from datetime import date, timedelta
+
+from benchmarks import setup
+
+setup()
+
+from operations.assignment import WorkloadBalancer, skill_tokens  # noqa: E402
+
+
+JOBS = 5_000
+MEMBERS = 300
+DAYS = 30
+MAX_JOBS_PER_DAY = 8
+REPEAT = 3
+SKILLS = [
+    "Lawn care",
+    "Window washing",
+    "Deep cleaning",
+    "Snow removal",
+    "Gutter repair",
+    "Pressure washing",
+    "Carpet cleaning",
+    "Hedge trimming",
+]
+
+
+def build_inputs(seed=1):
+    rng = random.Random(seed)
+    first_day = date(2026, 3, 2)
+    days = [first_day + timedelta(days=offset) for offset in range(DAYS)]
+    # Most members have one specialty; a third are generalists.
+    members = {
+        member_id: (
+            skill_tokens(rng.choice(SKILLS)) if member_id % 3 else set()
+        )
+        for member_id in range(1, MEMBERS + 1)
+    }
+    loads = {
+        (member_id, day): rng.randint(0, 3)
+        for member_id in members
+        for day in days
+        if rng.random() < 0.5
+    }
+    jobs = sorted(
+        (rng.choice(days), skill_tokens(rng.choice(SKILLS + ["General visit"])))
+        for _ in range(JOBS)
+    )
+    return members, loads, jobs
+
+
+def naive_pick(members, day_loads, total_loads, day, tokens):
+    """Scan every member, preferring skilled ones, as a baseline."""
+    def key(member_id):
+        return (day_loads.get((member_id, day), 0), total_loads.get(member_id, 0), member_id)
+
+    open_members = [
+        member_id
+        for member_id in members
+        if day_loads.get((member_id, day), 0) < MAX_JOBS_PER_DAY
+    ]
+    skilled = [m for m in open_members if members[m] & tokens]
+    pool = skilled or open_members
+    if not pool:
+        return None
+    member_id = min(pool, key=key)
+    day_loads[(member_id, day)] = day_loads.get((member_id, day), 0) + 1
+    total_loads[member_id] = total_loads.get(member_id, 0) + 1
+    return member_id
+
+
+def run_balancer(members, loads, jobs):
+    balancer = WorkloadBalancer(members, loads, MAX_JOBS_PER_DAY)
+    return [balancer.pick(day, tokens) for day, tokens in jobs]
+
+
+def run_naive(members, loads, jobs):
+    day_loads = dict(loads)
+    total_loads = {}
+    for (member_id, _), count in loads.items():
+        total_loads[member_id] = total_loads.get(member_id, 0) + count
+    return [
+        naive_pick(members, day_loads, total_loads, day, tokens)
+        for day, tokens in jobs
+    ]
+
+
+def main():
+    members, loads, jobs = build_inputs()
+    picks = run_balancer(members, loads, jobs)
+    assigned = sum(pick is not None for pick in picks)
+    print(f"{JOBS} jobs, {MEMBERS} members, {DAYS} days: {assigned} assigned")
+
+    for name, runner in (("naive scan", run_naive), ("balancer", run_balancer)):
+        best = min(
+            timeit.repeat(
+                lambda: runner(members, loads, jobs),
+                number=1,
+                repeat=REPEAT,
+            )
+        )
+        print(f"{name:>10}: {best * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
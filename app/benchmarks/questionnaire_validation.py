@@ -0,0 +1,142 @@
+"""
+Benchmark validating 10,000 answer payloads against a 100-question form.
+
+Compares the compiled ``QuestionnaireValidator`` against interpreting the
+form JSON for every payload (``interpret`` below), as a validator without
+a compile step would. Forms and payloads are generated in memory, so no
+database is needed.
+"""
+import random
+import timeit
+
+from benchmarks import setup
+
+setup()
+
+from operations.questionnaires import (  # noqa: E402
+    BLANK_ANSWERS,
+    DEFAULT_MAX_LENGTH,
+    compile_questionnaire,
+)
+
+
+QUESTIONS = 100
+PAYLOADS = 10_000
+REPEAT = 3
+OPTIONS = [f"Option {index}" for index in range(8)]
+
+
+def build_form(rng):
+    form = []
+    for index in range(QUESTIONS):
+        kind = index % 4
+        question = {"text": f"Question {index}", "required": rng.random() < 0.5}
+        if kind == 0:
+            question.update(type="input", inputType="text", maxLength=200)
+        elif kind == 1:
+            question.update(type="input", inputType="number")
+        elif kind == 2:
+            question.update(type="checkbox-single", options=OPTIONS)
+        else:
+            question.update(type="checkbox-multiple", options=OPTIONS)
+        form.append(question)
+    return form
+
+
+def build_payloads(form, rng):
+    payloads = []
+    for _ in range(PAYLOADS):
+        answers = {}
+        for question in form:
+            if not question["required"] and rng.random() < 0.2:
+                answers[question["text"]] = "-"
+                continue
+            if question["type"] == "input" and question["inputType"] == "text":
+                value = "x" * rng.randint(1, 80)
+            elif question["type"] == "input":
+                value = str(rng.randint(1, 500))
+            elif question["type"] == "checkbox-single":
+                value = rng.choice(OPTIONS)
+            else:
+                value = rng.sample(OPTIONS, rng.randint(1, 3))
+            # One answer in 500 is wrong, so error paths run too.
+            if rng.random() < 0.002:
+                value = 42 if isinstance(value, str) else "nope"
+            answers[question["text"]] = value
+        payloads.append(answers)
+    return payloads
+
+
+def interpret(form, answers):
+    """Walk the raw form for each payload as a baseline."""
+    errors = {}
+    texts = [question.get("text") for question in form]
+    for question in form:
+        text = question.get("text")
+        value = answers.get(text)
+        if value in BLANK_ANSWERS or value == []:
+            if question.get("required"):
+                errors[text] = "This question is required."
+            continue
+        question_type = question.get("type") or "input"
+        if question_type == "input":
+            if (question.get("inputType") or "text") == "number":
+                try:
+                    float(value)
+                except (TypeError, ValueError):
+                    errors[text] = "Enter a number."
+            elif not isinstance(value, str):
+                errors[text] = "Enter text."
+            elif len(value) > question.get("maxLength", DEFAULT_MAX_LENGTH):
+                errors[text] = "Too long."
+        elif question_type == "checkbox-single":
+            if value not in list(question.get("options") or []):
+                errors[text] = "Select one of the available options."
+        elif not isinstance(value, list) or any(
+            item not in list(question.get("options") or []) for item in value
+        ):
+            errors[text] = "Select a list of options."
+    for text in answers:
+        if text not in texts:
+            errors[text] = "Not a question in this questionnaire."
+    return errors
+
+
+def run_interpreted(form, payloads):
+    return [interpret(form, answers) for answers in payloads]
+
+
+def run_compiled(form, payloads):
+    validator = compile_questionnaire(form)
+    return [validator.validate(answers) for answers in payloads]
+
+
+def main():
+    rng = random.Random(1)
+    form = build_form(rng)
+    payloads = build_payloads(form, rng)
+
+    compiled = run_compiled(form, payloads)
+    interpreted = run_interpreted(form, payloads)
+    assert [set(errors) for errors in compiled] == [
+        set(errors) for errors in interpreted
+    ], "validators disagree"
+    invalid = sum(bool(errors) for errors in compiled)
+    print(f"{PAYLOADS} payloads x {QUESTIONS} questions: {invalid} invalid")
+
+    for name, runner in (("interpreted", run_interpreted), ("compiled", run_compiled)):
+        best = min(
+            timeit.repeat(
+                lambda: runner(form, payloads),
+                number=1,
+                repeat=REPEAT,
+            )
+        )
+        print(
+            f"{name:>11}: {best * 1000:7.1f} ms "
+            f"({best / PAYLOADS * 1e6:5.1f} us/payload)"
+        )
+
+
+if __name__ == "__main__":
+    main()
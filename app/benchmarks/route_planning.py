@@ -0,0 +1,57 @@
+"""
+Benchmark day-plan routing for 50 stops around Calgary.
+
+Times the distance matrix, the nearest-neighbour tour and the 2-opt pass,
+and compares path lengths against visiting stops in booking order. Stops
+are generated in memory, so no database is needed.
+"""
+import random
+import timeit
+
+from benchmarks import setup
+
+setup()
+
+from operations.routing import (  # noqa: E402
+    distance_matrix,
+    nearest_neighbour,
+    path_length,
+    two_opt,
+)
+
+
+STOPS = 50
+REPEAT = 20
+SEED = 7
+
+
+def build_points(count=STOPS, seed=SEED):
+    rng = random.Random(seed)
+    return [
+        (rng.uniform(50.85, 51.20), rng.uniform(-114.30, -113.85))
+        for _ in range(count)
+    ]
+
+
+def best_ms(func):
+    return min(timeit.repeat(func, number=1, repeat=REPEAT)) * 1000
+
+
+def main():
+    points = build_points()
+    matrix = distance_matrix(points)
+    booked = list(range(len(points)))
+    greedy = nearest_neighbour(matrix)
+    improved = two_opt(greedy, matrix)
+
+    print(f"{STOPS} stops")
+    print(f"  booking order:     {path_length(booked, matrix):7.1f} km")
+    print(f"  nearest neighbour: {path_length(greedy, matrix):7.1f} km")
+    print(f"  + 2-opt:           {path_length(improved, matrix):7.1f} km")
+    print(f"  distance matrix:   {best_ms(lambda: distance_matrix(points)):7.2f} ms")
+    print(f"  nearest neighbour: {best_ms(lambda: nearest_neighbour(matrix)):7.2f} ms")
+    print(f"  2-opt:             {best_ms(lambda: two_opt(greedy, matrix)):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
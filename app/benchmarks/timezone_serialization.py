@@ -0,0 +1,139 @@
+"""
+Benchmark business-timezone localization for 10k serialized rows.
+
+Compares the previous per-row implementation of BusinessTimezoneMixin
+(kept below as ``LegacyBusinessTimezoneMixin``) against the current one.
+Rows are built in memory, so no database is needed.
+"""
+import timeit
+from datetime import timedelta
+from decimal import Decimal
+
+from benchmarks import setup
+
+setup()
+
+import pytz  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework import serializers  # noqa: E402
+
+from core.models import Business, Client, Invoice, User  # noqa: E402
+from core.utils import BusinessTimezoneMixin  # noqa: E402
+
+
+ROWS = 10_000
+REPEAT = 3
+
+
+class LegacyBusinessTimezoneMixin:
+    """Per-row timezone construction and field scan, as before."""
+
+    def _get_business_timezone(self, instance):
+        if (
+            hasattr(instance, "business") and
+            getattr(instance.business, "timezone", None)
+        ):
+            return instance.business.timezone
+        return None
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        tz_name = self._get_business_timezone(instance)
+        if not tz_name:
+            return data
+
+        tz = pytz.timezone(tz_name)
+
+        for field_name, field in self.fields.items():
+            if isinstance(field, serializers.DateTimeField):
+                raw_value = getattr(instance, field_name, None)
+                if raw_value:
+                    if timezone.is_naive(raw_value):
+                        raw_value = timezone.make_aware(raw_value, timezone.utc)
+                    localized = raw_value.astimezone(tz)
+                    data[field_name] = localized.strftime("%Y-%m-%d %H:%M:%S")
+
+        return data
+
+
+class InvoiceRowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Invoice
+        fields = [
+            "id", "invoice_number", "status", "due_date", "subtotal",
+            "total_amount", "currency", "paid_at", "created_at", "updated_at",
+        ]
+
+
+class LegacyInvoiceRowSerializer(LegacyBusinessTimezoneMixin, InvoiceRowSerializer):
+    pass
+
+
+class CurrentInvoiceRowSerializer(BusinessTimezoneMixin, InvoiceRowSerializer):
+    pass
+
+
+def build_rows():
+    now = timezone.now()
+    businesses = [
+        Business(id=index, name=f"Business {index}", timezone=tz_name)
+        for index, tz_name in enumerate(
+            ["America/Edmonton", "America/Toronto", "America/Vancouver"],
+            start=1,
+        )
+    ]
+    user = User(id=1, name="Client", email="client@example.com")
+    rows = []
+    for index in range(ROWS):
+        business = businesses[index % len(businesses)]
+        client = Client(id=index, business=business, user=user)
+        rows.append(
+            Invoice(
+                id=index,
+                business=business,
+                client=client,
+                invoice_number=f"INV-2026-{index:05d}",
+                status="PAID",
+                due_date=now.date(),
+                subtotal=Decimal("100.00"),
+                total_amount=Decimal("105.00"),
+                currency="CAD",
+                paid_at=now,
+                created_at=now - timedelta(days=1),
+                updated_at=now,
+            )
+        )
+    return rows
+
+
+def run(serializer_class, rows):
+    return min(
+        timeit.repeat(
+            lambda: serializer_class(rows, many=True).data,
+            repeat=REPEAT,
+            number=1,
+        )
+    )
+
+
+def main():
+    rows = build_rows()
+    assert (
+        LegacyInvoiceRowSerializer(rows[:50], many=True).data
+        == CurrentInvoiceRowSerializer(rows[:50], many=True).data
+    )
+
+    legacy = run(LegacyInvoiceRowSerializer, rows)
+    current = run(CurrentInvoiceRowSerializer, rows)
+    plain = run(InvoiceRowSerializer, rows)
+
+    print(f"Serialized {ROWS} rows (best of {REPEAT}):")
+    print(f"  without localization: {plain * 1000:8.1f} ms")
+    print(f"  before:               {legacy * 1000:8.1f} ms "
+          f"({(legacy - plain) * 1000:+.1f} ms)")
+    print(f"  after:                {current * 1000:8.1f} ms "
+          f"({(current - plain) * 1000:+.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,11 @@ Django admin customization.
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from core import models
+from core.authentication import invalidate_token
 
 
 class SoftDeletableAdminMixin:
@@ -314,6 +316,85 @@ class FAQAdmin(SoftDeletableAdminMixin, admin.ModelAdmin):
     ordering = ["sort_order", "id"]
 
 
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ["user", "created", "last_used", "expires_at"]
+    search_fields = ["user__email"]
+    readonly_fields = ["key", "created", "last_used"]
+    raw_id_fields = ["user"]
+    ordering = ["-created"]
+
+    # Cached lookups would keep authenticating edited or deleted tokens.
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_token(obj.key)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_token(obj.key)
+
+    def delete_queryset(self, request, queryset):
+        keys = list(queryset.values_list("key", flat=True))
+        super().delete_queryset(request, queryset)
+        for key in keys:
+            invalidate_token(key)
+
+
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ["document_type", "year", "last_value", "updated_at"]
+    list_filter = ["document_type", "year"]
+    readonly_fields = ["updated_at"]
+    ordering = ["document_type", "-year"]
+
+
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = [
+        "subject",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+        "created_at",
+    ]
+    list_filter = ["status"]
+    search_fields = ["subject", "to"]
+    readonly_fields = ["sent_at", "created_at", "updated_at"]
+    ordering = ["-created_at"]
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected emails")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status="SENT").update(
+            status="PENDING",
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} email(s) requeued.")
+
+
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = [
+        "event_id",
+        "event_type",
+        "status",
+        "attempts",
+        "stripe_created_at",
+        "processed_at",
+    ]
+    list_filter = ["status", "event_type", "livemode"]
+    search_fields = ["event_id"]
+    readonly_fields = ["received_at", "processed_at"]
+    ordering = ["-stripe_created_at"]
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected events")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status="PROCESSED").update(
+            status="PENDING",
+            attempts=0,
+        )
+        self.message_user(request, f"{updated} event(s) requeued.")
+
+
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Business, BusinessAdmin)
 admin.site.register(models.Client, ClientAdmin)
@@ -328,3 +409,7 @@ admin.site.register(models.ServiceTermsTemplate, ServiceTermsTemplateAdmin)
 admin.site.register(models.Invoice, InvoiceAdmin)
 admin.site.register(models.Payout, PayoutAdmin)
 admin.site.register(models.FAQ, FAQAdmin)
+admin.site.register(models.AuthToken, AuthTokenAdmin)
+admin.site.register(models.DocumentSequence, DocumentSequenceAdmin)
+admin.site.register(models.EmailOutbox, EmailOutboxAdmin)
+admin.site.register(models.StripeEvent, StripeEventAdmin)
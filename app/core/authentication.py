@@ -0,0 +1,227 @@
+"""
+Token authentication with cached token lookups.
+
+DRF's ``TokenAuthentication`` joins ``Token`` to ``User`` on every API
+call. ``CachedTokenAuthentication`` keeps resolved users in a small
+per-process LRU and, when ``TOKEN_AUTH_SHARED_CACHE`` names a cache alias,
+in that shared cache too, both for ``TOKEN_AUTH_CACHE_TIMEOUT`` seconds.
+
+Entries never outlive the token's expiry. Revoking tokens and saving a
+user (password reset, ``is_active`` or role changes) drop the cached
+entries in this process and in the shared cache. Other processes' LRUs are
+only bounded by the timeout, which is why it is kept short.
+
+Tokens are deleted through ``revoke_token`` and ``revoke_user_tokens``
+(the admin invalidates the keys it deletes itself) rather than a
+``post_delete`` receiver, which would turn every bulk delete into a SELECT
+plus one DELETE per token.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.models import AuthToken
+
+
+TOKEN_CACHE_KEY = "auth-token:{}"
+USER_CACHE_KEY = "auth-user:{}"
+LAST_LOGIN_CACHE_KEY = "last-login:{}"
+
+
+class TokenCache:
+    """Thread-safe LRU of token key -> (expires at, user) with a TTL."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, user, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            stale = [
+                key for key, (_, user) in self._entries.items() if user.pk == user_id
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_AUTH_CACHE_MAX_SIZE)
+
+
+def _shared_cache():
+    alias = settings.TOKEN_AUTH_SHARED_CACHE
+    return caches[alias] if alias else None
+
+
+def _hash_key(key):
+    # Keep raw tokens out of shared cache keys.
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    ``TokenAuthentication`` over expiring ``AuthToken`` keys that caches the
+    token -> user lookup.
+    """
+
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        timeout = settings.TOKEN_AUTH_CACHE_TIMEOUT
+        user = None
+        if timeout:
+            user = token_cache.get(key) or self._get_shared(key)
+        if user is None:
+            token = self._get_token(key)
+            user = token.user
+            # Never cache a token past its expiry.
+            timeout = min(
+                timeout,
+                int((token.expires_at - timezone.now()).total_seconds()),
+            )
+            if timeout > 0:
+                self._set_shared(key, user, timeout)
+                token_cache.set(key, user, timeout)
+
+        # Views may modify request.user; never hand out the cached instance.
+        user = copy.copy(user)
+        return user, AuthToken(key=key, user=user)
+
+    def _get_token(self, key):
+        now = timezone.now()
+        try:
+            token = AuthToken.objects.active(now).select_related("user").get(key=key)
+        except AuthToken.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        token.touch(now)
+        return token
+
+    def _get_shared(self, key):
+        shared = _shared_cache()
+        if shared is None:
+            return None
+        user_id = shared.get(TOKEN_CACHE_KEY.format(_hash_key(key)))
+        if user_id is None:
+            return None
+        user = shared.get(USER_CACHE_KEY.format(user_id))
+        if user is None or not user.is_active:
+            return None
+        return user
+
+    def _set_shared(self, key, user, timeout):
+        shared = _shared_cache()
+        if shared is None:
+            return
+        # The user is stored separately so saving it can drop the entry
+        # without looking up its token.
+        shared.set_many(
+            {
+                TOKEN_CACHE_KEY.format(_hash_key(key)): user.pk,
+                USER_CACHE_KEY.format(user.pk): user,
+            },
+            timeout,
+        )
+
+
+def invalidate_token(key):
+    """Drop a cached token."""
+    token_cache.delete(key)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(TOKEN_CACHE_KEY.format(_hash_key(key)))
+
+
+def invalidate_user_tokens(user_id):
+    """Drop every cached token of a user."""
+    token_cache.delete_user(user_id)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(USER_CACHE_KEY.format(user_id))
+
+
+def revoke_token(key):
+    """Delete one token and drop it from the caches."""
+    deleted = AuthToken.objects.filter(pk=key).delete()[0]
+    invalidate_token(key)
+    return deleted
+
+
+def revoke_user_tokens(user_id):
+    """
+    Delete every token of a user with one DELETE and drop them from the
+    caches. Returns the number of tokens revoked.
+    """
+    deleted = AuthToken.objects.filter(user_id=user_id).delete()[0]
+    invalidate_user_tokens(user_id)
+    return deleted
+
+
+def record_login(user):
+    """
+    Set ``user.last_login`` to now, writing it at most once per user every
+    ``LAST_LOGIN_UPDATE_INTERVAL`` seconds.
+
+    The write is a queryset update, so it sends no ``post_save`` and leaves
+    cached tokens alone.
+    """
+    now = timezone.now()
+    interval = settings.LAST_LOGIN_UPDATE_INTERVAL
+    if (
+        user.last_login is not None
+        and (now - user.last_login).total_seconds() < interval
+    ):
+        return False
+    # cache.add() only succeeds for the first caller in the interval.
+    shared = _shared_cache() or caches["default"]
+    if interval and not shared.add(LAST_LOGIN_CACHE_KEY.format(user.pk), 1, interval):
+        return False
+    get_user_model().objects.filter(pk=user.pk).update(last_login=now)
+    user.last_login = now
+    return True
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def _user_changed(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.pk)
@@ -0,0 +1,28 @@
+"""
+Django command to delete expired auth tokens.
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import AuthToken
+
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    """Delete expired auth tokens in batches."""
+
+    help = "Delete auth tokens past their expiry."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Tokens to delete per statement.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        purged = AuthToken.objects.purge_expired(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Expired tokens purged: {purged}"))
@@ -0,0 +1,71 @@
+"""
+Django command to deliver queued transactional email.
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import DEFAULT_BATCH_SIZE, deliver_pending_emails
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Drain the email outbox in batches."""
+
+    help = "Deliver queued emails from the outbox with retry and backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Emails to send per connection.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no emails are due instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        batch_size = options["batch_size"]
+        totals = {"sent": 0, "retried": 0, "dead": 0}
+
+        try:
+            while True:
+                try:
+                    summary = deliver_pending_emails(batch_size=batch_size)
+                except Exception:
+                    # Claimed emails are retried once their lease expires.
+                    logger.exception("Email delivery batch failed.")
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                for key, value in summary.items():
+                    totals[key] += value
+
+                if any(summary.values()):
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Emails sent: {sent}, retried: {retried}, "
+                "dead-lettered: {dead}".format(**totals)
+            )
+        )
@@ -0,0 +1,147 @@
+"""
+Per-request SQL instrumentation.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+# A fingerprint repeated at least this often in one request is reported as
+# a likely N+1 pattern.
+DUPLICATE_QUERY_THRESHOLD = 3
+
+_IN_LIST_RE = re.compile(r"\((?:%s, )+%s\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a view runs more queries than its configured budget."""
+
+
+def fingerprint_sql(sql):
+    """Normalize SQL so queries differing only by parameters compare equal."""
+    sql = _WHITESPACE_RE.sub(" ", sql).strip()
+    sql = _IN_LIST_RE.sub("(%s, ...)", sql)
+    return _NUMBER_RE.sub("N", sql)
+
+
+def get_view_name(request):
+    """
+    Return ``ViewClass.action`` for the resolved view, e.g.
+    ``InvoiceViewSet.list`` or ``DashboardView.get``.
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view_class = getattr(match.func, "cls", None)
+    if view_class is None:
+        return match.view_name
+    actions = getattr(match.func, "actions", None) or {}
+    method = request.method.lower()
+    return f"{view_class.__name__}.{actions.get(method, method)}"
+
+
+class QueryRecorder:
+    """``execute_wrapper`` callable collecting timings for one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = (0.0, None)
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if elapsed >= self.slowest[0]:
+                self.slowest = (elapsed, sql)
+            self.fingerprints[fingerprint_sql(sql)] += 1
+
+    def duplicates(self):
+        return [
+            {"count": count, "sql": sql}
+            for sql, count in self.fingerprints.most_common()
+            if count >= DUPLICATE_QUERY_THRESHOLD
+        ]
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record query count, DB time, the slowest statement and repeated query
+    fingerprints for each request.
+
+    Results go to a ``Server-Timing`` header and one structured log line.
+    Views listed in ``QUERY_BUDGETS`` log a warning when they exceed their
+    budget, or raise ``QueryBudgetExceeded`` when ``QUERY_BUDGET_RAISE``.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_INSTRUMENTATION", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.budgets = getattr(settings, "QUERY_BUDGETS", {})
+        self.raise_on_budget = getattr(settings, "QUERY_BUDGET_RAISE", False)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        view_name = get_view_name(request)
+        duplicates = recorder.duplicates()
+
+        response["Server-Timing"] = ", ".join(
+            filter(None, [
+                response.get("Server-Timing"),
+                f'db;dur={recorder.duration * 1000:.2f};'
+                f'desc="{recorder.count} queries"',
+                f"total;dur={total * 1000:.2f}",
+            ])
+        )
+
+        logger.info(json.dumps({
+            "event": "request_queries",
+            "method": request.method,
+            "path": request.path,
+            "view": view_name,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "db_ms": round(recorder.duration * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+            "slowest_ms": round(recorder.slowest[0] * 1000, 2),
+            "slowest_sql": recorder.slowest[1],
+            "duplicates": duplicates,
+        }))
+
+        budget = self.budgets.get(view_name)
+        if budget is not None and recorder.count > budget:
+            message = (
+                f"{view_name} ran {recorder.count} queries, "
+                f"over its budget of {budget}."
+            )
+            if duplicates:
+                message += f" Most repeated: {duplicates[0]['sql']}"
+            if self.raise_on_budget:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
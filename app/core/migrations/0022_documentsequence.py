@@ -0,0 +1,70 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+DOCUMENT_NUMBER_FIELDS = [
+    ("QUOTE", "Quote", "quote_number"),
+    ("INVOICE", "Invoice", "invoice_number"),
+]
+
+
+def seed_document_sequences(apps, schema_editor):
+    """Start each (document type, year) sequence after its highest number."""
+    DocumentSequence = apps.get_model("core", "DocumentSequence")
+
+    for document_type, model_name, field in DOCUMENT_NUMBER_FIELDS:
+        model = apps.get_model("core", model_name)
+        last_values = {}
+        for number in model.objects.values_list(field, flat=True).iterator():
+            try:
+                _, year, sequence = str(number).rsplit("-", 2)
+                year, sequence = int(year), int(sequence)
+            except (ValueError, TypeError):
+                continue
+            last_values[year] = max(last_values.get(year, 0), sequence)
+
+        DocumentSequence.objects.bulk_create(
+            [
+                DocumentSequence(
+                    document_type=document_type,
+                    year=year,
+                    last_value=last_value,
+                )
+                for year, last_value in last_values.items()
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_servicetermstemplate_quote_general_terms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(choices=[('QUOTE', 'Quote'), ('INVOICE', 'Invoice')], max_length=20)),
+                ('year', models.PositiveIntegerField()),
+                ('last_value', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(blank=True, help_text='Leave empty for numbers shared across all businesses.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='document_sequences', to='core.business')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='documentsequence',
+            constraint=models.UniqueConstraint(fields=('document_type', 'year', 'business'), name='unique_document_sequence_per_business'),
+        ),
+        migrations.AddConstraint(
+            model_name='documentsequence',
+            constraint=models.UniqueConstraint(condition=models.Q(('business__isnull', True)), fields=('document_type', 'year'), name='unique_document_sequence_global'),
+        ),
+        migrations.RunPython(
+            seed_document_sequences,
+            migrations.RunPython.noop,
+        ),
+    ]
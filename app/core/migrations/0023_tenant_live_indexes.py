@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_documentsequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['business', '-id'], name='client_business_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['business', '-id'], name='invoice_business_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['client', '-id'], name='invoice_client_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['service', 'status'], name='job_service_status_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['assigned_to', 'status'], name='job_assignee_status_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobphoto',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['job', '-uploaded_at'], name='jobphoto_job_uploaded_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payout',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['business', '-id'], name='payout_business_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['service', '-id'], name='quote_service_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['business', 'service_name'], name='service_business_name_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['client', '-id'], name='service_client_live_idx'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:28
+
+import calendar
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Frozen copy of finance.billing's period maths as of this migration.
+CYCLE_MONTHS = {
+    "MONTHLY": 1,
+    "YEARLY": 12,
+}
+
+
+def _add_months(day, months):
+    month_index = day.year * 12 + (day.month - 1) + months
+    year, month = month_index // 12, month_index % 12 + 1
+    last_day = calendar.monthrange(year, month)[1]
+    return day.replace(year=year, month=month, day=min(day.day, last_day))
+
+
+def _initial_billing_period_start(service, on_date):
+    step = CYCLE_MONTHS.get(service.billing_cycle)
+    if service.service_type != "SUBSCRIPTION" or step is None:
+        return None
+    start_date = service.start_date
+    if on_date < start_date:
+        return start_date
+    elapsed_months = (
+        (on_date.year - start_date.year) * 12
+        + on_date.month
+        - start_date.month
+    )
+    index = elapsed_months // step
+    period_start = _add_months(start_date, index * step)
+    if period_start > on_date:
+        period_start = _add_months(start_date, (index - 1) * step)
+    return period_start
+
+
+def backfill_billing_period_start(apps, schema_editor):
+    """
+    Set the period on existing subscription invoices, so the first billing
+    run does not bill periods their activation invoices already cover.
+
+    Only the earliest invoice of a service per period gets it, as the
+    unique constraint allows one.
+    """
+    Invoice = apps.get_model("core", "Invoice")
+
+    invoices = (
+        Invoice.objects.filter(
+            billing_period_start__isnull=True,
+            service__service_type="SUBSCRIPTION",
+        )
+        .select_related("service")
+        .order_by("service_id", "created_at", "id")
+    )
+    claimed = set()
+    updated = []
+    for invoice in invoices.iterator():
+        period_start = _initial_billing_period_start(
+            invoice.service,
+            timezone.localtime(invoice.created_at).date(),
+        )
+        key = (invoice.service_id, period_start)
+        if period_start is None or key in claimed:
+            continue
+        claimed.add(key)
+        invoice.billing_period_start = period_start
+        updated.append(invoice)
+    Invoice.objects.bulk_update(
+        updated, ["billing_period_start"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='billing_period_start',
+            field=models.DateField(blank=True, help_text='First day of the subscription period this invoice bills.', null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.UniqueConstraint(condition=models.Q(('billing_period_start__isnull', False)), fields=('service', 'billing_period_start'), name='unique_invoice_per_service_period'),
+        ),
+        migrations.RunPython(
+            backfill_billing_period_start, migrations.RunPython.noop
+        ),
+    ]
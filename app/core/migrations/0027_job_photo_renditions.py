@@ -0,0 +1,83 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_stripeevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobphoto',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='medium',
+            field=models.ImageField(blank=True, null=True, upload_to='job_photos/renditions/'),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='medium_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='medium_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='processing_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='processing_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='processing_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='job_photos/renditions/'),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='thumbnail_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='thumbnail_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobphoto',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='jobphoto',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('processing_status', 'PENDING')), fields=['next_attempt_at', 'id'], name='jobphoto_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:13
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def copy_authtoken_tokens(apps, schema_editor):
+    """Carry existing non-expiring tokens over with a fresh TTL."""
+    Token = apps.get_model("authtoken", "Token")
+    AuthToken = apps.get_model("core", "AuthToken")
+
+    expires_at = timezone.now() + timedelta(seconds=settings.TOKEN_TTL)
+    AuthToken.objects.bulk_create(
+        [
+            AuthToken(
+                key=token.key,
+                user_id=token.user_id,
+                expires_at=expires_at,
+            )
+            for token in Token.objects.iterator()
+        ],
+        batch_size=1000,
+    )
+    Token.objects.all().delete()
+
+
+def restore_authtoken_tokens(apps, schema_editor):
+    """Copy each user's newest token back, as authtoken allows one."""
+    Token = apps.get_model("authtoken", "Token")
+    AuthToken = apps.get_model("core", "AuthToken")
+
+    newest = {}
+    for token in AuthToken.objects.order_by("created").iterator():
+        newest[token.user_id] = token
+    Token.objects.bulk_create(
+        [
+            Token(key=token.key, user_id=user_id)
+            for user_id, token in newest.items()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authtoken', '0003_tokenproxy'),
+        ('core', '0028_service_geocode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_used', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(copy_authtoken_tokens, restore_authtoken_tokens),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:16
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_services_offered_names(apps, schema_editor):
+    """Copy each business's services_offered tag names into the column."""
+    Business = apps.get_model("core", "Business")
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    TaggedItem = apps.get_model("taggit", "TaggedItem")
+
+    content_type = ContentType.objects.filter(
+        app_label="core", model="business"
+    ).first()
+    if content_type is None:
+        return
+
+    names = defaultdict(list)
+    for business_id, name in TaggedItem.objects.filter(
+        content_type=content_type
+    ).values_list("object_id", "tag__name"):
+        names[business_id].append(name)
+
+    businesses = list(Business.objects.filter(pk__in=names))
+    for business in businesses:
+        business.services_offered_names = sorted(names[business.pk])
+    Business.objects.bulk_update(
+        businesses, ["services_offered_names"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0005_auto_20220424_2025'),
+        ('core', '0029_auth_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='services_offered_names',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(
+            backfill_services_offered_names, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_business_services_offered_names'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='documentsequence',
+            name='unique_document_sequence_per_business',
+        ),
+        migrations.RemoveConstraint(
+            model_name='documentsequence',
+            name='unique_document_sequence_global',
+        ),
+        migrations.RemoveField(
+            model_name='documentsequence',
+            name='business',
+        ),
+        migrations.AddConstraint(
+            model_name='documentsequence',
+            constraint=models.UniqueConstraint(fields=('document_type', 'year'), name='unique_document_sequence'),
+        ),
+    ]
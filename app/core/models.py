@@ -1,6 +1,9 @@
 """
 Database models.
 """
+import binascii
+import os
+from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth.models import (
@@ -8,11 +11,14 @@ from django.contrib.auth.models import (
     BaseUserManager,
     PermissionsMixin,
 )
-from django.db import IntegrityError, models
+from django.db import IntegrityError, models, transaction
 from django.core.exceptions import ValidationError
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import Signal, receiver
 from django.utils import timezone
 
 from taggit.managers import TaggableManager
+from taggit.models import Tag
 
 
 ROLE_CHOICES = [
@@ -69,6 +75,12 @@ JOB_PHOTO_TYPE_CHOICES = [
     ("AFTER", "After"),
 ]
 
+JOB_PHOTO_PROCESSING_STATUS_CHOICES = [
+    ("PENDING", "Pending"),
+    ("READY", "Ready"),
+    ("FAILED", "Failed"),
+]
+
 ACCOUNT_HOLDER_CHOICES = [("individual", "Individual"), ("company", "Company")]
 
 INVOICE_STATUS_CHOICES = [
@@ -84,6 +96,24 @@ PAYOUT_STATUS_CHOICES = [
     ("FAILED", "Failed"),
 ]
 
+DOCUMENT_TYPE_CHOICES = [
+    ("QUOTE", "Quote"),
+    ("INVOICE", "Invoice"),
+]
+
+EMAIL_OUTBOX_STATUS_CHOICES = [
+    ("PENDING", "Pending"),
+    ("SENT", "Sent"),
+    ("DEAD", "Dead"),
+]
+
+STRIPE_EVENT_STATUS_CHOICES = [
+    ("PENDING", "Pending"),
+    ("PROCESSED", "Processed"),
+    ("IGNORED", "Ignored"),
+    ("FAILED", "Failed"),
+]
+
 
 class UserManager(BaseUserManager):
     """Manager for users."""
@@ -128,6 +158,88 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
 
 
+class AuthTokenManager(models.Manager):
+    def issue(self, user):
+        """Create a new token for ``user`` valid for ``TOKEN_TTL`` seconds."""
+        return self.create(user=user)
+
+    def active(self, now=None):
+        return self.filter(expires_at__gt=now or timezone.now())
+
+    def purge_expired(self, batch_size, now=None):
+        """Delete expired tokens ``batch_size`` at a time; return the count."""
+        now = now or timezone.now()
+        purged = 0
+        while True:
+            keys = list(
+                self.filter(expires_at__lte=now).values_list("pk", flat=True)[
+                    :batch_size
+                ]
+            )
+            if not keys:
+                return purged
+            purged += self.filter(pk__in=keys).delete()[0]
+
+
+class AuthToken(models.Model):
+    """
+    API token that expires ``TOKEN_TTL`` seconds after it was last used.
+
+    Replaces ``rest_framework.authtoken.models.Token``: a user may hold one
+    token per login, and lookups only match unexpired keys.
+    """
+
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="auth_tokens",
+        on_delete=models.CASCADE,
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    last_used = models.DateTimeField(blank=True, null=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = AuthTokenManager()
+
+    def save(self, *args, **kwargs):
+        if not self.key:
+            self.key = binascii.hexlify(os.urandom(20)).decode()
+        if self.expires_at is None:
+            self.expires_at = timezone.now() + timedelta(seconds=settings.TOKEN_TTL)
+        super().save(*args, **kwargs)
+
+    def touch(self, now=None):
+        """
+        Slide the expiry forward on use, writing at most once every
+        ``TOKEN_REFRESH_INTERVAL`` seconds.
+        """
+        now = now or timezone.now()
+        if (
+            self.last_used is not None
+            and (now - self.last_used).total_seconds() < settings.TOKEN_REFRESH_INTERVAL
+        ):
+            return False
+        self.last_used = now
+        self.expires_at = now + timedelta(seconds=settings.TOKEN_TTL)
+        AuthToken.objects.filter(pk=self.pk).update(
+            last_used=self.last_used,
+            expires_at=self.expires_at,
+        )
+        return True
+
+    def __str__(self):
+        return f"{self.user} (expires {self.expires_at:%Y-%m-%d %H:%M})"
+
+
+SOFT_DELETE_BATCH_SIZE = 5000
+
+# Sent per model after a soft delete or restore, which bypasses the
+# post_save signal: ``sender`` is the model and ``pks`` its updated rows.
+soft_delete_changed = Signal()
+
+_soft_delete_dependents = {}
+
+
 class SoftDeletableModel(models.Model):
     is_deleted = models.BooleanField(default=False)
     deleted_by = models.ForeignKey(
@@ -143,64 +255,148 @@ class SoftDeletableModel(models.Model):
         abstract = True
 
     def soft_delete(self, user=None, cascade=True):
-        """Soft delete the object and optionally its related dependents."""
-        if self.is_deleted:
-            return
-
-        self.is_deleted = True
-        self.deleted_by = user
-        self.deleted_at = timezone.now()
-        self.save(update_fields=["is_deleted", "deleted_by", "deleted_at"])
+        """
+        Soft delete the object and optionally its related dependents.
 
-        if cascade:
-            for related in self._meta.related_objects:
-                related_name = related.get_accessor_name()
-                related_manager = getattr(self, related_name, None)
+        Returns the number of rows soft deleted per model label.
+        """
+        if self.is_deleted:
+            return {}
 
-                if related_manager is None:
-                    continue
+        values = {
+            "is_deleted": True,
+            "deleted_by": user,
+            "deleted_at": timezone.now(),
+        }
+        counts = self._apply_soft_delete_state(values, cascade)
 
-                if isinstance(related_manager, models.Model):
-                    related_manager.soft_delete(user=user, cascade=True)
-                else:
-                    for obj in related_manager.all():
-                        if hasattr(obj, "soft_delete"):
-                            obj.soft_delete(user=user, cascade=True)
+        for field, value in values.items():
+            setattr(self, field, value)
+        return counts
 
     def restore(self, cascade=True):
         """
         Restore a soft-deleted object and optionally
         its related dependents.
+
+        Returns the number of rows restored per model label.
         """
         if not self.is_deleted:
-            return
+            return {}
 
-        self.is_deleted = False
-        self.deleted_by = None
-        self.deleted_at = None
-        self.save(update_fields=["is_deleted", "deleted_by", "deleted_at"])
-
-        if cascade:
-            for related in self._meta.related_objects:
-                related_name = related.get_accessor_name()
-                related_manager = getattr(self, related_name, None)
-                if related_manager is None:
-                    continue
-
-                if isinstance(related_manager, models.Model):
-                    related_manager.restore(cascade=True)
-                else:
-                    related_model = related.related_model
-                    if hasattr(related_model, "all_objects"):
-                        related_objects = related_model.all_objects.filter(
-                            **{related.field.name: self}
+        values = {
+            "is_deleted": False,
+            "deleted_by": None,
+            "deleted_at": None,
+        }
+        counts = self._apply_soft_delete_state(values, cascade)
+
+        for field, value in values.items():
+            setattr(self, field, value)
+        return counts
+
+    def _apply_soft_delete_state(self, values, cascade):
+        """
+        Write ``values`` to this row and, when cascading, to every dependent
+        reachable through rows that are changing state, with one UPDATE per
+        model inside a single transaction.
+        """
+        counts = {}
+        with transaction.atomic():
+            # Plan inside the transaction, so dependents created or restored
+            # meanwhile are not missed.
+            plan = {type(self): {self.pk}}
+            if cascade:
+                plan = plan_soft_delete_cascade(
+                    type(self),
+                    [self.pk],
+                    deleting=values["is_deleted"],
+                )
+
+            for model, ids in plan.items():
+                manager = _all_objects(model)
+                ids = sorted(ids)
+                changed = []
+                for index in range(0, len(ids), SOFT_DELETE_BATCH_SIZE):
+                    batch = list(
+                        manager.select_for_update()
+                        .filter(
+                            pk__in=ids[index:index + SOFT_DELETE_BATCH_SIZE],
+                            is_deleted=not values["is_deleted"],
                         )
-                    else:
-                        related_objects = related_manager.all()
+                        .values_list("pk", flat=True)
+                    )
+                    manager.filter(pk__in=batch).update(**values)
+                    changed.extend(batch)
+                if changed:
+                    counts[model._meta.label] = len(changed)
+                    soft_delete_changed.send(
+                        sender=model,
+                        pks=changed,
+                        is_deleted=values["is_deleted"],
+                    )
+        return counts
+
+
+def _all_objects(model):
+    """Return a manager that includes soft-deleted rows."""
+    return getattr(model, "all_objects", model._base_manager)
+
+
+def get_soft_delete_dependents(model):
+    """
+    Return ``(related_model, field_name)`` pairs for every soft-deletable
+    model with a relation pointing at ``model``.
+    """
+    if model not in _soft_delete_dependents:
+        _soft_delete_dependents[model] = [
+            (related.related_model, related.field.name)
+            for related in model._meta.related_objects
+            if issubclass(related.related_model, SoftDeletableModel)
+        ]
+    return _soft_delete_dependents[model]
+
+
+def plan_soft_delete_cascade(model, ids, deleting=True):
+    """
+    Work out which rows a cascading soft delete (or restore) touches.
+
+    Starting from ``ids`` of ``model``, dependents are followed level by
+    level, but only through rows that are themselves changing state:
+    live rows when deleting, deleted rows when restoring. A row already in
+    the target state stops the cascade along that path.
+
+    Returns a mapping of model class to the set of primary keys to update.
+    """
+    plan = {model: set(ids)}
+    frontier = {model: set(ids)}
+
+    while frontier:
+        next_frontier = {}
+        for parent_model, parent_ids in frontier.items():
+            parent_ids = list(parent_ids)
+            for related_model, field_name in get_soft_delete_dependents(
+                parent_model
+            ):
+                seen = plan.setdefault(related_model, set())
+                for index in range(0, len(parent_ids), SOFT_DELETE_BATCH_SIZE):
+                    child_ids = _all_objects(related_model).filter(
+                        **{
+                            f"{field_name}__in": parent_ids[
+                                index:index + SOFT_DELETE_BATCH_SIZE
+                            ],
+                            "is_deleted": not deleting,
+                        }
+                    ).values_list("pk", flat=True)
+                    new_ids = set(child_ids) - seen
+                    if new_ids:
+                        seen.update(new_ids)
+                        next_frontier.setdefault(related_model, set()).update(
+                            new_ids
+                        )
+        frontier = next_frontier
 
-                    for obj in related_objects:
-                        if hasattr(obj, "restore"):
-                            obj.restore(cascade=True)
+    return {model: ids for model, ids in plan.items() if ids}
 
 
 class ActiveManager(models.Manager):
@@ -208,6 +404,16 @@ class ActiveManager(models.Manager):
         return super().get_queryset().filter(is_deleted=False)
 
 
+# Condition for partial indexes: ActiveManager always filters on it, so the
+# planner can use them for every default-manager query.
+NOT_DELETED = models.Q(is_deleted=False)
+
+
+def live_index(*fields, name):
+    """Return a partial index over rows that are not soft deleted."""
+    return models.Index(fields=list(fields), condition=NOT_DELETED, name=name)
+
+
 class FAQ(SoftDeletableModel):
     objects = ActiveManager()
     all_objects = models.Manager()
@@ -259,6 +465,10 @@ class Business(SoftDeletableModel):
         blank=True,
         help_text=("Add services offered by this business (comma-separated tags)."),
     )
+    # Sorted copy of the services_offered tag names, kept in sync whenever
+    # the tags change, so membership checks and serialization skip the
+    # generic-relation join.
+    services_offered_names = models.JSONField(default=list, blank=True, editable=False)
 
     timezone = models.CharField(max_length=50, default="America/Edmonton")
 
@@ -270,6 +480,44 @@ class Business(SoftDeletableModel):
     def __str__(self):
         return self.name
 
+    def sync_services_offered_names(self):
+        """Copy the current services_offered tag names into the column."""
+        self.services_offered_names = sorted(self.services_offered.names())
+        Business.all_objects.filter(pk=self.pk).update(
+            services_offered_names=self.services_offered_names
+        )
+
+
+@receiver(m2m_changed, sender=Business.services_offered.through)
+def _services_offered_changed(sender, instance, action, **kwargs):
+    if isinstance(instance, Business) and action in (
+        "post_add",
+        "post_remove",
+        "post_clear",
+    ):
+        instance.sync_services_offered_names()
+
+
+@receiver(post_save, sender=Tag)
+def _service_tag_renamed(sender, instance, created, **kwargs):
+    if created:
+        return
+    for business in Business.all_objects.filter(services_offered=instance):
+        business.sync_services_offered_names()
+
+
+@receiver(pre_delete, sender=Tag)
+def _service_tag_deleted(sender, instance, **kwargs):
+    # The cascade to TaggedItem sends no m2m_changed; drop the name while
+    # the businesses using the tag can still be found.
+    for business in Business.all_objects.filter(services_offered=instance):
+        business.services_offered_names = [
+            name for name in business.services_offered_names if name != instance.name
+        ]
+        Business.all_objects.filter(pk=business.pk).update(
+            services_offered_names=business.services_offered_names
+        )
+
 
 class Client(SoftDeletableModel):
     objects = ActiveManager()
@@ -292,6 +540,9 @@ class Client(SoftDeletableModel):
 
     class Meta:
         unique_together = ("business", "user")
+        indexes = [
+            live_index("business", "-id", name="client_business_live_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.name} ({self.business.name})"
@@ -414,7 +665,7 @@ class ServiceQuestionnaire(SoftDeletableModel):
         return f"{self.service_name} Questionnaire ({self.business.name})"
 
     def clean(self):
-        offered_services = self.business.services_offered.names()
+        offered_services = self.business.services_offered_names
         if self.service_name not in offered_services:
             raise ValidationError(
                 {
@@ -477,7 +728,7 @@ class ServiceTermsTemplate(SoftDeletableModel):
         return f"{self.service_name} Terms ({self.business.name})"
 
     def clean(self):
-        offered_services = self.business.services_offered.names()
+        offered_services = self.business.services_offered_names
         if self.service_name not in offered_services:
             raise ValidationError(
                 {
@@ -545,6 +796,21 @@ class Service(SoftDeletableModel):
     province_state = models.CharField(max_length=100)
     postal_code = models.CharField(max_length=20)
 
+    # Geocode cache used for route planning; cleared when the address changes.
+    latitude = models.DecimalField(
+        max_digits=9,
+        decimal_places=6,
+        blank=True,
+        null=True,
+    )
+    longitude = models.DecimalField(
+        max_digits=9,
+        decimal_places=6,
+        blank=True,
+        null=True,
+    )
+    geocoded_at = models.DateTimeField(blank=True, null=True)
+
     # Save filled questionnaire form
     filled_questionnaire = models.JSONField(
         blank=True,
@@ -560,6 +826,16 @@ class Service(SoftDeletableModel):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            live_index(
+                "business",
+                "service_name",
+                name="service_business_name_live_idx",
+            ),
+            live_index("client", "-id", name="service_client_live_idx"),
+        ]
+
     def __str__(self):
         return f"{self.service_name} for {self.client.user.name}"
 
@@ -596,6 +872,16 @@ class Job(SoftDeletableModel):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            live_index("service", "status", name="job_service_status_live_idx"),
+            live_index(
+                "assigned_to",
+                "status",
+                name="job_assignee_status_live_idx",
+            ),
+        ]
+
     def __str__(self):
         return (
             f"Job {self.title} - {self.get_status_display()} "
@@ -603,8 +889,30 @@ class Job(SoftDeletableModel):
         )
 
 
+class JobPhotoManager(ActiveManager):
+    def claim_for_processing(self, batch_size, lease):
+        """
+        Lease up to ``batch_size`` photos awaiting renditions to the caller.
+
+        Claimed rows have ``next_attempt_at`` pushed past the lease, so other
+        workers skip them and a crashed worker's rows become due again.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                self.select_for_update(skip_locked=True)
+                .filter(processing_status="PENDING", next_attempt_at__lte=now)
+                .order_by("next_attempt_at", "id")[:batch_size]
+            )
+            if batch:
+                self.filter(pk__in=[photo.pk for photo in batch]).update(
+                    next_attempt_at=now + lease
+                )
+        return batch
+
+
 class JobPhoto(SoftDeletableModel):
-    objects = ActiveManager()
+    objects = JobPhotoManager()
     all_objects = models.Manager()
 
     job = models.ForeignKey(
@@ -617,9 +925,50 @@ class JobPhoto(SoftDeletableModel):
         max_length=10,
         choices=JOB_PHOTO_TYPE_CHOICES,
     )
+    width = models.PositiveIntegerField(blank=True, null=True)
+    height = models.PositiveIntegerField(blank=True, null=True)
+
+    thumbnail = models.ImageField(
+        upload_to="job_photos/renditions/",
+        blank=True,
+        null=True,
+    )
+    thumbnail_width = models.PositiveIntegerField(blank=True, null=True)
+    thumbnail_height = models.PositiveIntegerField(blank=True, null=True)
+    medium = models.ImageField(
+        upload_to="job_photos/renditions/",
+        blank=True,
+        null=True,
+    )
+    medium_width = models.PositiveIntegerField(blank=True, null=True)
+    medium_height = models.PositiveIntegerField(blank=True, null=True)
+
+    processing_status = models.CharField(
+        max_length=10,
+        choices=JOB_PHOTO_PROCESSING_STATUS_CHOICES,
+        default="PENDING",
+    )
+    processing_attempts = models.PositiveIntegerField(default=0)
+    processing_error = models.TextField(blank=True, default="")
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(blank=True, null=True)
 
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            live_index(
+                "job",
+                "-uploaded_at",
+                name="jobphoto_job_uploaded_live_idx",
+            ),
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                condition=NOT_DELETED & models.Q(processing_status="PENDING"),
+                name="jobphoto_pending_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.photo_type} photo for Job {self.job.id}"
 
@@ -679,6 +1028,11 @@ class Quote(SoftDeletableModel):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            live_index("service", "-id", name="quote_service_live_idx"),
+        ]
+
     def __str__(self):
         return f"{self.quote_number} for {self.service.client}"
 
@@ -709,42 +1063,17 @@ class Quote(SoftDeletableModel):
             super().save(*args, **kwargs)
             return
 
-        # Retry quote number generation if a concurrent insert uses the same value.
-        for _ in range(5):
+        # Allocate inside the insert's transaction so a failed save
+        # rolls the sequence back and leaves no gap.
+        with transaction.atomic():
             self.quote_number = self.generate_quote_number()
-            try:
-                super().save(*args, **kwargs)
-                return
-            except IntegrityError as exc:
-                if "core_quote_quote_number_key" not in str(exc):
-                    raise
-                self.quote_number = None
-
-        raise IntegrityError(
-            "Unable to generate a unique quote number after multiple attempts."
-        )
+            super().save(*args, **kwargs)
 
     def generate_quote_number(self):
         """Generates a unique quote number in the format: Q-YYYY-XXX."""
         year = timezone.now().year
-        prefix = f"Q-{year}-"
-
-        existing_quote_numbers = Quote.all_objects.filter(
-            quote_number__startswith=prefix
-        ).values_list("quote_number", flat=True)
-
-        max_number = 0
-        for quote_number in existing_quote_numbers:
-            try:
-                current_number = int(str(quote_number).split("-")[-1])
-            except (ValueError, IndexError, TypeError):
-                continue
-            if current_number > max_number:
-                max_number = current_number
-
-        new_number = max_number + 1
-
-        return f"{prefix}{new_number:03d}"
+        number = DocumentSequence.objects.next_value("QUOTE", year)
+        return format_document_number("QUOTE", year, number)
 
 
 class Invoice(SoftDeletableModel):
@@ -798,35 +1127,46 @@ class Invoice(SoftDeletableModel):
     notes = models.TextField(blank=True, null=True)
 
     paid_at = models.DateTimeField(blank=True, null=True)
+    billing_period_start = models.DateField(
+        blank=True,
+        null=True,
+        help_text="First day of the subscription period this invoice bills.",
+    )
     is_active = models.BooleanField(default=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            live_index("business", "-id", name="invoice_business_live_idx"),
+            live_index("client", "-id", name="invoice_client_live_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["service", "billing_period_start"],
+                condition=models.Q(billing_period_start__isnull=False),
+                name="unique_invoice_per_service_period",
+            ),
+        ]
+
     def __str__(self):
         return f"Invoice {self.invoice_number} for {self.client.user.name}"
 
     def save(self, *args, **kwargs):
-        if not self.invoice_number:
+        if self.invoice_number:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
             self.invoice_number = self.generate_invoice_number()
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
 
     def generate_invoice_number(self):
+        """Generates a unique invoice number in the format: INV-YYYY-XXX."""
         year = timezone.now().year
-        prefix = f"INV-{year}-"
-        last_invoice = (
-            Invoice.objects.filter(invoice_number__startswith=prefix)
-            .order_by("invoice_number")
-            .last()
-        )
-        new_number = 1
-        if last_invoice:
-            try:
-                last_number = int(last_invoice.invoice_number.split("-")[-1])
-                new_number = last_number + 1
-            except ValueError:
-                pass
-        return f"{prefix}{new_number:03d}"
+        number = DocumentSequence.objects.next_value("INVOICE", year)
+        return format_document_number("INVOICE", year, number)
 
 
 class Payout(SoftDeletableModel):
@@ -892,8 +1232,226 @@ class Payout(SoftDeletableModel):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            live_index("business", "-id", name="payout_business_live_idx"),
+        ]
+
     def __str__(self):
         return (
             f"Payout {self.id} for {self.invoice.invoice_number} "
             f"({self.get_status_display()})"
         )
+
+
+DOCUMENT_NUMBER_PREFIXES = {
+    "QUOTE": "Q",
+    "INVOICE": "INV",
+}
+
+
+def format_document_number(document_type, year, number):
+    """Format a sequence value as a number like ``INV-2025-007``."""
+    return f"{DOCUMENT_NUMBER_PREFIXES[document_type]}-{year}-{number:03d}"
+
+
+def parse_document_number(number):
+    """Split a number like ``Q-2025-007`` into ``("Q", 2025, 7)``."""
+    try:
+        prefix, year, sequence = str(number).rsplit("-", 2)
+        return prefix, int(year), int(sequence)
+    except (ValueError, TypeError):
+        return None
+
+
+class DocumentSequenceManager(models.Manager):
+    """Manager for allocating document numbers."""
+
+    def next_value(self, document_type, year):
+        """
+        Allocate the next number for a document type and year.
+
+        The sequence row is incremented with a single UPDATE, which holds
+        its row lock until the surrounding transaction commits, so
+        concurrent callers are serialized and never see the same value.
+        """
+        return self.next_values(document_type, year, 1)[0]
+
+    def next_values(self, document_type, year, count):
+        """Allocate a block of ``count`` consecutive numbers as a range."""
+        lookup = {"document_type": document_type, "year": year}
+        with transaction.atomic(using=self.db):
+            updated = self.filter(**lookup).update(
+                last_value=models.F("last_value") + count
+            )
+            if not updated:
+                try:
+                    with transaction.atomic(using=self.db):
+                        self.create(
+                            last_value=(
+                                self._existing_max(document_type, year) + count
+                            ),
+                            **lookup,
+                        )
+                except IntegrityError:
+                    # Another transaction created the row first.
+                    self.filter(**lookup).update(
+                        last_value=models.F("last_value") + count
+                    )
+
+            last_value = self.filter(**lookup).values_list(
+                "last_value", flat=True
+            ).get()
+        return range(last_value - count + 1, last_value + 1)
+
+    def _existing_max(self, document_type, year):
+        """Return the highest number already issued, for seeding a new row."""
+        if document_type == "QUOTE":
+            model, field = Quote, "quote_number"
+        else:
+            model, field = Invoice, "invoice_number"
+
+        prefix = f"{DOCUMENT_NUMBER_PREFIXES[document_type]}-{year}-"
+        numbers = model.all_objects.filter(
+            **{f"{field}__startswith": prefix}
+        ).values_list(field, flat=True)
+
+        max_number = 0
+        for number in numbers:
+            parsed = parse_document_number(number)
+            if parsed and parsed[2] > max_number:
+                max_number = parsed[2]
+        return max_number
+
+
+class DocumentSequence(models.Model):
+    """Per-year counter used to number quotes and invoices."""
+
+    document_type = models.CharField(
+        max_length=20,
+        choices=DOCUMENT_TYPE_CHOICES,
+    )
+    year = models.PositiveIntegerField()
+    last_value = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DocumentSequenceManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["document_type", "year"],
+                name="unique_document_sequence",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.document_type} {self.year}: {self.last_value}"
+
+
+class EmailOutboxManager(models.Manager):
+    def enqueue(self, subject, body, to, from_email=None, reply_to=None):
+        """
+        Queue an email for the delivery worker.
+
+        Call this inside the transaction that makes the business change, so
+        the email is only sent if that change commits.
+        """
+        return self.create(
+            subject=subject,
+            body=body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(to),
+            reply_to=list(reply_to or []),
+        )
+
+    def claim_batch(self, batch_size, lease):
+        """
+        Lease up to ``batch_size`` due emails to the calling worker.
+
+        Claimed rows have ``next_attempt_at`` pushed past the lease, so other
+        workers skip them and a crashed worker's rows become due again.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                self.select_for_update(skip_locked=True)
+                .filter(status="PENDING", next_attempt_at__lte=now)
+                .order_by("next_attempt_at", "id")[:batch_size]
+            )
+            if batch:
+                self.filter(pk__in=[email.pk for email in batch]).update(
+                    next_attempt_at=now + lease
+                )
+        return batch
+
+
+class EmailOutbox(models.Model):
+    """Transactional email waiting to be delivered by run_email_worker."""
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+
+    status = models.CharField(
+        max_length=10,
+        choices=EMAIL_OUTBOX_STATUS_CHOICES,
+        default="PENDING",
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    sent_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EmailOutboxManager()
+
+    class Meta:
+        verbose_name_plural = "email outbox"
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                condition=models.Q(status="PENDING"),
+                name="emailoutbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+class StripeEvent(models.Model):
+    """Raw Stripe webhook event, stored once per event id for processing."""
+
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    livemode = models.BooleanField(default=False)
+    stripe_created_at = models.DateTimeField(
+        help_text="When Stripe created the event; events apply in this order.",
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STRIPE_EVENT_STATUS_CHOICES,
+        default="PENDING",
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["stripe_created_at", "id"],
+                condition=models.Q(status="PENDING"),
+                name="stripeevent_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} ({self.status})"
@@ -0,0 +1,114 @@
+"""
+Delivery of queued transactional email.
+"""
+import logging
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from core.models import EmailOutbox
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+MAX_ATTEMPTS = 6
+BASE_RETRY_DELAY = timedelta(minutes=1)
+MAX_RETRY_DELAY = timedelta(hours=1)
+# How long a worker may hold a claimed batch before other workers retry it.
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+def retry_delay(attempts):
+    """Return the exponential backoff before retry number ``attempts``."""
+    return min(BASE_RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def deliver_pending_emails(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Send one batch of due emails over a single backend connection.
+
+    Failed emails are retried with exponential backoff and marked DEAD
+    after MAX_ATTEMPTS. If the connection cannot be opened, every claimed
+    email counts as a failed attempt. Returns a ``{"sent", "retried",
+    "dead"}`` summary.
+    """
+    summary = {"sent": 0, "retried": 0, "dead": 0}
+    batch = EmailOutbox.objects.claim_batch(batch_size, CLAIM_LEASE)
+    if not batch:
+        return summary
+
+    try:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+    except Exception as exc:
+        for email in batch:
+            email.attempts += 1
+            _record_failure(email, exc)
+            summary["dead" if email.status == "DEAD" else "retried"] += 1
+        return summary
+
+    with connection:
+        for email in batch:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=email.to,
+                reply_to=email.reply_to,
+                connection=connection,
+            )
+            email.attempts += 1
+            try:
+                message.send()
+            except Exception as exc:
+                _record_failure(email, exc)
+                summary["dead" if email.status == "DEAD" else "retried"] += 1
+                continue
+
+            email.status = "SENT"
+            email.sent_at = timezone.now()
+            email.last_error = ""
+            email.save(
+                update_fields=[
+                    "status",
+                    "attempts",
+                    "sent_at",
+                    "last_error",
+                    "updated_at",
+                ]
+            )
+            summary["sent"] += 1
+
+    return summary
+
+
+def _record_failure(email, exc):
+    """Schedule a retry for ``email``, or dead-letter it when out of attempts."""
+    email.last_error = f"{type(exc).__name__}: {exc}"
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = "DEAD"
+        logger.error(
+            "Email %s dead-lettered after %s attempts: %s",
+            email.pk,
+            email.attempts,
+            email.last_error,
+        )
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        logger.warning(
+            "Email %s failed (attempt %s), retrying: %s",
+            email.pk,
+            email.attempts,
+            email.last_error,
+        )
+    email.save(
+        update_fields=[
+            "status",
+            "attempts",
+            "next_attempt_at",
+            "last_error",
+            "updated_at",
+        ]
+    )
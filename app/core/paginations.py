@@ -0,0 +1,135 @@
+"""
+Shared pagination for list endpoints that return column metadata.
+"""
+
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework import pagination
+from rest_framework.response import Response
+
+
+# Below this many estimated rows an exact COUNT(*) is cheap enough to run.
+APPROXIMATE_COUNT_THRESHOLD = 10000
+
+
+def estimate_queryset_count(queryset):
+    """
+    Return the planner's row estimate for ``queryset``, or None when the
+    database cannot provide one.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def approximate_count(queryset):
+    """
+    Count ``queryset`` from the query planner when the result is large,
+    falling back to an exact COUNT(*) for small or unsupported cases.
+    """
+    estimate = estimate_queryset_count(queryset)
+    if estimate is None or estimate < APPROXIMATE_COUNT_THRESHOLD:
+        return queryset.count()
+    return estimate
+
+
+class ApproximateCountPaginator(DjangoPaginator):
+    """Django paginator whose count comes from ``approximate_count``."""
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
+
+class KeysetPagination(pagination.CursorPagination):
+    """Cursor pagination on the primary key, newest first."""
+
+    ordering = "-id"
+    page_size_query_param = "page_size"
+
+
+class ColumnsPagination(pagination.PageNumberPagination):
+    """
+    Page-number pagination that also reports the table ``columns``.
+
+    Passing ``?cursor=`` switches to keyset pagination on ``-id``, which
+    skips the COUNT(*) and the OFFSET scan so deep pages cost the same as
+    the first one. ``?count=approximate`` replaces the exact count with a
+    planner estimate on large result sets.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    columns = []
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.queryset = queryset
+        self.approximate = (
+            request.query_params.get(self.count_query_param) == "approximate"
+        )
+
+        if self.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination()
+            self.keyset.page_size = self.page_size
+            self.keyset.max_page_size = self.max_page_size
+            self.keyset.cursor_query_param = self.cursor_query_param
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        self.keyset = None
+        if self.approximate:
+            self.django_paginator_class = ApproximateCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            payload = {
+                "next": self.keyset.get_next_link(),
+                "previous": self.keyset.get_previous_link(),
+                "page_size": self.keyset.page_size,
+            }
+            if self.approximate:
+                payload["count"] = approximate_count(self.queryset)
+            payload.update({"columns": self.columns, "results": data})
+            return Response(payload)
+
+        return Response({
+            "count": self.page.paginator.count,
+            "total_pages": self.page.paginator.num_pages,
+            "current_page": self.page.number,
+            "page_size": self.get_page_size(self.request),
+            "columns": self.columns,
+            "results": data,
+        })
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.extend([
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset pagination cursor; pass an empty "
+                               "value to start from the first page.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'approximate' to estimate the count "
+                               "on large result sets.",
+                "schema": {"type": "string", "enum": ["approximate"]},
+            },
+        ])
+        return parameters
@@ -0,0 +1,210 @@
+"""
+Request-scoped tenant context.
+
+The businesses a user owns, the client records they hold and their team
+memberships are resolved once per request with a single UNION query and
+kept on the request. Viewsets then scope querysets with plain
+``business_id__in`` / ``client_id__in`` / ``assigned_to_id__in`` filters
+instead of joining back to the user.
+
+When ``TENANT_SHARED_CACHE`` names a cache alias shared by every worker,
+resolved ids are also cached across requests for ``TENANT_CACHE_TIMEOUT``
+seconds. Saves and deletes of Business, Client and TeamMember rows, and
+soft deletes or restores of them, drop the entries of the users they are
+linked to before and after the change. Without a shared alias nothing is
+cached, as invalidation in one process could not reach the others.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import CharField, F, Value
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.models import Business, Client, TeamMember, soft_delete_changed
+
+
+CACHE_KEY = "tenant-context:{}"
+
+# model: (kind stored in the context, field holding the user id,
+#         field holding the business id)
+TENANT_MODELS = {
+    Business: ("business", "owner_id", "id"),
+    Client: ("client", "user_id", "business_id"),
+    TeamMember: ("team_member", "employee_id", "business_id"),
+}
+
+
+class TenantContext:
+    """
+    Ids of the tenant rows a user is linked to, oldest first:
+    businesses they own, their client records (and the businesses those
+    belong to) and their team memberships.
+    """
+
+    __slots__ = (
+        "business_ids",
+        "client_ids",
+        "client_business_ids",
+        "team_member_ids",
+    )
+
+    def __init__(
+        self,
+        business_ids=(),
+        client_ids=(),
+        client_business_ids=(),
+        team_member_ids=(),
+    ):
+        self.business_ids = tuple(business_ids)
+        self.client_ids = tuple(client_ids)
+        self.client_business_ids = tuple(client_business_ids)
+        self.team_member_ids = tuple(team_member_ids)
+
+    @property
+    def business_id(self):
+        """The user's first business, as ``Business.objects...first()``."""
+        return self.business_ids[0] if self.business_ids else None
+
+    @property
+    def client_id(self):
+        """The user's first client record."""
+        return self.client_ids[0] if self.client_ids else None
+
+    def get_business(self):
+        """Load the user's first business, or return None."""
+        if self.business_id is None:
+            return None
+        return Business.objects.filter(pk=self.business_id).first()
+
+    def get_client(self):
+        """Load the user's first client record with its user, or None."""
+        if self.client_id is None:
+            return None
+        return Client.objects.select_related("user").filter(pk=self.client_id).first()
+
+    def as_tuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+
+def _tenant_rows(model, user_id):
+    kind, user_field, business_field = TENANT_MODELS[model]
+    return (
+        model.objects.filter(**{user_field: user_id})
+        # Annotate every column, in select order: UNION matches columns by
+        # position and values_list() would otherwise move "kind" last and
+        # collapse Business's repeated "id".
+        .annotate(
+            kind=Value(kind, output_field=CharField()),
+            tenant_id=F("id"),
+            tenant_business_id=F(business_field),
+        )
+        .values_list("kind", "tenant_id", "tenant_business_id")
+    )
+
+
+def resolve_tenant_context(user):
+    """Return the user's ``TenantContext`` with one query."""
+    rows_query = (
+        _tenant_rows(Business, user.pk)
+        .union(_tenant_rows(Client, user.pk), all=True)
+        .union(_tenant_rows(TeamMember, user.pk), all=True)
+    )
+    rows = {kind: [] for kind, _, _ in TENANT_MODELS.values()}
+    for kind, pk, business_id in rows_query:
+        rows[kind].append((pk, business_id))
+    clients = sorted(rows["client"])
+    return TenantContext(
+        business_ids=sorted(pk for pk, _ in rows["business"]),
+        client_ids=[pk for pk, _ in clients],
+        client_business_ids=sorted({business_id for _, business_id in clients}),
+        team_member_ids=sorted(pk for pk, _ in rows["team_member"]),
+    )
+
+
+def _tenant_cache():
+    alias = settings.TENANT_SHARED_CACHE
+    if not alias or not settings.TENANT_CACHE_TIMEOUT:
+        return None
+    return caches[alias]
+
+
+def get_tenant_context(request):
+    """
+    Return the tenant context of ``request.user``, resolving it at most
+    once per request and, between requests, from the cache.
+    """
+    # DRF wraps the Django request; store on the underlying one so
+    # middleware and views share it.
+    http_request = getattr(request, "_request", request)
+    user = request.user
+    context = getattr(http_request, "_tenant_context", None)
+    if context is not None and context[0] == user.pk:
+        return context[1]
+
+    if not user.is_authenticated:
+        tenant = TenantContext()
+    else:
+        cache = _tenant_cache()
+        cached = cache.get(CACHE_KEY.format(user.pk)) if cache else None
+        if cached is not None:
+            tenant = TenantContext(*cached)
+        else:
+            tenant = resolve_tenant_context(user)
+            if cache:
+                cache.set(
+                    CACHE_KEY.format(user.pk),
+                    tenant.as_tuple(),
+                    settings.TENANT_CACHE_TIMEOUT,
+                )
+
+    http_request._tenant_context = (user.pk, tenant)
+    return tenant
+
+
+def invalidate_tenant_context(*user_ids):
+    """Drop cached tenant contexts of ``user_ids``."""
+    cache = _tenant_cache()
+    if cache and user_ids:
+        cache.delete_many([CACHE_KEY.format(user_id) for user_id in set(user_ids)])
+
+
+@receiver(pre_save, sender=Business)
+@receiver(pre_save, sender=Client)
+@receiver(pre_save, sender=TeamMember)
+def _tenant_row_saving(sender, instance, **kwargs):
+    # Remember who the row belonged to, so reassigning it also drops the
+    # previous user's cached scope.
+    if instance.pk is None or _tenant_cache() is None:
+        return
+    user_field = TENANT_MODELS[sender][1]
+    instance._tenant_previous_user_id = (
+        sender.all_objects.filter(pk=instance.pk)
+        .values_list(user_field, flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Business)
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=Business)
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=TeamMember)
+def _tenant_row_changed(sender, instance, **kwargs):
+    user_field = TENANT_MODELS[sender][1]
+    user_ids = [getattr(instance, user_field)]
+    previous = instance.__dict__.pop("_tenant_previous_user_id", None)
+    if previous is not None:
+        user_ids.append(previous)
+    invalidate_tenant_context(*user_ids)
+
+
+@receiver(soft_delete_changed)
+def _tenant_rows_soft_deleted(sender, pks, **kwargs):
+    if sender not in TENANT_MODELS or _tenant_cache() is None:
+        return
+    user_field = TENANT_MODELS[sender][1]
+    invalidate_tenant_context(
+        *sender.all_objects.filter(pk__in=pks).values_list(user_field, flat=True)
+    )
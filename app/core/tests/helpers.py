@@ -0,0 +1,52 @@
+"""Shared fixtures for query-count regression tests."""
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from core.models import BankingInformation, Client, Service
+
+
+def count_queries(test, url):
+    """GET url with the test's client and return (query count, response)."""
+    with CaptureQueriesContext(connection) as context:
+        res = test.client.get(url)
+    test.assertEqual(res.status_code, status.HTTP_200_OK)
+    return len(context.captured_queries), res
+
+
+def create_client_services(business, count, service_names=("Flooring",)):
+    """Create clients with a card on file and one service each."""
+    services = []
+    for _ in range(count):
+        offset = Service.all_objects.count()
+        user = get_user_model().objects.create_user(
+            f"query-client-{offset}@example.com",
+            "test123",
+            name=f"Client {offset}",
+            role="CLIENT",
+        )
+        client_record = Client.objects.create(business=business, user=user)
+        BankingInformation.objects.create(
+            client=client_record,
+            payment_method_type="CARD",
+            stripe_payment_method_id="pm_test",
+        )
+        services.append(
+            Service.objects.create(
+                client=client_record,
+                business=business,
+                service_name=service_names[offset % len(service_names)],
+                start_date=date.today(),
+                price=Decimal("100.00"),
+                street_address=f"{offset} Query Street",
+                city="Calgary",
+                province_state="AB",
+                postal_code="T2T2T2",
+            )
+        )
+    return services
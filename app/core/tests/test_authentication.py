@@ -0,0 +1,286 @@
+"""Tests for cached token authentication."""
+
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from core.authentication import (
+    CachedTokenAuthentication,
+    TokenCache,
+    record_login,
+    revoke_token,
+    revoke_user_tokens,
+    token_cache,
+)
+from core.models import AuthToken
+
+
+REVOKE_TOKENS_URL = reverse("user:revoke-tokens")
+LOGOUT_URL = reverse("user:logout")
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and dropped on changes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "token-user@example.com",
+            "test123",
+        )
+        self.token = AuthToken.objects.issue(self.user)
+        self.auth = CachedTokenAuthentication()
+        token_cache.clear()
+        cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.addCleanup(cache.clear)
+
+    def test_repeat_lookup_skips_database(self):
+        """Test only the first lookup of a token queries."""
+        # The lookup, then the first sliding-expiry write.
+        with self.assertNumQueries(2):
+            user, auth = self.auth.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            cached_user, _ = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(cached_user, self.user)
+        self.assertEqual(auth.key, self.token.key)
+        self.assertIsNot(cached_user, user)
+
+    def test_unknown_token_rejected(self):
+        """Test an unknown key still fails authentication."""
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials("missing")
+
+    def test_revoked_token_invalidated(self):
+        """Test revoking a token stops it authenticating."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        revoke_token(self.token.key)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deactivated_user_invalidated(self):
+        """Test saving an inactive user drops the cached token."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    @override_settings(TOKEN_AUTH_SHARED_CACHE="default")
+    def test_shared_cache_used_after_local_miss(self):
+        """Test another process's lookup is served by the shared cache."""
+        self.auth.authenticate_credentials(self.token.key)
+        token_cache.clear()
+
+        with self.assertNumQueries(0):
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user, self.user)
+
+        self.user.set_password("new-pass123")
+        self.user.save()
+        token_cache.clear()
+        with self.assertNumQueries(1):  # Recently used, so no refresh write.
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_token_cache_evicts_least_recent(self):
+        """Test the LRU keeps at most max_size entries."""
+        lru = TokenCache(max_size=2)
+        lru.set("a", self.user, 60)
+        lru.set("b", self.user, 60)
+        lru.get("a")
+        lru.set("c", self.user, 60)
+
+        self.assertIsNotNone(lru.get("a"))
+        self.assertIsNone(lru.get("b"))
+        self.assertIsNone(TokenCache(1).get("c"))
+
+    @override_settings(LAST_LOGIN_UPDATE_INTERVAL=300)
+    def test_last_login_written_once_per_interval(self):
+        """Test repeated logins coalesce into one last_login write."""
+        with self.assertNumQueries(1):
+            self.assertTrue(record_login(self.user))
+        first_login = self.user.last_login
+
+        stale = get_user_model().objects.get(pk=self.user.pk)
+        stale.last_login = None
+        with self.assertNumQueries(0):
+            self.assertFalse(record_login(self.user))
+            self.assertFalse(record_login(stale))
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, first_login)
+
+
+class AuthTokenTests(TestCase):
+    """Test token expiry, purging and revocation."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "expiring-user@example.com",
+            "test123",
+        )
+        self.auth = CachedTokenAuthentication()
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+
+    @override_settings(TOKEN_TTL=3600)
+    def test_issued_token_expires_after_ttl(self):
+        """Test new tokens are unique and expire after TOKEN_TTL."""
+        first = AuthToken.objects.issue(self.user)
+        second = AuthToken.objects.issue(self.user)
+
+        self.assertNotEqual(first.key, second.key)
+        self.assertEqual(len(first.key), 40)
+        self.assertAlmostEqual(
+            (first.expires_at - timezone.now()).total_seconds(), 3600, delta=5
+        )
+
+    def test_expired_token_rejected(self):
+        """Test an expired key fails in the same lookup query."""
+        token = AuthToken.objects.issue(self.user)
+        AuthToken.objects.filter(pk=token.pk).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        with self.assertNumQueries(1):
+            with self.assertRaises(AuthenticationFailed):
+                self.auth.authenticate_credentials(token.key)
+
+    @override_settings(TOKEN_TTL=3600, TOKEN_REFRESH_INTERVAL=60)
+    def test_use_slides_expiry(self):
+        """Test a token used after the refresh interval gets a new expiry."""
+        token = AuthToken.objects.issue(self.user)
+        old = timezone.now() - timedelta(minutes=30)
+        AuthToken.objects.filter(pk=token.pk).update(
+            last_used=old,
+            expires_at=old + timedelta(hours=1),
+        )
+
+        self.auth.authenticate_credentials(token.key)
+
+        token.refresh_from_db()
+        self.assertGreater(token.last_used, old)
+        self.assertAlmostEqual(
+            (token.expires_at - timezone.now()).total_seconds(), 3600, delta=5
+        )
+
+    def test_purge_command_deletes_expired_in_batches(self):
+        """Test the command removes only expired tokens."""
+        live = AuthToken.objects.issue(self.user)
+        expired = [AuthToken.objects.issue(self.user) for _ in range(3)]
+        AuthToken.objects.filter(pk__in=[token.pk for token in expired]).update(
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+        out = StringIO()
+
+        call_command("purge_expired_tokens", "--batch-size", "2", stdout=out)
+
+        self.assertEqual(list(AuthToken.objects.values_list("pk", flat=True)), [live.pk])
+        self.assertIn("Expired tokens purged: 3", out.getvalue())
+
+    def test_revoke_endpoint_deletes_all_tokens_at_once(self):
+        """Test users can log out everywhere with a single DELETE."""
+        token = AuthToken.objects.issue(self.user)
+        AuthToken.objects.issue(self.user)
+        other = AuthToken.objects.issue(
+            get_user_model().objects.create_user("other@example.com", "test123")
+        )
+        api = APIClient()
+        api.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        res = api.post(REVOKE_TOKENS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["revoked"], 2)
+        self.assertEqual(list(AuthToken.objects.values_list("pk", flat=True)), [other.pk])
+        api.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        self.assertEqual(
+            api.post(REVOKE_TOKENS_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_revoke_user_tokens_is_one_statement(self):
+        """Test bulk revocation skips the per-row delete collector."""
+        for _ in range(3):
+            AuthToken.objects.issue(self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(revoke_user_tokens(self.user.pk), 3)
+
+    def test_non_staff_cannot_revoke_other_users(self):
+        """Test only staff can name another user."""
+        api = APIClient()
+        api.force_authenticate(self.user)
+
+        res = api.post(REVOKE_TOKENS_URL, {"user": self.user.pk + 1})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_logout_revokes_only_current_token(self):
+        """Test logging out ends this session and keeps the others."""
+        token, other = AuthToken.objects.issue(self.user), AuthToken.objects.issue(self.user)
+        api = APIClient()
+        api.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        res = api.post(LOGOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(AuthToken.objects.filter(pk=token.pk).exists())
+        self.assertTrue(AuthToken.objects.filter(pk=other.pk).exists())
+        self.assertEqual(api.post(LOGOUT_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_admin_delete_invalidates_cached_tokens(self):
+        """Test tokens deleted in the admin stop authenticating at once."""
+        admin_user = get_user_model().objects.create_superuser(
+            "token-admin@example.com",
+            "test123",
+        )
+        self.client.force_login(admin_user)
+        token = AuthToken.objects.issue(self.user)
+        self.auth.authenticate_credentials(token.key)
+
+        res = self.client.post(
+            reverse("admin:core_authtoken_changelist"),
+            {
+                "action": "delete_selected",
+                "_selected_action": [token.pk],
+                "post": "yes",
+            },
+        )
+
+        self.assertEqual(res.status_code, 302)
+        self.assertFalse(AuthToken.objects.exists())
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(token.key)
+
+    def test_migration_reverse_restores_newest_tokens(self):
+        """Test rolling back 0029 copies each user's newest token back."""
+        older, newest = AuthToken.objects.issue(self.user), AuthToken.objects.issue(self.user)
+        AuthToken.objects.filter(pk=older.pk).update(
+            created=timezone.now() - timedelta(days=1)
+        )
+        migration = import_module("core.migrations.0029_auth_token")
+
+        migration.restore_authtoken_tokens(apps, None)
+
+        Token = apps.get_model("authtoken", "Token")
+        self.assertEqual(
+            list(Token.objects.values_list("key", "user_id")),
+            [(newest.key, self.user.pk)],
+        )
@@ -1,13 +1,21 @@
 """
 Test custom Django management commands.
 """
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from django.core import mail
+from django.core.mail import get_connection
 from django.core.management import call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core.models import EmailOutbox
+from core.outbox import MAX_ATTEMPTS, retry_delay
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -32,3 +40,125 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class EmailWorkerCommandTests(TestCase):
+    """Test the email outbox delivery worker."""
+
+    def enqueue(self, subject="Hello"):
+        return EmailOutbox.objects.enqueue(
+            subject,
+            "Body",
+            ["client@example.com"],
+        )
+
+    def test_worker_sends_due_emails_over_one_connection(self):
+        """Test a batch is delivered through a single backend connection."""
+        for index in range(3):
+            self.enqueue(f"Hello {index}")
+
+        with patch(
+            'core.outbox.get_connection',
+            wraps=get_connection,
+        ) as patched_get_connection:
+            call_command('run_email_worker', '--once', stdout=StringIO())
+
+        patched_get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            EmailOutbox.objects.filter(status="SENT").count(),
+            3,
+        )
+
+    def test_worker_skips_emails_not_yet_due(self):
+        """Test emails scheduled for later are left in the outbox."""
+        email = self.enqueue()
+        email.next_attempt_at = timezone.now() + timedelta(minutes=5)
+        email.save()
+
+        call_command('run_email_worker', '--once', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 0)
+        email.refresh_from_db()
+        self.assertEqual(email.status, "PENDING")
+
+    @patch('core.outbox.EmailMessage.send')
+    def test_failed_email_is_retried_with_backoff(self, patched_send):
+        """Test a failure schedules the next attempt with backoff."""
+        patched_send.side_effect = ConnectionError("provider down")
+        email = self.enqueue()
+
+        with self.assertLogs('core.outbox', level='WARNING'):
+            call_command('run_email_worker', '--once', stdout=StringIO())
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, "PENDING")
+        self.assertEqual(email.attempts, 1)
+        self.assertIn("provider down", email.last_error)
+        self.assertGreater(
+            email.next_attempt_at,
+            timezone.now() + timedelta(seconds=50),
+        )
+        self.assertEqual(retry_delay(3), timedelta(minutes=4))
+        self.assertEqual(retry_delay(20), timedelta(hours=1))
+
+    @patch('core.outbox.EmailMessage.send')
+    def test_email_dead_lettered_after_max_attempts(self, patched_send):
+        """Test the last failed attempt moves the email to DEAD."""
+        patched_send.side_effect = ConnectionError("provider down")
+        email = self.enqueue()
+        email.attempts = MAX_ATTEMPTS - 1
+        email.save()
+
+        with self.assertLogs('core.outbox', level='ERROR'):
+            call_command('run_email_worker', '--once', stdout=StringIO())
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, "DEAD")
+        self.assertEqual(email.attempts, MAX_ATTEMPTS)
+
+    @patch('core.outbox.get_connection')
+    def test_connection_failure_counts_as_failed_attempt(
+        self,
+        patched_get_connection,
+    ):
+        """Test an unreachable backend schedules retries for the batch."""
+        patched_get_connection.return_value.open.side_effect = (
+            ConnectionRefusedError("smtp down")
+        )
+        emails = [self.enqueue(f"Hello {index}") for index in range(2)]
+
+        with self.assertLogs('core.outbox', level='WARNING'):
+            call_command('run_email_worker', '--once', stdout=StringIO())
+
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual(email.status, "PENDING")
+            self.assertEqual(email.attempts, 1)
+            self.assertIn("smtp down", email.last_error)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+
+    @patch('core.management.commands.run_email_worker.time.sleep')
+    @patch('core.management.commands.run_email_worker.deliver_pending_emails')
+    def test_worker_keeps_polling_after_batch_error(
+        self,
+        patched_deliver,
+        patched_sleep,
+    ):
+        """Test an unexpected error is logged and the worker carries on."""
+        patched_deliver.side_effect = [
+            RuntimeError("database went away"),
+            {"sent": 1, "retried": 0, "dead": 0},
+            KeyboardInterrupt,
+        ]
+        out = StringIO()
+
+        with self.assertLogs(
+            'core.management.commands.run_email_worker',
+            level='ERROR',
+        ):
+            call_command('run_email_worker', stdout=out)
+
+        self.assertEqual(patched_deliver.call_count, 3)
+        patched_sleep.assert_called_once()
+        self.assertIn("Emails sent: 1", out.getvalue())
@@ -0,0 +1,235 @@
+"""Tests for streaming CSV/XLSX exports."""
+
+import csv
+import io
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from xml.etree import ElementTree
+
+import pytz
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.exports import stream_csv, stream_xlsx
+from core.models import Client, Invoice, Payout, Service
+from finance.tests.test_finance_api import create_business
+
+
+INVOICE_EXPORT_URL = reverse("finance:invoice-export")
+PAYOUT_EXPORT_URL = reverse("finance:payout-export")
+SERVICE_EXPORT_URL = reverse("operations:service-export")
+
+SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def read_csv(response):
+    content = b"".join(response.streaming_content).decode("utf-8-sig")
+    return list(csv.reader(io.StringIO(content)))
+
+
+def read_xlsx(content):
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+    rows = []
+    for row in sheet.iter(f"{SHEET_NS}row"):
+        values = []
+        for cell in row:
+            if cell.get("t") == "inlineStr":
+                values.append(cell.find(f"{SHEET_NS}is/{SHEET_NS}t").text)
+            else:
+                number = cell.find(f"{SHEET_NS}v")
+                values.append(None if number is None else number.text)
+        rows.append(values)
+    return rows
+
+
+class StreamWriterTests(TestCase):
+    """Test the CSV and XLSX stream writers."""
+
+    rows = [
+        ["INV-1", Decimal("105.00"), date(2026, 1, 31), None],
+        ['Quote "A" & <B>', 7, date(2026, 2, 1), "x\x01y"],
+    ]
+
+    def test_csv_streams_header_first(self):
+        """Test the header is its own chunk and values are formatted."""
+        chunks = list(stream_csv(["Number", "Total", "Due", "Note"], self.rows))
+
+        self.assertTrue(chunks[0].decode("utf-8-sig").startswith("Number,"))
+        content = b"".join(chunks).decode("utf-8-sig")
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[1], ["INV-1", "105.00", "2026-01-31", ""])
+        self.assertEqual(rows[2][0], 'Quote "A" & <B>')
+
+    def test_xlsx_is_a_valid_workbook(self):
+        """Test the streamed zip holds a parsable single-sheet workbook."""
+        content = b"".join(
+            stream_xlsx(["Number", "Total", "Due", "Note"], self.rows)
+        )
+
+        rows = read_xlsx(content)
+        self.assertEqual(rows[0], ["Number", "Total", "Due", "Note"])
+        self.assertEqual(rows[1], ["INV-1", "105.00", "2026-01-31", None])
+        self.assertEqual(rows[2], ['Quote "A" & <B>', "7", "2026-02-01", "xy"])
+
+    def test_formulas_are_escaped(self):
+        """Test text that looks like a formula is quoted in both formats."""
+        row = ["=HYPERLINK(\"http://x\")", "+1", "-2", "@SUM(A1)", "\tx", "a=b"]
+        expected = ["'=HYPERLINK(\"http://x\")", "'+1", "'-2", "'@SUM(A1)", "'\tx", "a=b"]
+
+        content = b"".join(stream_csv(["A"] * 6, [row])).decode("utf-8-sig")
+        self.assertEqual(list(csv.reader(io.StringIO(content)))[1], expected)
+
+        xlsx_rows = read_xlsx(b"".join(stream_xlsx(["A"] * 6, [row, [-5]])))
+        self.assertEqual(xlsx_rows[1], expected)
+        self.assertEqual(xlsx_rows[2], ["-5"])
+
+
+class ExportApiTests(TestCase):
+    """Test export actions on the invoice, payout and service viewsets."""
+
+    def setUp(self):
+        self.api = APIClient()
+        self.manager = get_user_model().objects.create_user(
+            "export-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.business = create_business(
+            owner=self.manager,
+            timezone="America/Toronto",
+        )
+        self.client_user = get_user_model().objects.create_user(
+            "export-client@example.com",
+            "test123",
+            name="Export Client",
+            role="CLIENT",
+        )
+        self.client_record = Client.objects.create(
+            business=self.business,
+            user=self.client_user,
+        )
+        other_manager = get_user_model().objects.create_user(
+            "export-other@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        other_business = create_business(
+            owner=other_manager,
+            slug="other-export-business",
+        )
+        self.other_invoice = Invoice.objects.create(
+            business=other_business,
+            client=Client.objects.create(
+                business=other_business,
+                user=self.client_user,
+            ),
+            due_date=date.today(),
+            subtotal=Decimal("1.00"),
+            total_amount=Decimal("1.00"),
+        )
+
+    def create_invoice(self, **params):
+        defaults = {
+            "business": self.business,
+            "client": self.client_record,
+            "due_date": date(2026, 1, 31),
+            "status": "SENT",
+            "subtotal": Decimal("100.00"),
+            "total_amount": Decimal("105.00"),
+        }
+        defaults.update(params)
+        return Invoice.objects.create(**defaults)
+
+    def test_invoice_csv_is_scoped_and_localized(self):
+        """Test managers export their own invoices in business time."""
+        invoice = self.create_invoice(
+            status="PAID",
+            paid_at=datetime(2026, 1, 15, 17, 0, tzinfo=pytz.utc),
+        )
+        self.api.force_authenticate(self.manager)
+
+        res = self.api.get(INVOICE_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="invoices-', res["Content-Disposition"])
+        header, *rows = read_csv(res)
+        self.assertEqual(len(rows), 1)
+        row = dict(zip(header, rows[0]))
+        self.assertEqual(row["Invoice number"], invoice.invoice_number)
+        self.assertEqual(row["Client"], "Export Client")
+        self.assertEqual(row["Total"], "105.00")
+        self.assertEqual(row["Due date"], "2026-01-31")
+        self.assertEqual(row["Paid at"], "2026-01-15 12:00:00")
+
+    def test_client_export_excludes_drafts(self):
+        """Test clients export only their non-draft invoices."""
+        self.create_invoice(status="DRAFT")
+        sent = self.create_invoice()
+        self.api.force_authenticate(self.client_user)
+
+        res = self.api.get(INVOICE_EXPORT_URL)
+
+        rows = read_csv(res)[1:]
+        self.assertEqual([row[0] for row in rows], [sent.invoice_number])
+        self.assertEqual(rows[0][1], "SENT")
+
+    def test_payout_xlsx_export(self):
+        """Test payouts export as an XLSX workbook."""
+        invoice = self.create_invoice(status="PAID")
+        Payout.objects.create(
+            business=self.business,
+            invoice=invoice,
+            amount=Decimal("105.00"),
+            status="PAID",
+            stripe_payment_intent_id="pi_export",
+        )
+        self.api.force_authenticate(self.manager)
+
+        res = self.api.get(PAYOUT_EXPORT_URL, {"file_type": "xlsx"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Disposition"].endswith('.xlsx"'))
+        header, *rows = read_xlsx(b"".join(res.streaming_content))
+        row = dict(zip(header, rows[0]))
+        self.assertEqual(row["Invoice number"], invoice.invoice_number)
+        self.assertEqual(row["Payment intent"], "pi_export")
+        self.assertEqual(row["Amount"], "105.00")
+
+    def test_service_export(self):
+        """Test services export with their client details."""
+        Service.objects.create(
+            client=self.client_record,
+            business=self.business,
+            service_name="Lawn care",
+            start_date=date.today() - timedelta(days=1),
+            service_type="ONE_TIME",
+            price=Decimal("80.00"),
+            street_address="1 Export Way",
+            city="Calgary",
+            province_state="AB",
+            postal_code="T2T2T2",
+        )
+        self.api.force_authenticate(self.manager)
+
+        res = self.api.get(SERVICE_EXPORT_URL)
+
+        header, *rows = read_csv(res)
+        row = dict(zip(header, rows[0]))
+        self.assertEqual(row["Service"], "Lawn care")
+        self.assertEqual(row["Client email"], "export-client@example.com")
+
+    def test_invalid_file_type_rejected(self):
+        """Test unknown export formats return 400."""
+        self.api.force_authenticate(self.manager)
+
+        res = self.api.get(INVOICE_EXPORT_URL, {"file_type": "pdf"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
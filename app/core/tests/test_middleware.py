@@ -0,0 +1,58 @@
+"""
+Tests for the query instrumentation middleware.
+"""
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.middleware import QueryBudgetExceeded, fingerprint_sql
+
+
+FAQS_URL = reverse('user:faqs')
+
+
+class QueryInstrumentationMiddlewareTests(TestCase):
+    """Test per-request query instrumentation."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_server_timing_header_reports_queries(self):
+        """Test responses carry db and total Server-Timing metrics."""
+        res = self.client.get(FAQS_URL)
+
+        self.assertIn('db;dur=', res['Server-Timing'])
+        self.assertIn('desc="1 queries"', res['Server-Timing'])
+        self.assertIn('total;dur=', res['Server-Timing'])
+
+    @override_settings(QUERY_BUDGETS={'FAQListView.get': 0})
+    def test_budget_exceeded_raises_when_configured(self):
+        """Test going over a view budget raises in tests."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(FAQS_URL)
+
+    @override_settings(
+        QUERY_BUDGETS={'FAQListView.get': 0},
+        QUERY_BUDGET_RAISE=False,
+    )
+    def test_budget_exceeded_logs_warning(self):
+        """Test going over a view budget logs a warning in production."""
+        with self.assertLogs('core.middleware', level='WARNING') as logs:
+            res = self.client.get(FAQS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('FAQListView.get ran 1 queries', logs.output[-1])
+
+    @override_settings(QUERY_INSTRUMENTATION=False)
+    def test_disabled_by_setting(self):
+        """Test no instrumentation is added when the setting is off."""
+        res = self.client.get(FAQS_URL)
+
+        self.assertFalse(res.has_header('Server-Timing'))
+
+    def test_fingerprint_ignores_parameters(self):
+        """Test queries differing only by parameters share a fingerprint."""
+        self.assertEqual(
+            fingerprint_sql('SELECT * FROM t WHERE id IN (%s, %s) LIMIT 21'),
+            fingerprint_sql('SELECT *  FROM t WHERE id IN (%s, %s, %s) LIMIT 5'),
+        )
@@ -1,8 +1,17 @@
 """
 Tests for models.
 """
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 from core import models
 
@@ -71,3 +80,403 @@ class ModelTests(TestCase):
         )
 
         self.assertEqual(str(business), business.name)
+
+
+class SoftDeleteCascadeTests(TestCase):
+    """Test set-based soft delete and restore cascades."""
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user(
+            'cascade-owner@example.com',
+            'test123',
+        )
+        self.business = models.Business.objects.create(
+            owner=self.owner,
+            name="Cascade Business",
+            phone="1234567890",
+            email="cascade@example.com",
+            business_description="Cascade business",
+            street_address="123 cascade street",
+            city="Calgary",
+            province_state="AB",
+            business_number="123456789",
+        )
+
+    def create_client_tree(self, count):
+        """Create clients each with a service, job, invoice and payout."""
+        for index in range(count):
+            offset = models.Client.all_objects.count()
+            user = get_user_model().objects.create_user(
+                f'cascade-client-{offset}@example.com',
+                'test123',
+            )
+            client = models.Client.objects.create(
+                business=self.business,
+                user=user,
+            )
+            service = models.Service.objects.create(
+                client=client,
+                business=self.business,
+                service_name="Flooring",
+                start_date=date.today(),
+                price=Decimal("100.00"),
+                street_address="123 cascade street",
+                city="Calgary",
+                province_state="AB",
+                postal_code="T2T2T2",
+            )
+            models.Job.objects.create(
+                service=service,
+                title="Visit",
+                scheduled_date=timezone.now() + timedelta(days=1),
+            )
+            invoice = models.Invoice.objects.create(
+                business=self.business,
+                client=client,
+                service=service,
+                due_date=date.today(),
+                subtotal=Decimal("100.00"),
+                total_amount=Decimal("100.00"),
+            )
+            models.Payout.objects.create(
+                business=self.business,
+                invoice=invoice,
+                amount=Decimal("100.00"),
+            )
+
+    def test_soft_delete_reports_counts_per_model(self):
+        """Test the cascade reaches every dependent and reports counts."""
+        self.create_client_tree(3)
+
+        counts = self.business.soft_delete(user=self.owner)
+
+        self.assertEqual(
+            counts,
+            {
+                "core.Business": 1,
+                "core.Client": 3,
+                "core.Service": 3,
+                "core.Job": 3,
+                "core.Invoice": 3,
+                "core.Payout": 3,
+            },
+        )
+        self.assertTrue(self.business.is_deleted)
+        self.assertFalse(models.Job.objects.exists())
+        self.assertEqual(
+            set(models.Payout.all_objects.values_list("deleted_by", flat=True)),
+            {self.owner.id},
+        )
+
+    def test_soft_delete_query_count_does_not_grow_with_dependents(self):
+        """Test the cascade runs a bounded number of queries."""
+        self.create_client_tree(1)
+        with CaptureQueriesContext(connection) as small:
+            self.business.soft_delete(user=self.owner)
+        self.business.restore()
+
+        self.create_client_tree(10)
+        with CaptureQueriesContext(connection) as large:
+            self.business.soft_delete(user=self.owner)
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_restore_cascades_through_deleted_dependents(self):
+        """Test restoring brings back the rows the delete cascaded to."""
+        self.create_client_tree(2)
+        self.business.soft_delete(user=self.owner)
+
+        counts = self.business.restore()
+
+        self.assertEqual(counts["core.Business"], 1)
+        self.assertEqual(counts["core.Job"], 2)
+        self.assertFalse(self.business.is_deleted)
+        self.assertFalse(
+            models.Payout.all_objects.filter(is_deleted=True).exists()
+        )
+        self.assertEqual(models.Invoice.objects.count(), 2)
+
+    def test_soft_delete_signals_only_rows_that_changed(self):
+        """Test rows deleted since planning are neither counted nor sent."""
+        self.create_client_tree(2)
+        gone, kept = models.Client.objects.order_by("id")
+        plan = models.plan_soft_delete_cascade(models.Business, [self.business.pk])
+        gone.soft_delete(user=self.owner, cascade=False)
+        sent = {}
+
+        def record(sender, pks, **kwargs):
+            sent[sender] = sorted(pks)
+
+        models.soft_delete_changed.connect(record)
+        self.addCleanup(models.soft_delete_changed.disconnect, record)
+        with patch("core.models.plan_soft_delete_cascade", return_value=plan):
+            counts = self.business.soft_delete(user=self.owner)
+
+        self.assertEqual(counts["core.Client"], 1)
+        self.assertEqual(sent[models.Client], [kept.pk])
+
+    def test_soft_delete_without_cascade_only_touches_instance(self):
+        """Test cascade=False leaves dependents alone."""
+        self.create_client_tree(1)
+
+        counts = self.business.soft_delete(user=self.owner, cascade=False)
+
+        self.assertEqual(counts, {"core.Business": 1})
+        self.assertEqual(models.Client.objects.count(), 1)
+
+
+class DocumentSequenceTests(TestCase):
+    """Test quote and invoice number allocation."""
+
+    def test_next_value_increments_per_type_and_year(self):
+        """Test each document type and year has its own counter."""
+        next_value = models.DocumentSequence.objects.next_value
+
+        self.assertEqual(next_value("QUOTE", 2030), 1)
+        self.assertEqual(next_value("QUOTE", 2030), 2)
+        self.assertEqual(next_value("INVOICE", 2030), 1)
+        self.assertEqual(next_value("QUOTE", 2031), 1)
+
+    def test_new_sequence_starts_after_existing_numbers(self):
+        """Test a missing sequence row is seeded from issued numbers."""
+        owner = get_user_model().objects.create_user(
+            'sequence-owner@example.com',
+            'test123',
+        )
+        business = models.Business.objects.create(
+            owner=owner,
+            name="Sequence Business",
+            phone="1234567890",
+            email="sequence@example.com",
+            business_description="Sequence business",
+            street_address="123 sequence street",
+            city="Calgary",
+            province_state="AB",
+            business_number="123456789",
+        )
+        client = models.Client.objects.create(business=business, user=owner)
+        year = timezone.now().year
+        models.Invoice.all_objects.bulk_create([
+            models.Invoice(
+                business=business,
+                client=client,
+                invoice_number=f"INV-{year}-{number}",
+                due_date=date.today(),
+                subtotal=Decimal("10.00"),
+                total_amount=Decimal("10.00"),
+            )
+            for number in ["009", "1000", "099"]
+        ])
+
+        invoice = models.Invoice.objects.create(
+            business=business,
+            client=client,
+            due_date=date.today(),
+            subtotal=Decimal("10.00"),
+            total_amount=Decimal("10.00"),
+        )
+
+        self.assertEqual(invoice.invoice_number, f"INV-{year}-1001")
+
+
+@skipUnless(
+    connection.vendor == "postgresql",
+    "Row-level locking needs PostgreSQL.",
+)
+class DocumentSequenceConcurrencyTests(TransactionTestCase):
+    """Test number allocation under concurrent transactions."""
+
+    def test_concurrent_allocations_are_unique_and_gap_free(self):
+        """Test threads racing for numbers never share or skip one."""
+        def allocate(_):
+            try:
+                return [
+                    models.DocumentSequence.objects.next_value("QUOTE", 2040)
+                    for _ in range(25)
+                ]
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = [
+                number
+                for numbers in executor.map(allocate, range(8))
+                for number in numbers
+            ]
+
+        self.assertEqual(sorted(results), list(range(1, 201)))
+
+
+class TenantIndexUsageTests(TestCase):
+    """Test the hot tenant-scoped filters are served by partial indexes."""
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user(
+            'index-owner@example.com',
+            'test123',
+        )
+        self.business = models.Business.objects.create(
+            owner=self.owner,
+            name="Index Business",
+            phone="1234567890",
+            email="index@example.com",
+            business_description="Index business",
+            street_address="123 index street",
+            city="Calgary",
+            province_state="AB",
+            business_number="123456789",
+        )
+        user = get_user_model().objects.create_user(
+            'index-client@example.com',
+            'test123',
+        )
+        self.client_record = models.Client.objects.create(
+            business=self.business,
+            user=user,
+        )
+        self.service = models.Service.objects.create(
+            client=self.client_record,
+            business=self.business,
+            service_name="Flooring",
+            start_date=date.today(),
+            price=Decimal("100.00"),
+            street_address="123 index street",
+            city="Calgary",
+            province_state="AB",
+            postal_code="T2T2T2",
+        )
+        for _ in range(20):
+            models.Job.objects.create(
+                service=self.service,
+                title="Visit",
+                scheduled_date=timezone.now(),
+            )
+            models.Invoice.objects.create(
+                business=self.business,
+                client=self.client_record,
+                service=self.service,
+                due_date=date.today(),
+                subtotal=Decimal("100.00"),
+                total_amount=Decimal("100.00"),
+            )
+
+    def explain(self, queryset):
+        """Return the query plan, steering Postgres away from seq scans."""
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_invoice_list_uses_business_index(self):
+        """Test the owner invoice list reads the partial business index."""
+        plan = self.explain(
+            models.Invoice.objects.filter(
+                business=self.business,
+                is_active=True,
+            ).order_by("-id")
+        )
+
+        self.assertIn("invoice_business_live_idx", plan)
+
+    def test_client_invoice_list_uses_client_index(self):
+        """Test the client invoice list reads the partial client index."""
+        plan = self.explain(
+            models.Invoice.objects.filter(
+                client=self.client_record,
+                is_active=True,
+            ).order_by("-id")
+        )
+
+        self.assertIn("invoice_client_live_idx", plan)
+
+    def test_job_status_filter_uses_service_status_index(self):
+        """Test filtering jobs by service and status reads the index."""
+        plan = self.explain(
+            models.Job.objects.filter(
+                service=self.service,
+                status="IN_PROGRESS",
+            )
+        )
+
+        self.assertIn("job_service_status_live_idx", plan)
+
+    @skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+    def test_invoice_number_prefix_uses_pattern_index(self):
+        """Test prefix lookups on invoice numbers use an index."""
+        plan = self.explain(
+            models.Invoice.all_objects.filter(
+                invoice_number__startswith="INV-2024-",
+            )
+        )
+
+        self.assertIn("_like", plan)
+
+
+class ServicesOfferedNamesTests(TestCase):
+    """Test the denormalized services_offered tag names."""
+
+    def setUp(self):
+        self.business = models.Business.objects.create(
+            owner=get_user_model().objects.create_user(
+                'tags-owner@example.com',
+                'test123',
+            ),
+            name="Tags Business",
+            phone="1234567890",
+            email="tags@example.com",
+            business_description="Tags business",
+            street_address="123 tags street",
+            city="Calgary",
+            province_state="AB",
+            business_number="123456789",
+        )
+
+    def stored_names(self):
+        return models.Business.objects.values_list(
+            "services_offered_names", flat=True
+        ).get(pk=self.business.pk)
+
+    def test_names_follow_tag_changes(self):
+        """Test add, set, remove and clear keep the column in sync."""
+        self.business.services_offered.add("Painting", "Flooring")
+        self.assertEqual(self.stored_names(), ["Flooring", "Painting"])
+
+        self.business.services_offered.set(["Roofing", "Painting"])
+        self.assertEqual(self.business.services_offered_names, ["Painting", "Roofing"])
+        self.assertEqual(self.stored_names(), ["Painting", "Roofing"])
+
+        self.business.services_offered.remove("Painting")
+        self.assertEqual(self.stored_names(), ["Roofing"])
+
+        self.business.services_offered.clear()
+        self.assertEqual(self.stored_names(), [])
+
+    def test_renamed_tag_updates_names(self):
+        """Test renaming a shared tag resyncs the businesses using it."""
+        self.business.services_offered.add("Floorng")
+        tag = self.business.services_offered.get(name="Floorng")
+
+        tag.name = "Flooring"
+        tag.save()
+
+        self.assertEqual(self.stored_names(), ["Flooring"])
+
+    def test_deleted_tag_removes_name(self):
+        """Test deleting a shared tag drops it from the businesses using it."""
+        self.business.services_offered.add("Flooring", "Painting")
+
+        self.business.services_offered.get(name="Painting").delete()
+
+        self.assertEqual(self.stored_names(), ["Flooring"])
+
+    def test_questionnaire_clean_checks_names_without_queries(self):
+        """Test offered-service validation reads the column."""
+        self.business.services_offered.add("Flooring")
+        questionnaire = models.ServiceQuestionnaire(
+            business=self.business,
+            service_name="Roofing",
+        )
+
+        with self.assertNumQueries(0):
+            with self.assertRaises(models.ValidationError):
+                questionnaire.clean()
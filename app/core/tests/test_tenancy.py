@@ -0,0 +1,121 @@
+"""Tests for the request-scoped tenant context."""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.models import Client, TeamMember
+from core.tenancy import get_tenant_context, resolve_tenant_context
+from finance.tests.test_finance_api import create_business
+
+
+class TenantContextTests(TestCase):
+    """Test resolving and caching a user's tenant ids."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "tenant-user@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.business = create_business(owner=self.user)
+        other_business = create_business(
+            owner=get_user_model().objects.create_user(
+                "tenant-other@example.com",
+                "test123",
+            ),
+            slug="tenant-other",
+        )
+        self.client_record = Client.objects.create(
+            business=other_business,
+            user=self.user,
+        )
+        self.member = TeamMember.objects.create(
+            business=other_business,
+            employee=self.user,
+        )
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def make_request(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        return request
+
+    def test_resolved_in_one_query(self):
+        """Test every kind of tenant id comes back from one UNION query."""
+        with self.assertNumQueries(1):
+            tenant = resolve_tenant_context(self.user)
+
+        self.assertEqual(tenant.business_ids, (self.business.id,))
+        self.assertEqual(tenant.client_ids, (self.client_record.id,))
+        self.assertEqual(
+            tenant.client_business_ids,
+            (self.client_record.business_id,),
+        )
+        self.assertEqual(tenant.team_member_ids, (self.member.id,))
+        self.assertEqual(tenant.business_id, self.business.id)
+
+    def test_resolved_once_per_request(self):
+        """Test repeated lookups within a request reuse the context."""
+        request = self.make_request()
+
+        with self.assertNumQueries(1):
+            first = get_tenant_context(request)
+            second = get_tenant_context(request)
+
+        self.assertIs(first, second)
+
+    @override_settings(TENANT_CACHE_TIMEOUT=60, TENANT_SHARED_CACHE="")
+    def test_not_cached_without_shared_cache(self):
+        """Test per-process caching is never used across requests."""
+        get_tenant_context(self.make_request())
+
+        with self.assertNumQueries(1):
+            get_tenant_context(self.make_request())
+
+    @override_settings(TENANT_CACHE_TIMEOUT=60, TENANT_SHARED_CACHE="default")
+    def test_reassigned_row_invalidates_previous_user(self):
+        """Test moving a business to a new owner drops the old owner's scope."""
+        new_owner = get_user_model().objects.create_user(
+            "tenant-new-owner@example.com",
+            "test123",
+        )
+        get_tenant_context(self.make_request())
+
+        self.business.owner = new_owner
+        self.business.save()
+
+        tenant = get_tenant_context(self.make_request())
+        self.assertEqual(tenant.business_ids, ())
+
+    @override_settings(TENANT_CACHE_TIMEOUT=60, TENANT_SHARED_CACHE="default")
+    def test_cached_across_requests_until_rows_change(self):
+        """Test saves and soft deletes drop the cached context."""
+        get_tenant_context(self.make_request())
+
+        with self.assertNumQueries(0):
+            cached = get_tenant_context(self.make_request())
+        self.assertEqual(cached.client_ids, (self.client_record.id,))
+
+        new_business = create_business(owner=self.user, slug="tenant-second")
+        tenant = get_tenant_context(self.make_request())
+        self.assertEqual(
+            tenant.business_ids,
+            (self.business.id, new_business.id),
+        )
+
+        self.client_record.soft_delete(user=self.user)
+        tenant = get_tenant_context(self.make_request())
+        self.assertEqual(tenant.client_ids, ())
+
+    def test_anonymous_user_has_empty_context(self):
+        """Test anonymous requests resolve without queries."""
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+
+        with self.assertNumQueries(0):
+            tenant = get_tenant_context(request)
+
+        self.assertIsNone(tenant.business_id)
@@ -0,0 +1,113 @@
+"""
+Tests for core utilities.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytz
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import serializers
+
+from core.models import Business, Client, Invoice
+from core.utils import BusinessTimezoneMixin
+
+
+class InvoiceTimesSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
+    """Minimal serializer exercising the mixin."""
+
+    class Meta:
+        model = Invoice
+        fields = ["id", "created_at", "paid_at"]
+
+
+class BusinessTimezoneMixinTests(TestCase):
+    """Test business-timezone rendering of datetimes."""
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user(
+            email="owner@example.com",
+            password="testpass123",
+            role="manager",
+        )
+        self.client_user = get_user_model().objects.create_user(
+            email="client@example.com",
+            password="testpass123",
+            role="client",
+        )
+
+    def create_business(self, name, tz_name):
+        return Business.objects.create(
+            owner=self.owner,
+            name=name,
+            slug=name.lower(),
+            phone="1234567890",
+            email=f"{name.lower()}@example.com",
+            business_description="Test business",
+            street_address="1 Main Street",
+            city="Toronto",
+            country="CA",
+            province_state="ON",
+            postal_code="M1M1M1",
+            business_number=f"{name.lower()}-123",
+            timezone=tz_name,
+        )
+
+    def create_invoices(self, business, count):
+        client = Client.objects.create(user=self.client_user, business=business)
+        paid_at = pytz.utc.localize(datetime(2024, 1, 15, 12, 30))
+        for _ in range(count):
+            Invoice.objects.create(
+                business=business,
+                client=client,
+                subtotal=Decimal("10.00"),
+                due_date=date(2024, 2, 1),
+                tax_amount=Decimal("0.00"),
+                total_amount=Decimal("10.00"),
+                status="PAID",
+                paid_at=paid_at,
+            )
+
+    def test_datetimes_rendered_in_business_timezone(self):
+        """Datetimes are converted to the business timezone."""
+        business = self.create_business("Toronto", "America/Toronto")
+        self.create_invoices(business, 1)
+        invoice = Invoice.objects.select_related("business").get()
+
+        data = InvoiceTimesSerializer(invoice).data
+
+        self.assertEqual(data["paid_at"], "2024-01-15 07:30:00")
+
+    def test_unset_datetime_stays_none(self):
+        """Empty datetimes are not localized."""
+        business = self.create_business("Toronto", "America/Toronto")
+        self.create_invoices(business, 1)
+        invoice = Invoice.objects.select_related("business").get()
+        invoice.paid_at = None
+
+        data = InvoiceTimesSerializer(invoice).data
+
+        self.assertIsNone(data["paid_at"])
+
+    def test_selected_business_needs_no_queries(self):
+        """No extra queries when the business is already loaded."""
+        business = self.create_business("Toronto", "America/Toronto")
+        self.create_invoices(business, 5)
+        invoices = list(Invoice.objects.select_related("business"))
+
+        with self.assertNumQueries(0):
+            InvoiceTimesSerializer(invoices, many=True).data
+
+    def test_timezone_looked_up_once_per_business(self):
+        """Unloaded businesses cost one query each, not one per row."""
+        toronto = self.create_business("Toronto", "America/Toronto")
+        tokyo = self.create_business("Tokyo", "Asia/Tokyo")
+        self.create_invoices(toronto, 5)
+        self.create_invoices(tokyo, 5)
+        invoices = list(Invoice.objects.order_by("id"))
+
+        with self.assertNumQueries(2):
+            data = InvoiceTimesSerializer(invoices, many=True).data
+
+        self.assertEqual(data[0]["paid_at"], "2024-01-15 07:30:00")
+        self.assertEqual(data[-1]["paid_at"], "2024-01-15 21:30:00")
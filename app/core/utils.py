@@ -1,7 +1,67 @@
+import calendar
+from functools import lru_cache
+
 import pytz
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
 from django.utils import timezone
 from rest_framework import serializers
 
+from core.models import Business
+
+
+@lru_cache(maxsize=None)
+def get_timezone(tz_name):
+    """Return a cached tzinfo for a timezone name."""
+    return pytz.timezone(tz_name)
+
+
+def add_months(day, months):
+    """Shift ``day`` by whole months, clamping to the end of short months."""
+    month_index = day.year * 12 + (day.month - 1) + months
+    year, month = month_index // 12, month_index % 12 + 1
+    last_day = calendar.monthrange(year, month)[1]
+    return day.replace(year=year, month=month, day=min(day.day, last_day))
+
+
+def get_cached_relation(instance, name):
+    """
+    Return a forward relation only if it is already loaded (e.g. through
+    select_related), otherwise None, so callers never trigger a query.
+    """
+    try:
+        field = instance._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if not field.is_relation or not field.many_to_one:
+        return None
+    if field.is_cached(instance):
+        return field.get_cached_value(instance)
+    return None
+
+
+BUSINESS_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def localize_datetime(value, tz):
+    """Render a datetime in ``tz`` using the business display format."""
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.utc)
+    return value.astimezone(tz).strftime(BUSINESS_DATETIME_FORMAT)
+
+
+class BusinessDateTimeField(serializers.DateTimeField):
+    """
+    DateTimeField that renders in the timezone its parent serializer
+    resolved for the current row, instead of formatting the value twice.
+    """
+
+    def to_representation(self, value):
+        tz = getattr(self.parent, "_business_tz", None)
+        if tz is None or not value:
+            return super().to_representation(value)
+        return localize_datetime(value, tz)
+
 
 class BusinessTimezoneMixin:
     """
@@ -9,48 +69,85 @@ class BusinessTimezoneMixin:
     when serializing output.
     """
 
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.DateTimeField: BusinessDateTimeField,
+    }
+
+    _business_tz = None
+    _datetime_field_names = {}
+
+    def _get_datetime_field_names(self):
+        """
+        Return declared DateTimeFields that still need converting after
+        rendering, computed once per serializer class.
+        """
+        serializer_class = type(self)
+        names = self._datetime_field_names.get(serializer_class)
+        if names is None:
+            names = tuple(
+                field_name
+                for field_name, field in self.fields.items()
+                if isinstance(field, serializers.DateTimeField)
+                and not isinstance(field, BusinessDateTimeField)
+            )
+            self._datetime_field_names[serializer_class] = names
+        return names
+
+    def _get_timezone_for_business_id(self, business_id):
+        """Look up a business timezone once per request via the context."""
+        timezones = self.context.setdefault("business_timezones", {})
+        if business_id not in timezones:
+            timezones[business_id] = (
+                Business.all_objects.filter(pk=business_id)
+                .values_list("timezone", flat=True)
+                .first()
+            )
+        return timezones[business_id]
+
+    def _get_business_timezone_from(self, instance):
+        """Resolve the timezone of ``instance.business`` without loading it."""
+        business = get_cached_relation(instance, "business")
+        if business is not None:
+            return business.timezone
+        business_id = getattr(instance, "business_id", None)
+        if business_id:
+            return self._get_timezone_for_business_id(business_id)
+        return None
+
     def _get_business_timezone(self, instance):
-        if (
-            hasattr(instance, "business") and
-            getattr(instance.business, "timezone", None)
-        ):
-            return instance.business.timezone
-
-        if (
-            hasattr(instance, "service") and
-            getattr(instance.service.business, "timezone", None)
-        ):
-            return instance.service.business.timezone
-
-        if (
-            hasattr(instance, "client") and
-            getattr(instance.client.business, "timezone", None)
-        ):
-            return instance.client.business.timezone
+        tz_name = self._get_business_timezone_from(instance)
+        if tz_name:
+            return tz_name
+
+        for parent_name in ("service", "client"):
+            if not getattr(instance, f"{parent_name}_id", None):
+                continue
+            parent = get_cached_relation(instance, parent_name)
+            if parent is None:
+                parent = getattr(instance, parent_name)
+            tz_name = self._get_business_timezone_from(parent)
+            if tz_name:
+                return tz_name
 
         return None
 
     def to_representation(self, instance):
         """Convert UTC datetimes → business timezone when returning response"""
-        data = super().to_representation(instance)
         tz_name = self._get_business_timezone(instance)
         if not tz_name:
-            return data
-
-        tz = pytz.timezone(tz_name)
-
-        for field_name, field in self.fields.items():
-            if isinstance(field, serializers.DateTimeField):
-                raw_value = getattr(instance, field_name, None)
-                if raw_value:
-                    if timezone.is_naive(raw_value):
-                        raw_value = timezone.make_aware(
-                            raw_value,
-                            timezone.utc
-                        )
+            return super().to_representation(instance)
 
-                    localized = raw_value.astimezone(tz)
+        tz = get_timezone(tz_name)
+        self._business_tz = tz
+        try:
+            data = super().to_representation(instance)
+        finally:
+            self._business_tz = None
 
-                    data[field_name] = localized.strftime("%Y-%m-%d %H:%M:%S")
+        for field_name in self._get_datetime_field_names():
+            raw_value = getattr(instance, field_name, None)
+            if raw_value:
+                data[field_name] = localize_datetime(raw_value, tz)
 
         return data
@@ -0,0 +1,377 @@
+"""
+Off-session automatic payment of due invoices.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import stripe
+from django.db import transaction
+from django.db.models import (
+    CharField,
+    Count,
+    Exists,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import BankingInformation, Invoice, Payout
+from finance.stripe_gateway import get_client, is_retryable, make_idempotency_key
+
+
+logger = logging.getLogger(__name__)
+
+AUTOPAY_WORKERS = 8
+AUTOPAY_BATCH_SIZE = 100
+# Stay well under Stripe's live-mode limit of 100 requests per second.
+AUTOPAY_REQUESTS_PER_SECOND = 25
+# A declined invoice is not charged again until this much time has passed.
+FAILED_RETRY_AFTER = timedelta(days=1)
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls evenly at ``rate`` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def idempotency_key(invoice):
+    """
+    Return the Stripe idempotency key for charging ``invoice``.
+
+    The key is stable across runs, so re-running after a crash returns the
+    original PaymentIntent instead of charging the client twice. It also
+    holds the card and the number of declined attempts, so a retry after
+    ``FAILED_RETRY_AFTER`` or with a new card is a new charge rather than
+    a replay of the decline.
+    """
+    return make_idempotency_key(
+        "autopay-invoice",
+        invoice["id"],
+        invoice["invoice_number"],
+        invoice["payment_method_id"],
+        invoice["failed_attempts"],
+    )
+
+
+def due_autopay_invoices(on_date):
+    """
+    Return, in one query, SENT invoices due by ``on_date`` whose client has
+    auto-pay enabled, with the Stripe ids needed to charge them.
+    """
+    client_methods = BankingInformation.objects.filter(
+        client=OuterRef("client"),
+        is_active=True,
+        auto_payments=True,
+    ).exclude(
+        Q(stripe_payment_method_id__isnull=True) | Q(stripe_payment_method_id="")
+    ).order_by("-created_at")
+    business_accounts = BankingInformation.objects.filter(
+        business=OuterRef("business"),
+        is_active=True,
+        payment_method_type="BANK_ACCOUNT",
+    ).exclude(
+        Q(stripe_connected_account_id__isnull=True)
+        | Q(stripe_connected_account_id="")
+    ).order_by("-created_at")
+    settled_or_recently_failed = Payout.objects.filter(
+        invoice=OuterRef("pk"),
+        is_active=True,
+    ).filter(
+        Q(status__in=("PAID", "PENDING"))
+        | Q(status="FAILED", created_at__gte=timezone.now() - FAILED_RETRY_AFTER)
+    )
+    failed_attempts = (
+        Payout.all_objects.filter(invoice=OuterRef("pk"), status="FAILED")
+        .order_by()
+        .values("invoice")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+
+    return (
+        Invoice.objects.filter(
+            status="SENT",
+            is_active=True,
+            due_date__lte=on_date,
+            total_amount__gt=0,
+        )
+        .filter(Exists(client_methods), Exists(business_accounts))
+        .exclude(Exists(settled_or_recently_failed))
+        .annotate(
+            customer_id=Subquery(
+                client_methods.values("stripe_customer_id")[:1],
+                output_field=CharField(),
+            ),
+            payment_method_id=Subquery(
+                client_methods.values("stripe_payment_method_id")[:1],
+                output_field=CharField(),
+            ),
+            destination_id=Subquery(
+                business_accounts.values("stripe_connected_account_id")[:1],
+                output_field=CharField(),
+            ),
+            failed_attempts=Coalesce(
+                Subquery(failed_attempts, output_field=IntegerField()),
+                0,
+            ),
+        )
+        .values(
+            "id",
+            "invoice_number",
+            "business_id",
+            "currency",
+            "total_amount",
+            "customer_id",
+            "payment_method_id",
+            "destination_id",
+            "failed_attempts",
+        )
+        .order_by("due_date", "id")
+    )
+
+
+def _charge_result(
+    invoice,
+    paid=False,
+    processing=False,
+    retry=False,
+    payment_intent_id=None,
+    error=None,
+):
+    return {
+        "invoice": invoice,
+        "paid": paid,
+        "processing": processing,
+        "retry": retry,
+        "payment_intent_id": payment_intent_id,
+        "error": error,
+    }
+
+
+def _declined_intent_id(error):
+    # Card errors carry the PaymentIntent Stripe created before declining.
+    intent = error.error.get("payment_intent") if error.error else None
+    return intent.get("id") if intent else None
+
+
+def charge_invoice(invoice, limiter, stripe_client):
+    """
+    Charge one invoice off-session. Runs in a worker thread and never
+    touches the DB.
+
+    The Stripe client already retries rate limits and transient errors; if
+    those retries run out the invoice is left for the next run, which
+    replays the charge under the same idempotency key.
+    """
+    limiter.wait()
+    try:
+        payment_intent = stripe_client.create_payment_intent(
+            amount=int(invoice["total_amount"] * 100),
+            currency=invoice["currency"].lower(),
+            customer=invoice["customer_id"],
+            payment_method=invoice["payment_method_id"],
+            off_session=True,
+            confirm=True,
+            transfer_data={"destination": invoice["destination_id"]},
+            description=f"Payment for Invoice #{invoice['invoice_number']}",
+            metadata={"invoice_id": str(invoice["id"]), "autopay": "true"},
+            idempotency_key=idempotency_key(invoice),
+        )
+    except stripe.StripeError as exc:
+        if is_retryable(exc):
+            return _charge_result(invoice, retry=True, error=str(exc))
+        return _charge_result(
+            invoice,
+            payment_intent_id=_declined_intent_id(exc),
+            error=str(exc),
+        )
+
+    if payment_intent.status == "processing":
+        # Settled later by the payment_intent webhooks.
+        return _charge_result(
+            invoice,
+            processing=True,
+            payment_intent_id=payment_intent.id,
+        )
+    if payment_intent.status != "succeeded":
+        return _charge_result(
+            invoice,
+            payment_intent_id=payment_intent.id,
+            error=f"Payment {payment_intent.status}.",
+        )
+    return _charge_result(
+        invoice,
+        paid=True,
+        payment_intent_id=payment_intent.id,
+    )
+
+
+def record_results(results):
+    """
+    Mark paid invoices and write their Payout rows in bulk.
+
+    Declined charges get a FAILED payout so they are not retried until
+    ``FAILED_RETRY_AFTER``. Charges Stripe is still processing get a
+    PENDING payout, which keeps them from being charged again until a
+    webhook settles it. Charges Stripe could not complete are left for
+    the next run. PaymentIntents a webhook already recorded a payout for
+    are not recorded again.
+    """
+    now = timezone.now()
+    by_invoice = {
+        result["invoice"]["id"]: result
+        for result in results
+        if not result["retry"]
+    }
+    if not by_invoice:
+        return 0
+
+    with transaction.atomic():
+        # Skip invoices paid some other way while the batch was charging.
+        still_open = set(
+            Invoice.objects.select_for_update()
+            .filter(pk__in=by_invoice, status="SENT")
+            .values_list("pk", flat=True)
+        )
+        # Read after taking the invoice locks, which webhook handlers hold
+        # while writing their payouts.
+        recorded_intents = set(
+            Payout.all_objects.filter(
+                stripe_payment_intent_id__in=[
+                    result["payment_intent_id"]
+                    for result in by_invoice.values()
+                    if result["payment_intent_id"]
+                ]
+            ).values_list("stripe_payment_intent_id", flat=True)
+        )
+        paid_ids = [
+            invoice_id
+            for invoice_id in still_open
+            if by_invoice[invoice_id]["paid"]
+        ]
+        for invoice_id, result in by_invoice.items():
+            if (
+                result["paid"]
+                and invoice_id not in still_open
+                and result["payment_intent_id"] not in recorded_intents
+            ):
+                logger.error(
+                    "Invoice %s was settled during auto-pay; PaymentIntent "
+                    "%s needs a manual refund.",
+                    result["invoice"]["invoice_number"],
+                    result["payment_intent_id"],
+                )
+        Invoice.objects.filter(pk__in=paid_ids).update(
+            status="PAID",
+            paid_at=now,
+            updated_at=now,
+        )
+        Payout.objects.bulk_create(
+            Payout(
+                business_id=result["invoice"]["business_id"],
+                invoice_id=invoice_id,
+                amount=result["invoice"]["total_amount"],
+                currency=result["invoice"]["currency"],
+                stripe_payment_intent_id=result["payment_intent_id"],
+                status=_payout_status(result),
+                failure_reason=result["error"],
+                processed_at=now,
+            )
+            for invoice_id, result in by_invoice.items()
+            if invoice_id in still_open
+            and result["payment_intent_id"] not in recorded_intents
+        )
+    return len(still_open)
+
+
+def _payout_status(result):
+    if result["paid"]:
+        return "PAID"
+    if result["processing"]:
+        return "PENDING"
+    return "FAILED"
+
+
+def run_autopay(
+    on_date=None,
+    workers=AUTOPAY_WORKERS,
+    batch_size=AUTOPAY_BATCH_SIZE,
+    rate=AUTOPAY_REQUESTS_PER_SECOND,
+    dry_run=False,
+):
+    """
+    Charge every due auto-pay invoice through a bounded thread pool.
+
+    Results are written after each batch, so a crash loses at most one
+    batch of bookkeeping; the next run re-sends those charges with the
+    same idempotency keys and records the original PaymentIntents.
+    """
+    on_date = on_date or timezone.localdate()
+    report = {
+        "billing_date": on_date,
+        "dry_run": dry_run,
+        "due": 0,
+        "paid": 0,
+        "failed": 0,
+        "processing": 0,
+        "deferred": 0,
+        "collected": {},
+    }
+
+    invoices = list(due_autopay_invoices(on_date))
+    report["due"] = len(invoices)
+    if dry_run or not invoices:
+        return report
+
+    limiter = RateLimiter(rate)
+    stripe_client = get_client()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(invoices), batch_size):
+            batch = invoices[start:start + batch_size]
+            results = list(
+                executor.map(
+                    lambda inv: charge_invoice(inv, limiter, stripe_client),
+                    batch,
+                )
+            )
+            record_results(results)
+
+            for result in results:
+                invoice = result["invoice"]
+                if result["retry"]:
+                    report["deferred"] += 1
+                elif result["paid"]:
+                    report["paid"] += 1
+                    report["collected"][invoice["currency"]] = (
+                        report["collected"].get(invoice["currency"], 0)
+                        + invoice["total_amount"]
+                    )
+                elif result["processing"]:
+                    report["processing"] += 1
+                else:
+                    report["failed"] += 1
+                    logger.warning(
+                        "Auto-pay failed for invoice %s: %s",
+                        invoice["invoice_number"],
+                        result["error"],
+                    )
+    return report
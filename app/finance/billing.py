@@ -0,0 +1,271 @@
+"""
+Recurring invoices for SUBSCRIPTION services.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from core.models import (
+    DocumentSequence,
+    Invoice,
+    Quote,
+    Service,
+    format_document_number,
+)
+from core.utils import add_months
+
+
+BILLING_CHUNK_SIZE = 500
+INVOICE_DUE_DAYS = 2
+CENTS = Decimal("0.01")
+
+CYCLE_MONTHS = {
+    "MONTHLY": 1,
+    "YEARLY": 12,
+}
+
+
+def billing_period(start_date, billing_cycle, on_date):
+    """
+    Return ``(period_start, period_end)`` of the cycle containing ``on_date``.
+
+    Periods are anchored on ``start_date``, so a service starting on the
+    31st bills on the last day of shorter months and returns to the 31st
+    afterwards. Returns None before the service starts.
+    """
+    if on_date < start_date:
+        return None
+
+    step = CYCLE_MONTHS[billing_cycle]
+    elapsed_months = (
+        (on_date.year - start_date.year) * 12
+        + on_date.month
+        - start_date.month
+    )
+    index = elapsed_months // step
+    period_start = add_months(start_date, index * step)
+    if period_start > on_date:
+        index -= 1
+        period_start = add_months(start_date, index * step)
+
+    period_end = add_months(start_date, (index + 1) * step) - timedelta(days=1)
+    return period_start, period_end
+
+
+def initial_billing_period_start(service, on_date):
+    """Return the period an activation invoice covers for a subscription."""
+    if (
+        service.service_type != "SUBSCRIPTION"
+        or service.billing_cycle not in CYCLE_MONTHS
+    ):
+        return None
+    period = billing_period(service.start_date, service.billing_cycle, on_date)
+    return period[0] if period else service.start_date
+
+
+def due_subscriptions(on_date):
+    """
+    Return, in one query, the subscriptions that may need billing on
+    ``on_date`` together with the last period already invoiced.
+    """
+    signed_quotes = Quote.objects.filter(
+        service=OuterRef("pk"),
+        is_active=True,
+        status="SIGNED",
+    )
+    last_billed = (
+        Invoice.all_objects.filter(
+            service=OuterRef("pk"),
+            billing_period_start__isnull=False,
+        )
+        .order_by("-billing_period_start")
+        .values("billing_period_start")[:1]
+    )
+    return (
+        Service.objects.filter(
+            service_type="SUBSCRIPTION",
+            status="ACTIVE",
+            is_active=True,
+            auto_generate_invoices=True,
+            billing_cycle__in=CYCLE_MONTHS,
+            start_date__lte=on_date,
+        )
+        .filter(Q(end_date__isnull=True) | Q(end_date__gte=on_date))
+        .filter(Exists(signed_quotes))
+        .annotate(last_billed_period=Subquery(last_billed))
+        .values(
+            "pk",
+            "business_id",
+            "client_id",
+            "price",
+            "currency",
+            "start_date",
+            "billing_cycle",
+            "business__tax_rate",
+            "last_billed_period",
+        )
+        .order_by("pk")
+    )
+
+
+def run_billing(on_date=None, chunk_size=BILLING_CHUNK_SIZE, dry_run=False):
+    """
+    Invoice every subscription whose current period has not been billed.
+
+    Invoices are inserted with ``bulk_create`` in chunked transactions and
+    numbered from one block allocation per chunk. Each service is billed at
+    most once per period: already invoiced periods are filtered out up
+    front, re-checked under a row lock inside each chunk, and enforced by
+    a unique constraint. Missed past periods are not back-billed.
+
+    Returns a summary report of what was billed.
+    """
+    on_date = on_date or timezone.localdate()
+    report = {
+        "billing_date": on_date,
+        "dry_run": dry_run,
+        "scanned": 0,
+        "already_billed": 0,
+        "locked": 0,
+        "invoiced": 0,
+        "totals": {},
+        "first_invoice": None,
+        "last_invoice": None,
+    }
+
+    chunk = []
+    for row in due_subscriptions(on_date).iterator(chunk_size=chunk_size):
+        period_start, period_end = billing_period(
+            row["start_date"],
+            row["billing_cycle"],
+            on_date,
+        )
+        report["scanned"] += 1
+        last_billed = row["last_billed_period"]
+        if last_billed is not None and last_billed >= period_start:
+            report["already_billed"] += 1
+            continue
+
+        chunk.append((row, period_start, period_end))
+        if len(chunk) >= chunk_size:
+            _bill_chunk(chunk, on_date, report, dry_run)
+            chunk = []
+
+    if chunk:
+        _bill_chunk(chunk, on_date, report, dry_run)
+
+    return report
+
+
+def _insert_invoices(invoices, report):
+    """
+    Insert ``invoices``, skipping periods an activation invoice claimed
+    after the chunk was checked. Returns the invoices inserted.
+    """
+    try:
+        with transaction.atomic():
+            Invoice.objects.bulk_create(invoices)
+        return invoices
+    except IntegrityError:
+        pass
+
+    billed = set(
+        Invoice.all_objects.filter(
+            service_id__in=[invoice.service_id for invoice in invoices],
+            billing_period_start__in={
+                invoice.billing_period_start for invoice in invoices
+            },
+        ).values_list("service_id", "billing_period_start")
+    )
+    remaining = [
+        invoice
+        for invoice in invoices
+        if (invoice.service_id, invoice.billing_period_start) not in billed
+    ]
+    report["already_billed"] += len(invoices) - len(remaining)
+    Invoice.objects.bulk_create(remaining)
+    return remaining
+
+
+def _bill_chunk(chunk, on_date, report, dry_run):
+    """Create the invoices for one chunk of due subscriptions atomically."""
+    with transaction.atomic():
+        service_ids = [row["pk"] for row, _, _ in chunk]
+        # Lock the chunk's services so a concurrent run skips them.
+        locked_ids = set(
+            Service.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=service_ids)
+            .values_list("pk", flat=True)
+        )
+        billed = set(
+            Invoice.all_objects.filter(
+                service_id__in=locked_ids,
+                billing_period_start__in={start for _, start, _ in chunk},
+            ).values_list("service_id", "billing_period_start")
+        )
+        pending = []
+        for row, start, end in chunk:
+            if row["pk"] not in locked_ids:
+                report["locked"] += 1
+            elif (row["pk"], start) in billed:
+                report["already_billed"] += 1
+            else:
+                pending.append((row, start, end))
+        if not pending:
+            return
+
+        year = timezone.now().year
+        if dry_run:
+            numbers = [None] * len(pending)
+        else:
+            numbers = DocumentSequence.objects.next_values(
+                "INVOICE",
+                year,
+                len(pending),
+            )
+
+        invoices = []
+        for (row, start, end), number in zip(pending, numbers):
+            tax_rate = row["business__tax_rate"]
+            tax_amount = (row["price"] * tax_rate / 100).quantize(CENTS)
+            invoices.append(
+                Invoice(
+                    business_id=row["business_id"],
+                    client_id=row["client_id"],
+                    service_id=row["pk"],
+                    invoice_number=(
+                        format_document_number("INVOICE", year, number)
+                        if number is not None
+                        else ""
+                    ),
+                    due_date=on_date + timedelta(days=INVOICE_DUE_DAYS),
+                    currency=row["currency"],
+                    subtotal=row["price"],
+                    tax_rate=tax_rate,
+                    tax_amount=tax_amount,
+                    total_amount=row["price"] + tax_amount,
+                    billing_period_start=start,
+                    notes=f"Subscription invoice for {start} to {end}.",
+                )
+            )
+
+        if not dry_run:
+            invoices = _insert_invoices(invoices, report)
+            if not invoices:
+                return
+
+        report["invoiced"] += len(invoices)
+        totals = report["totals"]
+        for invoice in invoices:
+            totals[invoice.currency] = (
+                totals.get(invoice.currency, Decimal("0")) + invoice.total_amount
+            )
+        if not dry_run:
+            report["first_invoice"] = (
+                report["first_invoice"] or invoices[0].invoice_number
+            )
+            report["last_invoice"] = invoices[-1].invoice_number
@@ -0,0 +1,184 @@
+"""
+Server-side aggregates for the manager dashboard.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+import pytz
+from django.db.models import (
+    Count,
+    DateField,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
+
+from core.models import Business, Client, Invoice, Job, Quote
+
+
+GRANULARITY_CHOICES = ("week", "month", "year")
+
+DEFAULT_PERIODS = {
+    "week": 8,
+    "month": 12,
+    "year": 6,
+}
+
+MAX_PERIODS = 120
+
+ACTIVE_JOB_STATUSES = ["IN_PROGRESS"]
+PENDING_QUOTE_STATUSES = ["DRAFT", "SENT"]
+CLOSED_INVOICE_STATUSES = ["PAID", "CANCELLED"]
+
+
+def _period_start(day, granularity):
+    """Return the first day of the period that contains ``day``."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def _shift_period(start, granularity, count):
+    """Move a period start ``count`` periods forward (or back if negative)."""
+    if granularity == "week":
+        return start + timedelta(weeks=count)
+    if granularity == "month":
+        month_index = start.year * 12 + (start.month - 1) + count
+        return date(month_index // 12, month_index % 12 + 1, 1)
+    return date(start.year + count, 1, 1)
+
+
+def _count_subquery(queryset, business_path):
+    """Return a correlated COUNT(*) for rows belonging to the outer business."""
+    counted = (
+        queryset.filter(**{business_path: OuterRef("pk")})
+        .order_by()
+        .values(business_path)
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def get_dashboard_counts(business):
+    """Return client, job, quote and invoice KPIs in a single query."""
+    counts = (
+        Business.objects.filter(pk=business.pk)
+        .annotate(
+            client_count=_count_subquery(
+                Client.objects.filter(is_active=True),
+                "business",
+            ),
+            active_job_count=_count_subquery(
+                Job.objects.filter(status__in=ACTIVE_JOB_STATUSES),
+                "service__business",
+            ),
+            pending_quote_count=_count_subquery(
+                Quote.objects.filter(
+                    is_active=True,
+                    status__in=PENDING_QUOTE_STATUSES,
+                ),
+                "service__business",
+            ),
+            unpaid_invoice_count=_count_subquery(
+                Invoice.objects.filter(is_active=True).exclude(
+                    status__in=CLOSED_INVOICE_STATUSES
+                ),
+                "business",
+            ),
+        )
+        .values(
+            "client_count",
+            "active_job_count",
+            "pending_quote_count",
+            "unpaid_invoice_count",
+        )
+        .get()
+    )
+    return {
+        "clients": counts["client_count"],
+        "active_jobs": counts["active_job_count"],
+        "pending_quotes": counts["pending_quote_count"],
+        "unpaid_invoices": counts["unpaid_invoice_count"],
+    }
+
+
+def _revenue_buckets(queryset, date_field, granularity, tz):
+    """GROUP BY the truncated date and currency, summing invoice totals."""
+    return (
+        queryset.annotate(
+            period=Trunc(
+                date_field,
+                granularity,
+                output_field=DateField(),
+                tzinfo=tz,
+            )
+        )
+        .order_by()
+        .values("period", "currency")
+        .annotate(total=Sum("total_amount"), invoices=Count("pk"))
+    )
+
+
+def get_dashboard_data(business, granularity="month", periods=None):
+    """
+    Build the dashboard payload for a business.
+
+    Revenue is bucketed in the business timezone: ``billed`` groups invoices
+    by ``created_at`` and ``collected`` groups paid invoices by ``paid_at``.
+    Every requested period is present in the series, even when it is empty.
+    """
+    periods = periods or DEFAULT_PERIODS[granularity]
+    tz = pytz.timezone(business.timezone)
+
+    today = timezone.now().astimezone(tz).date()
+    last_start = _period_start(today, granularity)
+    first_start = _shift_period(last_start, granularity, -(periods - 1))
+    window_start = tz.localize(datetime.combine(first_start, time.min))
+
+    invoices = Invoice.objects.filter(business=business, is_active=True)
+    billed_rows = _revenue_buckets(
+        invoices.filter(created_at__gte=window_start),
+        "created_at",
+        granularity,
+        tz,
+    )
+    collected_rows = _revenue_buckets(
+        invoices.filter(status="PAID", paid_at__gte=window_start),
+        "paid_at",
+        granularity,
+        tz,
+    )
+
+    series = {}
+    for index in range(periods):
+        start = _shift_period(first_start, granularity, index)
+        series[start] = {
+            "period": start.isoformat(),
+            "billed": {},
+            "collected": {},
+            "paid_invoices": 0,
+        }
+
+    for row in billed_rows:
+        bucket = series.get(row["period"])
+        if bucket is not None:
+            bucket["billed"][row["currency"]] = f"{row['total']:.2f}"
+
+    for row in collected_rows:
+        bucket = series.get(row["period"])
+        if bucket is not None:
+            bucket["collected"][row["currency"]] = f"{row['total']:.2f}"
+            bucket["paid_invoices"] += row["invoices"]
+
+    return {
+        "granularity": granularity,
+        "timezone": business.timezone,
+        "counts": get_dashboard_counts(business),
+        "revenue": list(series.values()),
+    }
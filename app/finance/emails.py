@@ -1,9 +1,10 @@
-from django.core.mail import send_mail
 from django.conf import settings
 
+from core.models import EmailOutbox
+
 
 def send_invoice_email(invoice):
-    """Send invoice notification email to client with portal link."""
+    """Queue invoice notification email to client with portal link."""
 
     portal_link = f"{settings.FRONTEND_URL}/user/business/invoice/{invoice.id}"
 
@@ -21,10 +22,4 @@ def send_invoice_email(invoice):
         f"{invoice.business.name}"
     )
 
-    send_mail(
-        subject=subject,
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[invoice.client.user.email],
-        fail_silently=False,
-    )
+    EmailOutbox.objects.enqueue(subject, message, [invoice.client.user.email])
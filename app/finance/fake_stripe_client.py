@@ -0,0 +1,174 @@
+"""
+In-memory stand-in for ``finance.stripe_gateway.StripeClient``.
+
+Used by the test suite (see ``settings.STRIPE_CLIENT``) and handy for local
+development without Stripe keys. It records every call, returns Stripe-shaped
+objects and replays the first result for a reused idempotency key, as Stripe
+does.
+"""
+
+import itertools
+import uuid
+
+import stripe
+
+
+class FakeStripeClient:
+    """Record Stripe calls and answer them without network access."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget recorded calls, stored results and queued errors."""
+        self.calls = []
+        self.errors = {}
+        self.results = {}
+        self._ids = itertools.count(1)
+
+    def fail_next(self, operation, error):
+        """Raise ``error`` from the next call to ``operation``."""
+        self.errors.setdefault(operation, []).append(error)
+
+    def calls_for(self, operation):
+        """Return the recorded calls to ``operation``, oldest first."""
+        return [call for call in self.calls if call["operation"] == operation]
+
+    def _new_id(self, prefix):
+        return f"{prefix}_fake_{next(self._ids)}"
+
+    def _respond(self, operation, values, idempotency_key=None, **params):
+        if idempotency_key is None and not operation.endswith(".retrieve"):
+            idempotency_key = f"{operation}-{uuid.uuid4()}"
+        self.calls.append({
+            "operation": operation,
+            "idempotency_key": idempotency_key,
+            "params": params,
+        })
+        if self.errors.get(operation):
+            raise self.errors[operation].pop(0)
+        if idempotency_key in self.results:
+            return self.results[idempotency_key]
+
+        result = stripe.StripeObject.construct_from(values, None)
+        if idempotency_key is not None:
+            self.results[idempotency_key] = result
+        return result
+
+    def create_customer(self, idempotency_key=None, **params):
+        return self._respond(
+            "customer.create",
+            {"id": self._new_id("cus"), **params},
+            idempotency_key,
+            **params,
+        )
+
+    def create_setup_intent(self, **params):
+        setup_intent_id = self._new_id("seti")
+        return self._respond(
+            "setup_intent.create",
+            {
+                "id": setup_intent_id,
+                "client_secret": f"{setup_intent_id}_secret",
+                **params,
+            },
+            **params,
+        )
+
+    def attach_payment_method(self, payment_method_id, customer):
+        return self._respond(
+            "payment_method.attach",
+            {"id": payment_method_id, "customer": customer},
+            f"attach-{payment_method_id}-{customer}",
+            payment_method=payment_method_id,
+            customer=customer,
+        )
+
+    def set_default_payment_method(self, customer, payment_method_id):
+        return self._respond(
+            "customer.update",
+            {
+                "id": customer,
+                "invoice_settings": {"default_payment_method": payment_method_id},
+            },
+            customer=customer,
+            payment_method=payment_method_id,
+        )
+
+    def retrieve_payment_method(self, payment_method_id):
+        return self._respond(
+            "payment_method.retrieve",
+            {
+                "id": payment_method_id,
+                "card": {
+                    "brand": "visa",
+                    "last4": "4242",
+                    "exp_month": 12,
+                    "exp_year": 2030,
+                },
+            },
+            payment_method=payment_method_id,
+        )
+
+    def create_account(self, idempotency_key=None, **params):
+        return self._respond(
+            "account.create",
+            {"id": self._new_id("acct"), **params},
+            idempotency_key,
+            **params,
+        )
+
+    def retrieve_account(self, account_id, expand=None):
+        return self._respond(
+            "account.retrieve",
+            {
+                "id": account_id,
+                "external_accounts": {
+                    "object": "list",
+                    "data": [
+                        {
+                            "object": "bank_account",
+                            "bank_name": "STRIPE TEST BANK",
+                            "last4": "6789",
+                            "currency": "cad",
+                            "country": "CA",
+                            "account_holder_name": None,
+                            "account_holder_type": "company",
+                        }
+                    ],
+                },
+            },
+            account=account_id,
+            expand=expand,
+        )
+
+    def create_account_link(self, **params):
+        return self._respond(
+            "account_link.create",
+            {
+                "object": "account_link",
+                "url": f"https://connect.stripe.test/setup/{uuid.uuid4().hex}",
+            },
+            **params,
+        )
+
+    def create_payment_intent(self, idempotency_key=None, **params):
+        return self._respond(
+            "payment_intent.create",
+            {
+                "id": self._new_id("pi"),
+                "status": "succeeded",
+                "amount_received": params.get("amount"),
+                **params,
+            },
+            idempotency_key,
+            **params,
+        )
+
+    def create_refund(self, idempotency_key=None, **params):
+        return self._respond(
+            "refund.create",
+            {"id": self._new_id("re"), "status": "succeeded", **params},
+            idempotency_key,
+            **params,
+        )
@@ -0,0 +1,108 @@
+"""
+Signed fake Stripe webhook events for local development and tests.
+
+Example, against a dev server with STRIPE_WEBHOOK_SECRET set::
+
+    event = payment_intent_event(invoice)
+    payload, signature = sign_event(event, settings.STRIPE_WEBHOOK_SECRET)
+    requests.post(url, data=payload, headers={"Stripe-Signature": signature})
+"""
+
+import hashlib
+import hmac
+import json
+import time
+import uuid
+
+
+def make_event(event_type, data_object, created=None, event_id=None):
+    """Build a Stripe event envelope around ``data_object``."""
+    return {
+        "id": event_id or f"evt_{uuid.uuid4().hex}",
+        "object": "event",
+        "type": event_type,
+        "created": int(created if created is not None else time.time()),
+        "livemode": False,
+        "data": {"object": data_object},
+    }
+
+
+def sign_event(event, secret, timestamp=None):
+    """
+    Serialize ``event`` and return ``(payload, Stripe-Signature header)``
+    signed the same way Stripe signs webhook deliveries.
+    """
+    payload = json.dumps(event)
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    signature = hmac.new(
+        secret.encode("utf-8"),
+        f"{timestamp}.{payload}".encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
+    return payload, f"t={timestamp},v1={signature}"
+
+
+def payment_intent_event(
+    invoice,
+    succeeded=True,
+    payment_intent_id=None,
+    error_message="Your card was declined.",
+    **kwargs,
+):
+    """Return a payment_intent.succeeded or .payment_failed event."""
+    amount = int(invoice.total_amount * 100)
+    intent = {
+        "id": payment_intent_id or f"pi_{uuid.uuid4().hex[:24]}",
+        "object": "payment_intent",
+        "amount": amount,
+        "amount_received": amount if succeeded else 0,
+        "currency": invoice.currency.lower(),
+        "status": "succeeded" if succeeded else "requires_payment_method",
+        "metadata": {"invoice_id": str(invoice.id)},
+        "last_payment_error": (
+            None if succeeded else {"message": error_message}
+        ),
+    }
+    event_type = (
+        "payment_intent.succeeded"
+        if succeeded
+        else "payment_intent.payment_failed"
+    )
+    return make_event(event_type, intent, **kwargs)
+
+
+def charge_refunded_event(payment_intent_id, amount_refunded, refund_id=None,
+                          **kwargs):
+    """Return a charge.refunded event for ``amount_refunded`` cents."""
+    charge = {
+        "id": f"ch_{uuid.uuid4().hex[:24]}",
+        "object": "charge",
+        "payment_intent": payment_intent_id,
+        "amount_refunded": amount_refunded,
+        "refunded": True,
+        "refunds": {
+            "object": "list",
+            "data": [{"id": refund_id or f"re_{uuid.uuid4().hex[:24]}"}],
+        },
+    }
+    return make_event("charge.refunded", charge, **kwargs)
+
+
+def account_updated_event(account_id, bank_account=None, **kwargs):
+    """Return an account.updated event with one external bank account."""
+    bank_account = {
+        "object": "bank_account",
+        "bank_name": "STRIPE TEST BANK",
+        "last4": "6789",
+        "currency": "cad",
+        "country": "CA",
+        "account_holder_name": None,
+        "account_holder_type": "company",
+        **(bank_account or {}),
+    }
+    account = {
+        "id": account_id,
+        "object": "account",
+        "external_accounts": {"object": "list", "data": [bank_account]},
+    }
+    return make_event("account.updated", account, **kwargs)
@@ -0,0 +1,61 @@
+"""
+Django command to apply stored Stripe webhook events.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from finance.webhooks import DEFAULT_BATCH_SIZE, process_stripe_events
+
+
+class Command(BaseCommand):
+    """Process pending Stripe events in the order Stripe created them."""
+
+    help = "Apply pending Stripe webhook events to invoices and payouts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Events to process per batch.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when no events are pending.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no events are pending instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        batch_size = options["batch_size"]
+        totals = {"processed": 0, "ignored": 0, "retried": 0, "failed": 0}
+
+        try:
+            while True:
+                summary = process_stripe_events(batch_size=batch_size)
+                for key, value in summary.items():
+                    totals[key] += value
+
+                # Keep draining while events complete; events that are only
+                # being retried wait for the next poll.
+                if summary["processed"] or summary["ignored"] or summary["failed"]:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Stripe events processed: {processed}, ignored: {ignored}, "
+                "retried: {retried}, failed: {failed}".format(**totals)
+            )
+        )
@@ -0,0 +1,77 @@
+"""
+Django command to charge due invoices for clients with auto-pay enabled.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.autopay import (
+    AUTOPAY_BATCH_SIZE,
+    AUTOPAY_REQUESTS_PER_SECOND,
+    AUTOPAY_WORKERS,
+    run_autopay,
+)
+
+
+class Command(BaseCommand):
+    """Charge SENT, due invoices off-session for auto-pay clients."""
+
+    help = "Charge due invoices for clients with auto-pay enabled."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Charge invoices due on or before YYYY-MM-DD (default today).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=AUTOPAY_WORKERS,
+            help="Concurrent Stripe requests.",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=AUTOPAY_REQUESTS_PER_SECOND,
+            help="Maximum Stripe requests per second.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=AUTOPAY_BATCH_SIZE,
+            help="Charges recorded per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many invoices are due without charging them.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        on_date = None
+        if options["date"]:
+            try:
+                on_date = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("--date must be in YYYY-MM-DD format.")
+
+        report = run_autopay(
+            on_date=on_date,
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            rate=options["rate"],
+            dry_run=options["dry_run"],
+        )
+
+        prefix = "[dry run] " if report["dry_run"] else ""
+        self.stdout.write(
+            f"{prefix}Auto-pay run for {report['billing_date']}: "
+            f"{report['due']} due, {report['paid']} paid, "
+            f"{report['failed']} failed, "
+            f"{report['processing']} processing, "
+            f"{report['deferred']} left for the next run."
+        )
+        for currency, total in sorted(report["collected"].items()):
+            self.stdout.write(f"  {currency}: {total:.2f}")
+        self.stdout.write(self.style.SUCCESS("Auto-pay run complete."))
@@ -0,0 +1,63 @@
+"""
+Django command to invoice recurring subscription services.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.billing import BILLING_CHUNK_SIZE, run_billing
+
+
+class Command(BaseCommand):
+    """Bill every subscription whose current period is not yet invoiced."""
+
+    help = "Generate invoices for due SUBSCRIPTION services."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Billing date as YYYY-MM-DD (defaults to today).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=BILLING_CHUNK_SIZE,
+            help="Invoices created per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be billed without creating invoices.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        on_date = None
+        if options["date"]:
+            try:
+                on_date = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("--date must be in YYYY-MM-DD format.")
+
+        report = run_billing(
+            on_date=on_date,
+            chunk_size=options["chunk_size"],
+            dry_run=options["dry_run"],
+        )
+
+        prefix = "[dry run] " if report["dry_run"] else ""
+        self.stdout.write(
+            f"{prefix}Billing run for {report['billing_date']}: "
+            f"{report['scanned']} subscriptions scanned, "
+            f"{report['invoiced']} invoiced, "
+            f"{report['already_billed']} already billed, "
+            f"{report['locked']} skipped (locked by another run)."
+        )
+        for currency, total in sorted(report["totals"].items()):
+            self.stdout.write(f"  {currency}: {total:.2f}")
+        if report["first_invoice"]:
+            self.stdout.write(
+                f"  Invoices {report['first_invoice']} to "
+                f"{report['last_invoice']}"
+            )
+        self.stdout.write(self.style.SUCCESS("Billing run complete."))
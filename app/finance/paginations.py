@@ -1,47 +1,22 @@
-from rest_framework import pagination
-from rest_framework.response import Response
+from core.paginations import ColumnsPagination
 
 
-class InvoicePagination(pagination.PageNumberPagination):
-    page_size = 50
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+class InvoicePagination(ColumnsPagination):
+    columns = [
+        {'name': 'invoice_number', 'title': 'Invoice'},
+        {'name': 'business_name', 'title': 'Business'},
+        {'name': 'client_name', 'title': 'Client'},
+        {'name': 'service_name', 'title': 'Service'},
+        {'name': 'invoice_total', 'title': 'Total'},
+        {'name': 'due_date', 'title': 'Due Date'},
+    ]
 
-    def get_paginated_response(self, data):
-        return Response({
-            'count': self.page.paginator.count,
-            'total_pages': self.page.paginator.num_pages,
-            'current_page': self.page.number,
-            'page_size': self.get_page_size(self.request),
-            'columns': [
-                {'name': 'invoice_number', 'title': 'Invoice'},
-                {'name': 'business_name', 'title': 'Business'},
-                {'name': 'client_name', 'title': 'Client'},
-                {'name': 'service_name', 'title': 'Service'},
-                {'name': 'invoice_total', 'title': 'Total'},
-                {'name': 'due_date', 'title': 'Due Date'},
-            ],
-            'results': data,
-        })
 
-
-class PayoutPagination(pagination.PageNumberPagination):
-    page_size = 50
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-    def get_paginated_response(self, data):
-        return Response({
-            'count': self.page.paginator.count,
-            'total_pages': self.page.paginator.num_pages,
-            'current_page': self.page.number,
-            'page_size': self.get_page_size(self.request),
-            'columns': [
-                {'name': 'invoice_number', 'title': 'Invoice'},
-                {'name': 'client_name', 'title': 'Client'},
-                {'name': 'service_name', 'title': 'Service'},
-                {'name': 'payout_total', 'title': 'Payout Total'},
-                {'name': 'processed_at', 'title': 'Processed At'}
-            ],
-            'results': data,
-        })
+class PayoutPagination(ColumnsPagination):
+    columns = [
+        {'name': 'invoice_number', 'title': 'Invoice'},
+        {'name': 'client_name', 'title': 'Client'},
+        {'name': 'service_name', 'title': 'Service'},
+        {'name': 'payout_total', 'title': 'Payout Total'},
+        {'name': 'processed_at', 'title': 'Processed At'}
+    ]
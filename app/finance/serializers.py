@@ -80,16 +80,22 @@ class InvoiceSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
         return f"{obj.total_amount} {obj.currency}"
 
     def get_has_payment_method(self, obj):
-        return bool(obj.client.banking_information.filter(is_active=True).first())
+        if hasattr(obj, "has_payment_method"):
+            return obj.has_payment_method
+        return obj.client.banking_information.filter(is_active=True).exists()
 
     def get_has_paid_payout(self, obj):
         """
         Returns True only if there is a payout with status PAID
         for this invoice.
         """
+        if hasattr(obj, "has_paid_payout"):
+            return obj.has_paid_payout
         return obj.payouts.filter(status="PAID").exists()
 
     def get_payout_id(self, obj):
+        if hasattr(obj, "paid_payout_id"):
+            return obj.paid_payout_id
         payout = obj.payouts.filter(status="PAID").first()
         return payout.id if payout else None
 
@@ -0,0 +1,215 @@
+"""
+Shared Stripe API client.
+
+Every Stripe call goes through one ``StripeClient`` per process, which keeps a
+pooled keep-alive HTTP session, bounds each operation with its own timeout,
+retries transient failures with jittered backoff and always sends an
+idempotency key so a retried write is never applied twice. The client class
+is chosen by ``settings.STRIPE_CLIENT``; tests use
+``finance.fake_stripe_client.FakeStripeClient``.
+"""
+
+import json
+import logging
+import random
+import time
+import uuid
+from functools import lru_cache
+
+import stripe
+from requests import Session
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 3.0
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_CAP = 8.0
+# Autopay charges from a thread pool, so keep at least that many connections.
+POOL_SIZE = 16
+
+# operation: (v1 service, method, read timeout in seconds)
+OPERATIONS = {
+    "customer.create": ("customers", "create", 10.0),
+    "customer.update": ("customers", "update", 10.0),
+    "setup_intent.create": ("setup_intents", "create", 10.0),
+    "payment_method.attach": ("payment_methods", "attach", 15.0),
+    "payment_method.retrieve": ("payment_methods", "retrieve", 10.0),
+    "account.create": ("accounts", "create", 20.0),
+    "account.retrieve": ("accounts", "retrieve", 10.0),
+    "account_link.create": ("account_links", "create", 10.0),
+    "payment_intent.create": ("payment_intents", "create", 30.0),
+    "refund.create": ("refunds", "create", 30.0),
+}
+
+
+def get_client():
+    """Return the process-wide client configured by ``STRIPE_CLIENT``."""
+    return _load_client(settings.STRIPE_CLIENT)
+
+
+@lru_cache(maxsize=None)
+def _load_client(path):
+    return import_string(path)()
+
+
+def make_idempotency_key(*parts):
+    """Build an idempotency key from our own object ids, e.g. ``refund-7``."""
+    return "-".join(str(part) for part in parts)
+
+
+def is_retryable(error):
+    """Return whether a failed Stripe request is safe and useful to retry."""
+    should_retry = (error.headers or {}).get("stripe-should-retry")
+    if should_retry is not None:
+        return should_retry == "true"
+    if isinstance(error, (stripe.APIConnectionError, stripe.RateLimitError)):
+        return True
+    # 409 is a lock timeout or an idempotent request still in flight.
+    return error.http_status is not None and (
+        error.http_status == 409 or error.http_status >= 500
+    )
+
+
+class StripeClient:
+    """Pooled Stripe client with timeouts, retries and latency logging."""
+
+    def __init__(
+        self,
+        api_key=None,
+        max_retries=MAX_RETRIES,
+        backoff=RETRY_BACKOFF,
+        pool_size=POOL_SIZE,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        session = Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+        )
+        session.mount("https://", adapter)
+
+        # One Stripe client per distinct timeout, all sharing the session so
+        # connections are reused whatever the operation.
+        api_key = api_key or settings.STRIPE_SECRET_KEY
+        self._clients = {
+            timeout: stripe.StripeClient(
+                api_key,
+                max_network_retries=0,
+                http_client=stripe.RequestsClient(
+                    timeout=(CONNECT_TIMEOUT, timeout),
+                    session=session,
+                ),
+            )
+            for _, _, timeout in OPERATIONS.values()
+        }
+
+    def request(self, operation, *args, params=None, idempotency_key=None):
+        """
+        Run one Stripe operation from ``OPERATIONS``.
+
+        Writes without an explicit key get a random one that is reused by
+        every retry of this call.
+        """
+        service_name, method_name, timeout = OPERATIONS[operation]
+        service = getattr(self._clients[timeout].v1, service_name)
+        method = getattr(service, method_name)
+
+        options = {}
+        if method_name != "retrieve":
+            options["idempotency_key"] = (
+                idempotency_key or f"{operation}-{uuid.uuid4()}"
+            )
+
+        attempts = 0
+        outcome = "ok"
+        start = time.perf_counter()
+        try:
+            while True:
+                attempts += 1
+                try:
+                    return method(*args, params=params or {}, options=options)
+                except stripe.StripeError as exc:
+                    if attempts > self.max_retries or not is_retryable(exc):
+                        outcome = type(exc).__name__
+                        raise
+                    delay = min(
+                        RETRY_BACKOFF_CAP,
+                        self.backoff * 2 ** (attempts - 1),
+                    )
+                    time.sleep(random.uniform(0, delay))
+        finally:
+            logger.info(json.dumps({
+                "event": "stripe_request",
+                "operation": operation,
+                "outcome": outcome,
+                "attempts": attempts,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+            }))
+
+    def create_customer(self, idempotency_key=None, **params):
+        return self.request(
+            "customer.create",
+            params=params,
+            idempotency_key=idempotency_key,
+        )
+
+    def create_setup_intent(self, **params):
+        return self.request("setup_intent.create", params=params)
+
+    def attach_payment_method(self, payment_method_id, customer):
+        return self.request(
+            "payment_method.attach",
+            payment_method_id,
+            params={"customer": customer},
+            idempotency_key=f"attach-{payment_method_id}-{customer}",
+        )
+
+    def set_default_payment_method(self, customer, payment_method_id):
+        return self.request(
+            "customer.update",
+            customer,
+            params={
+                "invoice_settings": {"default_payment_method": payment_method_id}
+            },
+        )
+
+    def retrieve_payment_method(self, payment_method_id):
+        return self.request("payment_method.retrieve", payment_method_id)
+
+    def create_account(self, idempotency_key=None, **params):
+        return self.request(
+            "account.create",
+            params=params,
+            idempotency_key=idempotency_key,
+        )
+
+    def retrieve_account(self, account_id, expand=None):
+        return self.request(
+            "account.retrieve",
+            account_id,
+            params={"expand": expand} if expand else None,
+        )
+
+    def create_account_link(self, **params):
+        return self.request("account_link.create", params=params)
+
+    def create_payment_intent(self, idempotency_key=None, **params):
+        return self.request(
+            "payment_intent.create",
+            params=params,
+            idempotency_key=idempotency_key,
+        )
+
+    def create_refund(self, idempotency_key=None, **params):
+        return self.request(
+            "refund.create",
+            params=params,
+            idempotency_key=idempotency_key,
+        )
@@ -0,0 +1,266 @@
+"""Tests for the off-session auto-pay runner."""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+import stripe
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import BankingInformation, Client, Invoice, Payout
+from finance.autopay import (
+    FAILED_RETRY_AFTER,
+    due_autopay_invoices,
+    record_results,
+    run_autopay,
+)
+from finance.fake_stripe_events import payment_intent_event
+from finance.stripe_gateway import get_client
+from finance.tests.test_finance_api import create_business
+from finance.webhooks import process_stripe_events, store_event
+
+
+class RunAutopayTests(TestCase):
+    """Test batched auto-pay of due invoices."""
+
+    def setUp(self):
+        self.stripe = get_client()
+        self.stripe.reset()
+        self.manager = get_user_model().objects.create_user(
+            "autopay-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.business = create_business(owner=self.manager)
+        BankingInformation.objects.create(
+            business=self.business,
+            payment_method_type="BANK_ACCOUNT",
+            stripe_connected_account_id="acct_test",
+        )
+
+    def create_invoice(self, auto_payments=True, **params):
+        index = Client.all_objects.count()
+        user = get_user_model().objects.create_user(
+            f"autopay-client-{index}@example.com",
+            "test123",
+            role="CLIENT",
+        )
+        client = Client.objects.create(business=self.business, user=user)
+        BankingInformation.objects.create(
+            client=client,
+            payment_method_type="CARD",
+            auto_payments=auto_payments,
+            stripe_customer_id=f"cus_{index}",
+            stripe_payment_method_id=f"pm_{index}",
+        )
+        defaults = {
+            "business": self.business,
+            "client": client,
+            "due_date": date.today() - timedelta(days=1),
+            "status": "SENT",
+            "subtotal": Decimal("100.00"),
+            "total_amount": Decimal("105.00"),
+        }
+        defaults.update(params)
+        return Invoice.objects.create(**defaults)
+
+    def test_charges_due_invoices_and_records_payouts(self):
+        """Test due auto-pay invoices are charged and marked paid."""
+        invoices = [self.create_invoice() for _ in range(3)]
+
+        report = run_autopay(workers=2, batch_size=2, rate=0)
+
+        self.assertEqual(report["paid"], 3)
+        self.assertEqual(report["collected"], {"CAD": Decimal("315.00")})
+        self.assertEqual(
+            Invoice.objects.filter(status="PAID").count(),
+            3,
+        )
+        payout = Payout.objects.get(invoice=invoices[0])
+        self.assertEqual(payout.status, "PAID")
+        self.assertTrue(payout.stripe_payment_intent_id.startswith("pi_"))
+        keys = {
+            call["idempotency_key"]
+            for call in self.stripe.calls_for("payment_intent.create")
+        }
+        self.assertEqual(len(keys), 3)
+
+    def test_skips_ineligible_invoices(self):
+        """Test drafts, future, opted-out and paid invoices are skipped."""
+        self.create_invoice(status="DRAFT")
+        self.create_invoice(due_date=date.today() + timedelta(days=3))
+        self.create_invoice(auto_payments=False)
+        self.create_invoice(status="PAID")
+
+        report = run_autopay(rate=0)
+
+        self.assertEqual(report["due"], 0)
+        self.assertEqual(self.stripe.calls, [])
+
+    def test_rerun_does_not_charge_twice(self):
+        """Test a second run finds nothing left to charge."""
+        self.create_invoice()
+        run_autopay(rate=0)
+
+        report = run_autopay(rate=0)
+
+        self.assertEqual(report["due"], 0)
+        self.assertEqual(len(self.stripe.calls_for("payment_intent.create")), 1)
+
+    def test_declined_charge_recorded_and_not_retried_immediately(self):
+        """Test a decline writes a FAILED payout and leaves the invoice SENT."""
+        invoice = self.create_invoice()
+        self.stripe.fail_next(
+            "payment_intent.create",
+            stripe.CardError(
+                "Your card was declined.",
+                param=None,
+                code="card_declined",
+            ),
+        )
+
+        with self.assertLogs("finance.autopay", level="WARNING"):
+            report = run_autopay(rate=0)
+
+        self.assertEqual(report["failed"], 1)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, "SENT")
+        payout = Payout.objects.get(invoice=invoice)
+        self.assertEqual(payout.status, "FAILED")
+        self.assertIn("declined", payout.failure_reason)
+        self.assertEqual(run_autopay(rate=0)["due"], 0)
+
+    def test_declined_charge_retried_as_new_charge(self):
+        """Test a retry after FAILED_RETRY_AFTER does not replay the decline."""
+        invoice = self.create_invoice()
+        self.stripe.fail_next(
+            "payment_intent.create",
+            stripe.CardError("Your card was declined.", param=None, code="card_declined"),
+        )
+        with self.assertLogs("finance.autopay", level="WARNING"):
+            run_autopay(rate=0)
+        Payout.objects.filter(invoice=invoice).update(
+            created_at=timezone.now() - FAILED_RETRY_AFTER - timedelta(hours=1)
+        )
+
+        report = run_autopay(rate=0)
+
+        self.assertEqual(report["paid"], 1)
+        first, second = self.stripe.calls_for("payment_intent.create")
+        self.assertNotEqual(first["idempotency_key"], second["idempotency_key"])
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, "PAID")
+
+    def test_processing_charge_left_pending_for_webhook(self):
+        """Test a processing charge is neither failed nor charged again."""
+        invoice = self.create_invoice()
+        processing = stripe.StripeObject.construct_from(
+            {"id": "pi_processing", "status": "processing"},
+            None,
+        )
+
+        with patch.object(
+            self.stripe,
+            "create_payment_intent",
+            return_value=processing,
+        ):
+            report = run_autopay(rate=0)
+
+        self.assertEqual(report["processing"], 1)
+        payout = Payout.objects.get(invoice=invoice)
+        self.assertEqual(payout.status, "PENDING")
+        self.assertEqual(run_autopay(rate=0)["due"], 0)
+
+        store_event(payment_intent_event(invoice, payment_intent_id="pi_processing"))
+        process_stripe_events()
+
+        payout.refresh_from_db()
+        self.assertEqual(payout.status, "PAID")
+        self.assertEqual(Payout.objects.filter(invoice=invoice).count(), 1)
+
+    def test_declined_charge_deduplicated_with_webhook(self):
+        """Test a decline and its webhook share one FAILED payout."""
+        invoice = self.create_invoice()
+        self.stripe.fail_next(
+            "payment_intent.create",
+            stripe.CardError(
+                "Your card was declined.",
+                param=None,
+                code="card_declined",
+                json_body={
+                    "error": {
+                        "message": "Your card was declined.",
+                        "payment_intent": {"id": "pi_declined"},
+                    }
+                },
+            ),
+        )
+        store_event(
+            payment_intent_event(
+                invoice,
+                succeeded=False,
+                payment_intent_id="pi_declined",
+            )
+        )
+
+        with self.assertLogs("finance.autopay", level="WARNING"):
+            run_autopay(rate=0)
+        process_stripe_events()
+
+        payout = Payout.objects.get(invoice=invoice)
+        self.assertEqual(payout.status, "FAILED")
+        self.assertEqual(payout.stripe_payment_intent_id, "pi_declined")
+
+    def test_charge_settled_by_webhook_first_is_not_refunded(self):
+        """Test a webhook for the same charge landing mid-batch is not flagged."""
+        invoice = self.create_invoice()
+        due = list(due_autopay_invoices(date.today()))
+        store_event(payment_intent_event(invoice, payment_intent_id="pi_autopay"))
+        process_stripe_events()
+        result = {
+            "invoice": due[0],
+            "paid": True,
+            "retry": False,
+            "payment_intent_id": "pi_autopay",
+            "error": None,
+        }
+
+        with self.assertNoLogs("finance.autopay", level="ERROR"):
+            record_results([result])
+
+        payout = Payout.objects.get(invoice=invoice)
+        self.assertEqual(payout.status, "PAID")
+        self.assertEqual(payout.stripe_payment_intent_id, "pi_autopay")
+
+    def test_rate_limited_charge_is_left_for_next_run(self):
+        """Test a charge Stripe kept rate limiting is replayed next run."""
+        invoice = self.create_invoice()
+        self.stripe.fail_next(
+            "payment_intent.create",
+            stripe.RateLimitError("Too many requests"),
+        )
+
+        report = run_autopay(rate=0)
+
+        self.assertEqual(report["deferred"], 1)
+        self.assertFalse(Payout.objects.filter(invoice=invoice).exists())
+
+        report = run_autopay(rate=0)
+
+        self.assertEqual(report["paid"], 1)
+        first, second = self.stripe.calls_for("payment_intent.create")
+        self.assertEqual(first["idempotency_key"], second["idempotency_key"])
+
+    def test_command_prints_summary(self):
+        """Test run_autopay reports what it collected."""
+        self.create_invoice()
+        out = StringIO()
+
+        call_command("run_autopay", "--rate", "0", stdout=out)
+
+        self.assertIn("1 paid", out.getvalue())
+        self.assertIn("CAD: 105.00", out.getvalue())
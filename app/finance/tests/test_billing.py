@@ -0,0 +1,259 @@
+"""Tests for recurring subscription billing."""
+
+from datetime import date, timedelta
+from importlib import import_module
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Client, DocumentSequence, Invoice, Quote, Service
+from finance.billing import billing_period, run_billing
+from finance.tests.test_finance_api import create_business
+
+
+class BillingPeriodTests(TestCase):
+    """Test subscription period arithmetic."""
+
+    def test_monthly_periods_anchor_on_start_date(self):
+        """Test monthly periods start on the anchor day each month."""
+        self.assertEqual(
+            billing_period(date(2025, 1, 15), "MONTHLY", date(2025, 3, 20)),
+            (date(2025, 3, 15), date(2025, 4, 14)),
+        )
+        self.assertEqual(
+            billing_period(date(2025, 1, 15), "MONTHLY", date(2025, 3, 14)),
+            (date(2025, 2, 15), date(2025, 3, 14)),
+        )
+
+    def test_month_end_anchor_is_clamped_without_drifting(self):
+        """Test a 31st start bills on short month ends, then the 31st."""
+        self.assertEqual(
+            billing_period(date(2025, 1, 31), "MONTHLY", date(2025, 2, 28)),
+            (date(2025, 2, 28), date(2025, 3, 30)),
+        )
+        self.assertEqual(
+            billing_period(date(2025, 1, 31), "MONTHLY", date(2025, 3, 31)),
+            (date(2025, 3, 31), date(2025, 4, 29)),
+        )
+
+    def test_yearly_period_and_not_started(self):
+        """Test yearly periods and dates before the service starts."""
+        self.assertEqual(
+            billing_period(date(2024, 2, 29), "YEARLY", date(2025, 6, 1)),
+            (date(2025, 2, 28), date(2026, 2, 27)),
+        )
+        self.assertIsNone(
+            billing_period(date(2025, 5, 1), "MONTHLY", date(2025, 4, 30))
+        )
+
+
+class RunBillingTests(TestCase):
+    """Test the set-based subscription billing run."""
+
+    def setUp(self):
+        self.manager = get_user_model().objects.create_user(
+            "billing-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.business = create_business(owner=self.manager)
+        self.today = timezone.localdate()
+
+    def create_subscription(self, quote_status="SIGNED", **params):
+        index = Service.all_objects.count()
+        user = get_user_model().objects.create_user(
+            f"billing-client-{index}@example.com",
+            "test123",
+            role="CLIENT",
+        )
+        client = Client.objects.create(business=self.business, user=user)
+        defaults = {
+            "client": client,
+            "business": self.business,
+            "service_name": "Lawn care",
+            "service_type": "SUBSCRIPTION",
+            "billing_cycle": "MONTHLY",
+            "status": "ACTIVE",
+            "auto_generate_invoices": True,
+            "start_date": self.today - timedelta(days=40),
+            "price": Decimal("80.00"),
+            "street_address": "123 Finance Street",
+            "city": "Calgary",
+            "province_state": "AB",
+            "postal_code": "T2T2T2",
+        }
+        defaults.update(params)
+        service = Service.objects.create(**defaults)
+        Quote.objects.create(
+            service=service,
+            valid_until=self.today + timedelta(days=2),
+            status=quote_status,
+        )
+        return service
+
+    def test_bills_due_subscriptions_once_per_period(self):
+        """Test a run invoices each due service and a rerun is a no-op."""
+        services = [self.create_subscription() for _ in range(3)]
+
+        report = run_billing()
+
+        self.assertEqual(report["invoiced"], 3)
+        self.assertEqual(report["totals"], {"CAD": Decimal("252.00")})
+        invoices = Invoice.objects.order_by("invoice_number")
+        self.assertEqual(
+            sorted(invoice.service_id for invoice in invoices),
+            [service.id for service in services],
+        )
+        period_start, _ = billing_period(
+            services[0].start_date,
+            "MONTHLY",
+            self.today,
+        )
+        self.assertTrue(
+            all(inv.billing_period_start == period_start for inv in invoices)
+        )
+        self.assertEqual(len({inv.invoice_number for inv in invoices}), 3)
+        self.assertEqual(invoices[0].tax_amount, Decimal("4.00"))
+
+        rerun = run_billing()
+
+        self.assertEqual(rerun["invoiced"], 0)
+        self.assertEqual(rerun["already_billed"], 3)
+        self.assertEqual(Invoice.objects.count(), 3)
+
+    def test_skips_services_that_are_not_billable(self):
+        """Test unsigned, one-off, future and manual services are skipped."""
+        self.create_subscription(quote_status="SENT")
+        self.create_subscription(service_type="ONE_TIME")
+        self.create_subscription(start_date=self.today + timedelta(days=3))
+        self.create_subscription(auto_generate_invoices=False)
+
+        report = run_billing()
+
+        self.assertEqual(report["scanned"], 0)
+        self.assertFalse(Invoice.objects.exists())
+
+    def test_activation_invoice_covers_current_period(self):
+        """Test a period already billed at activation is not billed again."""
+        service = self.create_subscription()
+        period_start, _ = billing_period(
+            service.start_date,
+            "MONTHLY",
+            self.today,
+        )
+        Invoice.objects.create(
+            business=self.business,
+            client=service.client,
+            service=service,
+            due_date=self.today,
+            subtotal=service.price,
+            total_amount=service.price,
+            billing_period_start=period_start,
+        )
+
+        report = run_billing()
+
+        self.assertEqual(report["invoiced"], 0)
+        self.assertEqual(report["already_billed"], 1)
+
+    def test_backfilled_activation_invoice_covers_current_period(self):
+        """Test invoices from before billing periods are not billed again."""
+        service = self.create_subscription()
+        activation = Invoice.objects.create(
+            business=self.business,
+            client=service.client,
+            service=service,
+            due_date=self.today,
+            subtotal=service.price,
+            total_amount=service.price,
+        )
+        duplicate = Invoice.objects.create(
+            business=self.business,
+            client=service.client,
+            service=service,
+            due_date=self.today,
+            subtotal=service.price,
+            total_amount=service.price,
+        )
+        migration = import_module("core.migrations.0025_invoice_billing_period")
+
+        migration.backfill_billing_period_start(apps, None)
+        report = run_billing()
+
+        activation.refresh_from_db()
+        duplicate.refresh_from_db()
+        self.assertEqual(
+            activation.billing_period_start,
+            billing_period(service.start_date, "MONTHLY", self.today)[0],
+        )
+        self.assertIsNone(duplicate.billing_period_start)
+        self.assertEqual(report["invoiced"], 0)
+        self.assertEqual(report["already_billed"], 1)
+
+    def test_period_claimed_mid_chunk_counts_as_already_billed(self):
+        """Test an activation invoice racing the run does not abort it."""
+        raced, other = self.create_subscription(), self.create_subscription()
+        period_start = billing_period(raced.start_date, "MONTHLY", self.today)[0]
+        next_values = DocumentSequence.objects.next_values
+
+        def activate_then_allocate(*args):
+            # Saving the invoice numbers it through next_values too.
+            patched.side_effect = next_values
+            Invoice.objects.create(
+                business=self.business,
+                client=raced.client,
+                service=raced,
+                due_date=self.today,
+                subtotal=raced.price,
+                total_amount=raced.price,
+                billing_period_start=period_start,
+            )
+            return next_values(*args)
+
+        with patch.object(
+            DocumentSequence.objects,
+            "next_values",
+            side_effect=activate_then_allocate,
+        ) as patched:
+            report = run_billing()
+
+        self.assertEqual(report["invoiced"], 1)
+        self.assertEqual(report["already_billed"], 1)
+        self.assertEqual(Invoice.objects.filter(service=other).count(), 1)
+        self.assertEqual(Invoice.objects.filter(service=raced).count(), 1)
+
+    def test_query_count_is_independent_of_subscription_count(self):
+        """Test billing more services in one chunk adds no queries."""
+        self.create_subscription()
+        with CaptureQueriesContext(connection) as small_run:
+            run_billing(dry_run=True)
+
+        for _ in range(10):
+            self.create_subscription()
+        with CaptureQueriesContext(connection) as large_run:
+            report = run_billing(dry_run=True)
+
+        self.assertEqual(report["invoiced"], 11)
+        self.assertEqual(
+            len(small_run.captured_queries),
+            len(large_run.captured_queries),
+        )
+        self.assertFalse(Invoice.objects.exists())
+
+    def test_command_prints_summary(self):
+        """Test run_billing reports what it billed."""
+        self.create_subscription()
+        out = StringIO()
+
+        call_command("run_billing", stdout=out)
+
+        self.assertIn("1 invoiced", out.getvalue())
+        self.assertIn("CAD: 84.00", out.getvalue())
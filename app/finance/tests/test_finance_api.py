@@ -2,10 +2,9 @@
 
 from datetime import date, timedelta
 from decimal import Decimal
-from types import SimpleNamespace
-from unittest.mock import patch
-
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
@@ -20,6 +19,11 @@ from core.models import (
     Payout,
     Service,
 )
+from core.tests.helpers import count_queries, create_client_services
+from finance.stripe_gateway import get_client
+
+
+INVOICES_URL = reverse("finance:invoice-list")
 
 
 def create_business(owner, **params):
@@ -49,6 +53,8 @@ class InvoicePaymentWorkflowTests(TestCase):
 
     def setUp(self):
         self.client = APIClient()
+        self.stripe = get_client()
+        self.stripe.reset()
         self.manager = get_user_model().objects.create_user(
             "finance-manager@example.com",
             "test123",
@@ -144,15 +150,10 @@ class InvoicePaymentWorkflowTests(TestCase):
         )
         self.assertFalse(Payout.objects.filter(invoice=self.invoice).exists())
 
-    @patch("finance.views.stripe.PaymentIntent.create")
-    def test_successful_payment_creates_exactly_one_payout(
-        self,
-        mock_payment_intent_create,
-    ):
+    def test_successful_payment_creates_exactly_one_payout(self):
         """Test successful payment marks invoice paid and records one payout."""
         self.add_client_payment_method()
         self.add_business_bank_account()
-        mock_payment_intent_create.return_value = SimpleNamespace(id="pi_success")
         self.client.force_authenticate(self.client_user)
 
         res = self.client.post(self.make_payment_url())
@@ -166,17 +167,18 @@ class InvoicePaymentWorkflowTests(TestCase):
         payout = Payout.objects.get(invoice=self.invoice)
         self.assertEqual(payout.status, "PAID")
         self.assertEqual(payout.amount, self.invoice.total_amount)
-        self.assertEqual(payout.stripe_payment_intent_id, "pi_success")
+        self.assertEqual(payout.stripe_payment_intent_id, "pi_fake_1")
+        charge = self.stripe.calls_for("payment_intent.create")[0]
+        self.assertEqual(charge["params"]["amount"], 10500)
+        self.assertEqual(
+            charge["idempotency_key"],
+            f"invoice-payment-{self.invoice.id}-pm_test",
+        )
 
-    @patch("finance.views.stripe.PaymentIntent.create")
-    def test_repaying_already_paid_invoice_is_blocked(
-        self,
-        mock_payment_intent_create,
-    ):
+    def test_repaying_already_paid_invoice_is_blocked(self):
         """Test paying the same invoice twice is rejected safely."""
         self.add_client_payment_method()
         self.add_business_bank_account()
-        mock_payment_intent_create.return_value = SimpleNamespace(id="pi_success")
         self.client.force_authenticate(self.client_user)
 
         first_res = self.client.post(self.make_payment_url())
@@ -186,12 +188,10 @@ class InvoicePaymentWorkflowTests(TestCase):
         self.assertEqual(second_res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(second_res.data["detail"], "Invoice already paid.")
         self.assertEqual(Payout.objects.filter(invoice=self.invoice).count(), 1)
-        self.assertEqual(mock_payment_intent_create.call_count, 1)
+        self.assertEqual(len(self.stripe.calls_for("payment_intent.create")), 1)
 
-    @patch("finance.views.stripe.Refund.create")
     def test_payout_refund_succeeds_once_and_duplicate_refund_is_rejected(
         self,
-        mock_refund_create,
     ):
         """Test payout refunds are idempotent from the API perspective."""
         payout = Payout.objects.create(
@@ -203,7 +203,6 @@ class InvoicePaymentWorkflowTests(TestCase):
             stripe_payment_intent_id="pi_success",
             processed_at=timezone.now(),
         )
-        mock_refund_create.return_value = SimpleNamespace(id="re_success")
         self.client.force_authenticate(self.manager)
 
         first_res = self.client.post(
@@ -223,9 +222,242 @@ class InvoicePaymentWorkflowTests(TestCase):
             second_res.data["error"],
             "This payout has already been refunded.",
         )
-        self.assertEqual(mock_refund_create.call_count, 1)
+        self.assertEqual(len(self.stripe.calls_for("refund.create")), 1)
 
         payout.refresh_from_db()
         self.assertTrue(payout.is_refunded)
         self.assertEqual(payout.status, "REFUNDED")
-        self.assertEqual(payout.stripe_refund_id, "re_success")
+        self.assertEqual(payout.stripe_refund_id, "re_fake_1")
+
+
+class DashboardApiTests(TestCase):
+    """Test the manager dashboard aggregate endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_user(
+            "dashboard-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.client_user = get_user_model().objects.create_user(
+            "dashboard-client@example.com",
+            "test123",
+            role="CLIENT",
+        )
+        self.business = create_business(owner=self.manager, timezone="UTC")
+        self.client_record = Client.objects.create(
+            business=self.business,
+            user=self.client_user,
+        )
+
+    def create_invoice(self, **params):
+        defaults = {
+            "business": self.business,
+            "client": self.client_record,
+            "due_date": date.today() + timedelta(days=2),
+            "status": "SENT",
+            "currency": "CAD",
+            "subtotal": Decimal("100.00"),
+            "tax_rate": Decimal("5.00"),
+            "tax_amount": Decimal("5.00"),
+            "total_amount": Decimal("105.00"),
+        }
+        defaults.update(params)
+        return Invoice.objects.create(**defaults)
+
+    def test_dashboard_requires_business_owner(self):
+        """Test users without a business cannot read dashboard metrics."""
+        self.client.force_authenticate(self.client_user)
+
+        res = self.client.get(reverse("finance:dashboard"))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_dashboard_rejects_unknown_granularity(self):
+        """Test only week, month and year granularities are accepted."""
+        self.client.force_authenticate(self.manager)
+
+        res = self.client.get(reverse("finance:dashboard"), {"granularity": "day"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_dashboard_aggregates_revenue_and_counts(self):
+        """Test revenue buckets and KPI counts ignore deleted records."""
+        now = timezone.now()
+        self.create_invoice(status="PAID", paid_at=now)
+        self.create_invoice(
+            status="PAID",
+            paid_at=now,
+            currency="USD",
+            total_amount=Decimal("50.00"),
+        )
+        self.create_invoice()
+        deleted = self.create_invoice(status="PAID", paid_at=now)
+        deleted.soft_delete(user=self.manager)
+        self.client.force_authenticate(self.manager)
+
+        with self.assertNumQueries(4):
+            res = self.client.get(
+                reverse("finance:dashboard"),
+                {"granularity": "month", "periods": 3},
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["granularity"], "month")
+        self.assertEqual(len(res.data["revenue"]), 3)
+        current = res.data["revenue"][-1]
+        self.assertEqual(
+            current["period"],
+            now.date().replace(day=1).isoformat(),
+        )
+        self.assertEqual(current["collected"], {"CAD": "105.00", "USD": "50.00"})
+        self.assertEqual(current["billed"], {"CAD": "210.00", "USD": "50.00"})
+        self.assertEqual(current["paid_invoices"], 2)
+        self.assertEqual(
+            res.data["counts"],
+            {
+                "clients": 1,
+                "active_jobs": 0,
+                "pending_quotes": 0,
+                "unpaid_invoices": 1,
+            },
+        )
+
+    def test_dashboard_weekly_and_yearly_series_lengths(self):
+        """Test each granularity returns its default number of periods."""
+        self.client.force_authenticate(self.manager)
+
+        weekly = self.client.get(reverse("finance:dashboard"), {"granularity": "week"})
+        yearly = self.client.get(reverse("finance:dashboard"), {"granularity": "year"})
+
+        self.assertEqual(len(weekly.data["revenue"]), 8)
+        self.assertEqual(len(yearly.data["revenue"]), 6)
+        self.assertEqual(
+            yearly.data["revenue"][-1]["period"],
+            f"{timezone.now().year}-01-01",
+        )
+
+
+class InvoiceListQueryCountTests(TestCase):
+    """Test the invoice list runs a constant number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_user(
+            "invoice-list-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.business = create_business(owner=self.manager)
+        self.client.force_authenticate(self.manager)
+
+    def create_invoices(self, count):
+        for service in create_client_services(self.business, count):
+            invoice = Invoice.objects.create(
+                business=self.business,
+                client=service.client,
+                service=service,
+                due_date=date.today(),
+                status="PAID",
+                subtotal=Decimal("100.00"),
+                total_amount=Decimal("105.00"),
+                paid_at=timezone.now(),
+            )
+            Payout.objects.create(
+                business=self.business,
+                invoice=invoice,
+                amount=invoice.total_amount,
+                status="PAID",
+            )
+
+    def test_invoice_list_query_count_is_independent_of_page_size(self):
+        """Test adding invoices to a page does not add queries."""
+        self.create_invoices(2)
+        small_page_queries, _ = count_queries(self, INVOICES_URL)
+
+        self.create_invoices(20)
+        large_page_queries, res = count_queries(self, INVOICES_URL)
+
+        self.assertEqual(small_page_queries, large_page_queries)
+        self.assertEqual(len(res.data["results"]), 22)
+
+    def test_invoice_list_reads_payment_flags_from_annotations(self):
+        """Test annotated flags match the related records."""
+        self.create_invoices(1)
+        _, res = count_queries(self, INVOICES_URL)
+
+        row = res.data["results"][0]
+        payout = Payout.objects.get()
+        self.assertTrue(row["has_payment_method"])
+        self.assertTrue(row["has_paid_payout"])
+        self.assertEqual(row["payout_id"], payout.id)
+        self.assertEqual(row["client_name"], "Client 0")
+        self.assertEqual(row["service_name"], "Flooring")
+
+
+class InvoiceCursorPaginationTests(TestCase):
+    """Test the opt-in keyset pagination mode of the invoice list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_user(
+            "invoice-cursor-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        client_user = get_user_model().objects.create_user(
+            "invoice-cursor-client@example.com",
+            "test123",
+            role="CLIENT",
+        )
+        self.business = create_business(owner=self.manager)
+        client_record = Client.objects.create(
+            business=self.business,
+            user=client_user,
+        )
+        for _ in range(5):
+            Invoice.objects.create(
+                business=self.business,
+                client=client_record,
+                due_date=date.today(),
+                subtotal=Decimal("100.00"),
+                total_amount=Decimal("105.00"),
+            )
+        self.client.force_authenticate(self.manager)
+
+    def test_cursor_mode_walks_every_invoice_newest_first(self):
+        """Test following next links returns each invoice exactly once."""
+        url = reverse("finance:invoice-list") + "?cursor=&page_size=2"
+        seen = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.data["columns"][0]["name"], "invoice_number")
+            self.assertNotIn("count", res.data)
+            seen.extend(row["id"] for row in res.data["results"])
+            url = res.data["next"]
+
+        expected = list(
+            Invoice.objects.order_by("-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_cursor_mode_skips_count_query(self):
+        """Test keyset pages do not run COUNT(*)."""
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse("finance:invoice-list") + "?cursor=")
+
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in context.captured_queries)
+        )
+
+    def test_approximate_count_matches_small_result_sets(self):
+        """Test small result sets still report the exact count."""
+        res = self.client.get(
+            reverse("finance:invoice-list") + "?count=approximate"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 5)
+        self.assertEqual(res.data["total_pages"], 1)
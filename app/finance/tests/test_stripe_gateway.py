@@ -0,0 +1,153 @@
+"""Tests for the shared Stripe client."""
+
+import json
+from unittest.mock import patch
+
+import stripe
+from django.test import SimpleTestCase
+
+from finance.stripe_gateway import (
+    CONNECT_TIMEOUT,
+    OPERATIONS,
+    StripeClient,
+    is_retryable,
+)
+
+
+def payment_intent(intent_id="pi_123"):
+    return stripe.StripeObject.construct_from(
+        {"id": intent_id, "status": "succeeded"},
+        None,
+    )
+
+
+@patch("finance.stripe_gateway.time.sleep")
+@patch("stripe.PaymentIntentService.create")
+class StripeClientTests(SimpleTestCase):
+    """Test retries, idempotency keys and timeouts of the Stripe client."""
+
+    def setUp(self):
+        self.client = StripeClient(api_key="sk_test_gateway", max_retries=2)
+
+    def test_transient_errors_retried_with_same_idempotency_key(
+        self,
+        mock_create,
+        mock_sleep,
+    ):
+        """Test connection errors are retried under one idempotency key."""
+        mock_create.side_effect = [
+            stripe.APIConnectionError("Connection reset"),
+            stripe.APIError("Server error", http_status=500),
+            payment_intent(),
+        ]
+
+        with self.assertLogs("finance.stripe_gateway", level="INFO") as logs:
+            result = self.client.create_payment_intent(
+                amount=1000,
+                currency="cad",
+                idempotency_key="invoice-payment-1",
+            )
+
+        self.assertEqual(result.id, "pi_123")
+        self.assertEqual(mock_create.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        keys = {
+            call.kwargs["options"]["idempotency_key"]
+            for call in mock_create.mock_calls
+        }
+        self.assertEqual(keys, {"invoice-payment-1"})
+        metrics = json.loads(logs.records[0].getMessage())
+        self.assertEqual(metrics["operation"], "payment_intent.create")
+        self.assertEqual(metrics["attempts"], 3)
+        self.assertEqual(metrics["outcome"], "ok")
+
+    def test_retries_are_bounded(self, mock_create, mock_sleep):
+        """Test the last transient error is raised once retries run out."""
+        mock_create.side_effect = stripe.RateLimitError("Too many requests")
+
+        with self.assertLogs("finance.stripe_gateway", level="INFO"):
+            with self.assertRaises(stripe.RateLimitError):
+                self.client.create_payment_intent(amount=1000, currency="cad")
+
+        self.assertEqual(mock_create.call_count, 3)
+
+    def test_card_errors_not_retried(self, mock_create, mock_sleep):
+        """Test declines are raised immediately."""
+        mock_create.side_effect = stripe.CardError(
+            "Your card was declined.",
+            param=None,
+            code="card_declined",
+            http_status=402,
+        )
+
+        with self.assertLogs("finance.stripe_gateway", level="INFO") as logs:
+            with self.assertRaises(stripe.CardError):
+                self.client.create_payment_intent(amount=1000, currency="cad")
+
+        self.assertEqual(mock_create.call_count, 1)
+        mock_sleep.assert_not_called()
+        self.assertIn('"outcome": "CardError"', logs.output[0])
+
+    def test_writes_always_carry_an_idempotency_key(
+        self,
+        mock_create,
+        mock_sleep,
+    ):
+        """Test writes without an explicit key still send one."""
+        mock_create.return_value = payment_intent()
+
+        with self.assertLogs("finance.stripe_gateway", level="INFO"):
+            self.client.create_payment_intent(amount=1000, currency="cad")
+
+        options = mock_create.call_args.kwargs["options"]
+        self.assertTrue(
+            options["idempotency_key"].startswith("payment_intent.create-")
+        )
+
+    def test_operations_share_one_pooled_session(self, mock_create, mock_sleep):
+        """Test every timeout class reuses the same HTTP session."""
+        http_clients = [
+            client._requestor._client for client in self.client._clients.values()
+        ]
+
+        self.assertEqual(len({id(c._session) for c in http_clients}), 1)
+        self.assertEqual(
+            {c._timeout for c in http_clients},
+            {(CONNECT_TIMEOUT, timeout) for _, _, timeout in OPERATIONS.values()},
+        )
+
+
+class IsRetryableTests(SimpleTestCase):
+    """Test which Stripe errors are retried."""
+
+    def test_retryable_errors(self):
+        """Test network, rate limit, conflict and server errors retry."""
+        self.assertTrue(is_retryable(stripe.APIConnectionError("reset")))
+        self.assertTrue(is_retryable(stripe.RateLimitError("slow down")))
+        self.assertTrue(is_retryable(stripe.APIError("lock", http_status=409)))
+        self.assertTrue(is_retryable(stripe.APIError("oops", http_status=503)))
+
+    def test_client_errors_and_stripe_should_retry_header(self):
+        """Test 4xx errors fail fast unless Stripe asks for a retry."""
+        self.assertFalse(
+            is_retryable(stripe.InvalidRequestError("bad", None, http_status=400))
+        )
+        self.assertTrue(
+            is_retryable(
+                stripe.InvalidRequestError(
+                    "bad",
+                    None,
+                    http_status=400,
+                    headers={"stripe-should-retry": "true"},
+                )
+            )
+        )
+        self.assertFalse(
+            is_retryable(
+                stripe.APIError(
+                    "oops",
+                    http_status=500,
+                    headers={"stripe-should-retry": "false"},
+                )
+            )
+        )
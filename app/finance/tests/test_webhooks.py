@@ -0,0 +1,255 @@
+"""Tests for Stripe webhook ingestion and event processing."""
+
+import time
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import BankingInformation, Client, Invoice, Payout, StripeEvent
+from finance.fake_stripe_events import (
+    account_updated_event,
+    charge_refunded_event,
+    make_event,
+    payment_intent_event,
+    sign_event,
+)
+from finance.tests.test_finance_api import create_business
+from finance.webhooks import MAX_ATTEMPTS, process_stripe_events, store_event
+
+
+WEBHOOK_URL = reverse("finance:stripe-webhook")
+WEBHOOK_SECRET = "whsec_test"
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class StripeWebhookApiTests(TestCase):
+    """Test signature verification and deduplicated storage."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def post_event(self, event, secret=WEBHOOK_SECRET, timestamp=None):
+        payload, signature = sign_event(event, secret, timestamp=timestamp)
+        return self.client.post(
+            WEBHOOK_URL,
+            data=payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=signature,
+        )
+
+    def test_valid_event_is_stored_once(self):
+        """Test a signed event is stored and redeliveries are ignored."""
+        event = make_event("payment_intent.succeeded", {"id": "pi_1"})
+
+        first = self.post_event(event)
+        second = self.post_event(event)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        stored = StripeEvent.objects.get()
+        self.assertEqual(stored.event_id, event["id"])
+        self.assertEqual(stored.status, "PENDING")
+        self.assertEqual(stored.payload["data"]["object"]["id"], "pi_1")
+
+    def test_invalid_signature_rejected(self):
+        """Test events signed with another secret are rejected."""
+        event = make_event("payment_intent.succeeded", {"id": "pi_1"})
+
+        res = self.post_event(event, secret="whsec_other")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_stale_signature_rejected(self):
+        """Test replayed deliveries outside Stripe's tolerance are rejected."""
+        event = make_event("payment_intent.succeeded", {"id": "pi_1"})
+
+        res = self.post_event(event, timestamp=time.time() - 3600)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(STRIPE_WEBHOOK_SECRET="")
+    def test_unconfigured_secret_rejects_events(self):
+        """Test nothing is accepted without a webhook secret."""
+        event = make_event("payment_intent.succeeded", {"id": "pi_1"})
+
+        res = self.post_event(event)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(StripeEvent.objects.exists())
+
+
+class ProcessStripeEventsTests(TestCase):
+    """Test the worker that applies stored events."""
+
+    def setUp(self):
+        self.manager = get_user_model().objects.create_user(
+            "webhook-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.business = create_business(owner=self.manager)
+        client_user = get_user_model().objects.create_user(
+            "webhook-client@example.com",
+            "test123",
+            role="CLIENT",
+        )
+        client = Client.objects.create(business=self.business, user=client_user)
+        self.invoice = Invoice.objects.create(
+            business=self.business,
+            client=client,
+            due_date=date.today(),
+            status="SENT",
+            subtotal=Decimal("100.00"),
+            total_amount=Decimal("105.00"),
+        )
+        self.created = int(time.time()) - 60
+
+    def test_payment_lifecycle_applied_in_created_order(self):
+        """Test failure, success and refund events apply in Stripe order."""
+        intent_id = "pi_lifecycle"
+        # Stored out of order; the worker must follow Stripe's timestamps.
+        store_event(
+            charge_refunded_event(
+                intent_id,
+                5000,
+                refund_id="re_1",
+                created=self.created + 2,
+            )
+        )
+        store_event(
+            payment_intent_event(
+                self.invoice,
+                payment_intent_id=intent_id,
+                created=self.created + 1,
+            )
+        )
+        store_event(
+            payment_intent_event(
+                self.invoice,
+                succeeded=False,
+                payment_intent_id=intent_id,
+                created=self.created,
+            )
+        )
+
+        summary = process_stripe_events()
+
+        self.assertEqual(summary["processed"], 3)
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, "PAID")
+        payout = Payout.objects.get(stripe_payment_intent_id=intent_id)
+        self.assertEqual(payout.amount, Decimal("105.00"))
+        self.assertEqual(payout.status, "REFUNDED")
+        self.assertTrue(payout.is_refunded)
+        self.assertEqual(payout.refunded_amount, Decimal("50.00"))
+        self.assertEqual(payout.stripe_refund_id, "re_1")
+        self.assertFalse(StripeEvent.objects.filter(status="PENDING").exists())
+
+    def test_failed_payment_records_reason(self):
+        """Test a failed PaymentIntent leaves the invoice open."""
+        store_event(
+            payment_intent_event(
+                self.invoice,
+                succeeded=False,
+                error_message="Insufficient funds.",
+            )
+        )
+
+        process_stripe_events()
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, "SENT")
+        payout = Payout.objects.get(invoice=self.invoice)
+        self.assertEqual(payout.status, "FAILED")
+        self.assertEqual(payout.failure_reason, "Insufficient funds.")
+
+    def test_account_updated_refreshes_bank_details(self):
+        """Test connected account updates refresh the business bank info."""
+        banking_info = BankingInformation.objects.create(
+            business=self.business,
+            payment_method_type="BANK_ACCOUNT",
+            stripe_connected_account_id="acct_123",
+        )
+        store_event(account_updated_event("acct_123", {"last4": "4321"}))
+
+        process_stripe_events()
+
+        banking_info.refresh_from_db()
+        self.assertEqual(banking_info.bank_name, "STRIPE TEST BANK")
+        self.assertEqual(banking_info.account_number_last4, "4321")
+        self.assertEqual(banking_info.account_holder_name, self.business.name)
+
+    def test_unhandled_events_are_ignored(self):
+        """Test event types without a handler are marked ignored."""
+        store_event(make_event("customer.created", {"id": "cus_1"}))
+
+        summary = process_stripe_events()
+
+        self.assertEqual(summary["ignored"], 1)
+        self.assertEqual(StripeEvent.objects.get().status, "IGNORED")
+
+    def test_broken_event_retried_then_failed(self):
+        """Test handler errors are retried and eventually marked failed."""
+        Payout.objects.create(
+            business=self.business,
+            invoice=self.invoice,
+            amount=Decimal("105.00"),
+            status="PAID",
+            stripe_payment_intent_id="pi_broken",
+        )
+        store_event(make_event("charge.refunded", {"payment_intent": "pi_broken"}))
+
+        with self.assertLogs("finance.webhooks", level="ERROR"):
+            for _ in range(MAX_ATTEMPTS):
+                process_stripe_events()
+
+        event = StripeEvent.objects.get()
+        self.assertEqual(event.status, "FAILED")
+        self.assertEqual(event.attempts, MAX_ATTEMPTS)
+        self.assertIn("KeyError", event.last_error)
+
+    def test_event_applied_elsewhere_is_skipped(self):
+        """Test events another worker finished after listing are not reapplied."""
+        store_event(make_event("customer.created", {"id": "cus_1"}, created=self.created))
+        store_event(make_event("customer.updated", {"id": "cus_1"}, created=self.created + 1))
+        applied = []
+
+        def apply_and_finish_the_rest(data):
+            applied.append(data["id"])
+            # Stands in for an overlapping run finishing the next event.
+            StripeEvent.objects.filter(event_type="customer.updated").update(
+                status="PROCESSED"
+            )
+
+        with patch.dict(
+            "finance.webhooks.EVENT_HANDLERS",
+            {
+                "customer.created": apply_and_finish_the_rest,
+                "customer.updated": applied.append,
+            },
+        ):
+            summary = process_stripe_events()
+
+        self.assertEqual(applied, ["cus_1"])
+        self.assertEqual(summary["processed"], 1)
+
+    def test_command_prints_summary(self):
+        """Test process_stripe_events drains pending events and reports."""
+        store_event(payment_intent_event(self.invoice))
+        out = StringIO()
+
+        call_command("process_stripe_events", "--once", stdout=out)
+
+        self.assertIn("processed: 1", out.getvalue())
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, "PAID")
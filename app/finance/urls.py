@@ -18,5 +18,11 @@ router.register('payout', views.PayoutViewSet)
 app_name = 'finance'
 
 urlpatterns = [
+    path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
+    path(
+        'stripe/webhook/',
+        views.StripeWebhookView.as_view(),
+        name='stripe-webhook',
+    ),
     path('', include(router.urls)),
 ]
@@ -1,19 +1,25 @@
+import json
+
 import stripe
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
 from django.utils import timezone
 
 from rest_framework import status, viewsets
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from core.models import BankingInformation, Business, Client, Invoice, Payout
-from finance import serializers, paginations, emails
-
-stripe.api_key = settings.STRIPE_SECRET_KEY
+from core.authentication import CachedTokenAuthentication
+from core.exports import ExportMixin
+from core.models import BankingInformation, Business, Invoice, Payout
+from core.tenancy import get_tenant_context
+from finance import dashboard, serializers, paginations, emails, webhooks
+from finance.stripe_gateway import get_client, make_idempotency_key
 
 
 class BankingInformationViewSet(viewsets.ModelViewSet):
@@ -21,34 +27,31 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
 
     serializer_class = serializers.BankingInformationSerializer
     queryset = BankingInformation.objects.filter(is_active=True)
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         """Return banking information linked to the logged-in user."""
-        user = self.request.user
+        tenant = get_tenant_context(self.request)
 
-        business = Business.objects.filter(owner=user).first()
-        if business:
-            return self.queryset.filter(business=business).order_by("-id")
+        if tenant.business_id:
+            return self.queryset.filter(
+                business_id=tenant.business_id,
+            ).order_by("-id")
 
-        client = Client.objects.filter(user=user).first()
-        if client:
-            return self.queryset.filter(client=client).order_by("-id")
+        if tenant.client_id:
+            return self.queryset.filter(client_id=tenant.client_id).order_by("-id")
 
         return self.queryset.none()
 
     def perform_create(self, serializer):
         """Attach the correct business or client before saving."""
-        user = self.request.user
+        tenant = get_tenant_context(self.request)
 
-        business = Business.objects.filter(owner=user).first()
-        client = Client.objects.filter(user=user).first()
-
-        if business:
-            serializer.save(business=business)
-        elif client:
-            serializer.save(client=client)
+        if tenant.business_id:
+            serializer.save(business_id=tenant.business_id)
+        elif tenant.client_id:
+            serializer.save(client_id=tenant.client_id)
         else:
             raise ValidationError("User must be linked to a Business or Client.")
 
@@ -63,9 +66,9 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
         Create or reuse a Stripe customer,
         and return a SetupIntent client secret.
         """
-        user = request.user
-        business = Business.objects.filter(owner=user).first()
-        client = Client.objects.filter(user=user).first()
+        tenant = get_tenant_context(request)
+        business = tenant.get_business()
+        client = tenant.get_client()
 
         if not business and not client:
             return Response(
@@ -82,15 +85,19 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
             payment_method_type="CARD",
         )
 
+        stripe_client = get_client()
         if not banking_info.stripe_customer_id:
-            customer = stripe.Customer.create(
+            customer = stripe_client.create_customer(
                 name=owner_name,
                 email=owner_email,
+                idempotency_key=make_idempotency_key("customer", banking_info.id),
             )
             banking_info.stripe_customer_id = customer.id
             banking_info.save(update_fields=["stripe_customer_id"])
 
-        intent = stripe.SetupIntent.create(customer=banking_info.stripe_customer_id)
+        intent = stripe_client.create_setup_intent(
+            customer=banking_info.stripe_customer_id,
+        )
 
         return Response(
             {"client_secret": intent.client_secret},
@@ -104,7 +111,6 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
         along with card metadata (brand, last4, exp_month,
         exp_year).
         """
-        user = request.user
         payment_method_id = request.data.get("payment_method_id")
 
         if not payment_method_id:
@@ -113,18 +119,19 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        business = Business.objects.filter(owner=user).first()
-        client = Client.objects.filter(user=user).first()
+        tenant = get_tenant_context(request)
+        business_id = tenant.business_id
+        client_id = tenant.client_id
 
-        if not business and not client:
+        if not business_id and not client_id:
             return Response(
                 {"detail": "User must be linked to a Business or Client."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         banking_info = BankingInformation.objects.filter(
-            business=business if business else None,
-            client=client if client else None,
+            business_id=business_id,
+            client_id=client_id,
             payment_method_type="CARD",
         ).first()
 
@@ -134,17 +141,18 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        stripe.PaymentMethod.attach(
+        stripe_client = get_client()
+        stripe_client.attach_payment_method(
             payment_method_id,
             customer=banking_info.stripe_customer_id,
         )
 
-        stripe.Customer.modify(
+        stripe_client.set_default_payment_method(
             banking_info.stripe_customer_id,
-            invoice_settings={"default_payment_method": payment_method_id},
+            payment_method_id,
         )
 
-        payment_method = stripe.PaymentMethod.retrieve(payment_method_id)
+        payment_method = stripe_client.retrieve_payment_method(payment_method_id)
         card = payment_method.get("card", {})
 
         banking_info.stripe_payment_method_id = payment_method_id
@@ -175,8 +183,7 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
         Create or connect a Stripe Express account for payouts.
         Stripe handles onboarding, bank account, and identity verification.
         """
-        user = request.user
-        business = Business.objects.filter(owner=user).first()
+        business = get_tenant_context(request).get_business()
 
         if not business:
             return Response(
@@ -189,9 +196,14 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
             payment_method_type="BANK_ACCOUNT",
         ).first()
 
+        stripe_client = get_client()
         try:
             if not banking_info or not banking_info.stripe_connected_account_id:
-                connected_account = stripe.Account.create(
+                connected_account = stripe_client.create_account(
+                    idempotency_key=make_idempotency_key(
+                        "connect-account",
+                        business.id,
+                    ),
                     type="express",
                     country=business.country.upper(),
                     email=business.email,
@@ -219,11 +231,11 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
                     banking_info.save(update_fields=["stripe_connected_account_id"])
 
             else:
-                connected_account = stripe.Account.retrieve(
+                connected_account = stripe_client.retrieve_account(
                     banking_info.stripe_connected_account_id
                 )
 
-            account_link = stripe.AccountLink.create(
+            account_link = stripe_client.create_account_link(
                 account=connected_account.id,
                 refresh_url=(f"{settings.FRONTEND_URL}/reauth"),
                 return_url=(f"{settings.FRONTEND_URL}/user/banking"),
@@ -250,8 +262,7 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
         Retrieve and update bank account info from Stripe for the connected
         Express account.
         """
-        user = request.user
-        business = Business.objects.filter(owner=user).first()
+        business = get_tenant_context(request).get_business()
 
         if not business:
             return Response(
@@ -271,7 +282,7 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            connected_account = stripe.Account.retrieve(
+            connected_account = get_client().retrieve_account(
                 banking_info.stripe_connected_account_id,
                 expand=["external_accounts"],
             )
@@ -283,16 +294,11 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND,
                 )
 
-            bank_account = external_accounts[0]
-            banking_info.bank_name = bank_account.bank_name
-            banking_info.account_number_last4 = bank_account.last4
-            banking_info.currency = bank_account.currency
-            banking_info.country = bank_account.country
-            banking_info.account_holder_name = (
-                bank_account.account_holder_name or business.name
+            banking_info.business = business
+            webhooks.update_bank_account_details(
+                banking_info,
+                external_accounts[0],
             )
-            banking_info.account_holder_type = bank_account.account_holder_type
-            banking_info.save()
 
             return Response(
                 {
@@ -308,36 +314,83 @@ class BankingInformationViewSet(viewsets.ModelViewSet):
             )
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(ExportMixin, viewsets.ModelViewSet):
     """ViewSet for managing invoices."""
 
     serializer_class = serializers.InvoiceSerializer
     queryset = Invoice.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     pagination_class = paginations.InvoicePagination
+    export_filename = "invoices"
+    export_columns = [
+        ("Invoice number", "invoice_number"),
+        ("Status", "status"),
+        ("Client", "client__user__name"),
+        ("Client email", "client__user__email"),
+        ("Service", "service__service_name"),
+        ("Billing period start", "billing_period_start"),
+        ("Due date", "due_date"),
+        ("Currency", "currency"),
+        ("Subtotal", "subtotal"),
+        ("Tax rate", "tax_rate"),
+        ("Tax", "tax_amount"),
+        ("Total", "total_amount"),
+        ("Paid at", "paid_at"),
+        ("Created at", "created_at"),
+    ]
 
     def get_queryset(self):
         """Return invoices linked to the logged-in user."""
-        user = self.request.user
+        queryset = self.get_user_invoices()
+        if self.action == "export":
+            return queryset
+        return self.annotate_for_serializer(queryset)
 
-        business = Business.objects.filter(owner=user).first()
-        if business:
+    def get_user_invoices(self):
+        tenant = get_tenant_context(self.request)
+
+        if tenant.business_id:
             return self.queryset.filter(
-                business=business,
+                business_id=tenant.business_id,
                 is_active=True,
             ).order_by("-id")
 
-        client = Client.objects.filter(user=user).first()
-        if client:
+        if tenant.client_id:
             return (
-                self.queryset.filter(client=client, is_active=True)
+                self.queryset.filter(client_id=tenant.client_id, is_active=True)
                 .exclude(status="DRAFT")
                 .order_by("-id")
             )
 
         return self.queryset.none()
 
+    @staticmethod
+    def annotate_for_serializer(queryset):
+        """
+        Load the relations and payment flags InvoiceSerializer reads, so a
+        page of invoices is serialized without per-row queries.
+        """
+        paid_payouts = Payout.objects.filter(
+            invoice=OuterRef("pk"),
+            status="PAID",
+        ).order_by("pk")
+
+        return queryset.select_related(
+            "business",
+            "client__user",
+            "service",
+        ).annotate(
+            has_payment_method=Exists(
+                BankingInformation.objects.filter(
+                    client=OuterRef("client"),
+                    is_active=True,
+                )
+            ),
+            has_paid_payout=Exists(paid_payouts),
+            paid_payout_id=Subquery(paid_payouts.values("pk")[:1]),
+        )
+
     def perform_create(self, serializer):
         """Attach business/client/service properly before saving."""
 
@@ -361,6 +414,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             service=service,
         )
 
+    @transaction.atomic
     def perform_update(self, serializer):
         """Trigger email when invoice is sent."""
 
@@ -415,7 +469,14 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         amount_cents = int(invoice.total_amount * 100)
 
         try:
-            payment_intent = stripe.PaymentIntent.create(
+            # Keyed on the card too, so a retry after a decline with a new
+            # card is a new charge rather than a replay of the failure.
+            payment_intent = get_client().create_payment_intent(
+                idempotency_key=make_idempotency_key(
+                    "invoice-payment",
+                    invoice.id,
+                    client_bank_info.stripe_payment_method_id,
+                ),
                 amount=amount_cents,
                 currency=invoice.currency.lower(),
                 customer=client_bank_info.stripe_customer_id,
@@ -455,24 +516,44 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             return Response({"error": str(e)}, status=500)
 
 
-class PayoutViewSet(viewsets.ModelViewSet):
+class PayoutViewSet(ExportMixin, viewsets.ModelViewSet):
     """ViewSet for managing payouts."""
 
     serializer_class = serializers.PayoutSerializer
-    queryset = Payout.objects.all()
-    authentication_classes = [TokenAuthentication]
+    queryset = Payout.objects.select_related(
+        "business",
+        "invoice__client__user",
+        "invoice__service",
+    )
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     pagination_class = paginations.PayoutPagination
+    export_filename = "payouts"
+    export_columns = [
+        ("Invoice number", "invoice__invoice_number"),
+        ("Client", "invoice__client__user__name"),
+        ("Status", "status"),
+        ("Currency", "currency"),
+        ("Amount", "amount"),
+        ("Payment intent", "stripe_payment_intent_id"),
+        ("Processed at", "processed_at"),
+        ("Refunded", "is_refunded"),
+        ("Refunded amount", "refunded_amount"),
+        ("Refund reason", "refund_reason"),
+        ("Refund id", "stripe_refund_id"),
+        ("Refunded at", "refunded_at"),
+        ("Failure reason", "failure_reason"),
+        ("Created at", "created_at"),
+    ]
 
     def get_queryset(self):
         """Restrict payouts to the user's business."""
 
-        user = self.request.user
-        business = Business.objects.filter(owner=user).first()
+        tenant = get_tenant_context(self.request)
 
-        if business:
+        if tenant.business_id:
             return self.queryset.filter(
-                business=business,
+                business_id=tenant.business_id,
                 is_active=True,
             ).order_by("-id")
         return self.queryset.none()
@@ -512,7 +593,14 @@ class PayoutViewSet(viewsets.ModelViewSet):
             if amount:
                 refund_params["amount"] = int(float(amount) * 100)
 
-            refund = stripe.Refund.create(**refund_params)
+            refund = get_client().create_refund(
+                idempotency_key=make_idempotency_key(
+                    "payout-refund",
+                    payout.id,
+                    refund_params.get("amount", "full"),
+                ),
+                **refund_params,
+            )
 
             payout.is_refunded = True
             payout.refunded_amount = amount or payout.amount
@@ -551,3 +639,89 @@ class PayoutViewSet(viewsets.ModelViewSet):
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class DashboardView(APIView):
+    """Return revenue series and KPI counts for the manager dashboard."""
+
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        business = Business.objects.filter(owner=request.user).first()
+        if not business:
+            return Response(
+                {"detail": "Only business owners can view the dashboard."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        granularity = request.query_params.get("granularity", "month").lower()
+        if granularity not in dashboard.GRANULARITY_CHOICES:
+            return Response(
+                {
+                    "detail": (
+                        "Invalid granularity. Must be one of: "
+                        f"{', '.join(dashboard.GRANULARITY_CHOICES)}."
+                    )
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        periods = request.query_params.get("periods")
+        if periods is not None:
+            try:
+                periods = int(periods)
+            except ValueError:
+                periods = 0
+            if not 1 <= periods <= dashboard.MAX_PERIODS:
+                return Response(
+                    {
+                        "detail": (
+                            "periods must be a number between 1 and "
+                            f"{dashboard.MAX_PERIODS}."
+                        )
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        data = dashboard.get_dashboard_data(
+            business,
+            granularity=granularity,
+            periods=periods,
+        )
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class StripeWebhookView(APIView):
+    """
+    Receive Stripe webhook deliveries.
+
+    The signature is verified and the event stored once; processing happens
+    in the ``process_stripe_events`` worker so Stripe gets a fast 200.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        if not settings.STRIPE_WEBHOOK_SECRET:
+            return Response(
+                {"detail": "Stripe webhooks are not configured."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        payload = request.body
+        try:
+            stripe.Webhook.construct_event(
+                payload,
+                request.META.get("HTTP_STRIPE_SIGNATURE", ""),
+                settings.STRIPE_WEBHOOK_SECRET,
+            )
+        except (ValueError, stripe.SignatureVerificationError):
+            return Response(
+                {"detail": "Invalid Stripe webhook signature."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        webhooks.store_event(json.loads(payload))
+        return Response({"received": True}, status=status.HTTP_200_OK)
@@ -0,0 +1,244 @@
+"""
+Storage and processing of Stripe webhook events.
+"""
+
+import logging
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import BankingInformation, Invoice, Payout, StripeEvent
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+
+
+def store_event(event):
+    """
+    Persist a verified webhook event once, keyed by its Stripe id.
+
+    Uses a single INSERT that ignores duplicates, so Stripe's retries and
+    concurrent deliveries of the same event are harmless.
+    """
+    StripeEvent.objects.bulk_create(
+        [
+            StripeEvent(
+                event_id=event["id"],
+                event_type=event["type"],
+                payload=event,
+                livemode=bool(event.get("livemode")),
+                stripe_created_at=datetime.fromtimestamp(
+                    event["created"],
+                    tz=timezone.utc,
+                ),
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def update_bank_account_details(banking_info, bank_account):
+    """Copy a Stripe external bank account onto ``banking_info``."""
+    banking_info.bank_name = bank_account.get("bank_name")
+    banking_info.account_number_last4 = bank_account.get("last4")
+    banking_info.currency = bank_account.get("currency")
+    banking_info.country = bank_account.get("country")
+    banking_info.account_holder_name = (
+        bank_account.get("account_holder_name") or banking_info.business.name
+    )
+    banking_info.account_holder_type = bank_account.get("account_holder_type")
+    banking_info.save()
+
+
+def _cents(amount):
+    return Decimal(amount) / 100
+
+
+def _payout_for_intent(payment_intent_id):
+    return (
+        Payout.all_objects.select_for_update()
+        .filter(stripe_payment_intent_id=payment_intent_id)
+        .first()
+    )
+
+
+def _invoice_for_intent(intent):
+    invoice_id = (intent.get("metadata") or {}).get("invoice_id")
+    if not invoice_id:
+        return None
+    return (
+        Invoice.all_objects.select_for_update()
+        .filter(pk=invoice_id)
+        .first()
+    )
+
+
+def handle_payment_intent_succeeded(intent):
+    """Mark the invoice paid and make sure a PAID payout records it."""
+    invoice = _invoice_for_intent(intent)
+    if invoice is None:
+        return
+
+    now = timezone.now()
+    if invoice.status != "PAID":
+        invoice.status = "PAID"
+        invoice.paid_at = now
+        invoice.save(update_fields=["status", "paid_at", "updated_at"])
+
+    payout = _payout_for_intent(intent["id"])
+    if payout is None:
+        Payout.objects.create(
+            business_id=invoice.business_id,
+            invoice=invoice,
+            amount=_cents(intent.get("amount_received") or intent["amount"]),
+            currency=intent["currency"].upper(),
+            stripe_payment_intent_id=intent["id"],
+            status="PAID",
+            processed_at=now,
+        )
+    elif payout.status not in ("PAID", "REFUNDED"):
+        payout.status = "PAID"
+        payout.failure_reason = None
+        payout.processed_at = now
+        payout.save(update_fields=["status", "failure_reason", "processed_at"])
+
+
+def handle_payment_intent_failed(intent):
+    """Record why an off-session charge failed."""
+    error = (intent.get("last_payment_error") or {}).get("message")
+    reason = error or "Payment failed."
+
+    payout = _payout_for_intent(intent["id"])
+    if payout is not None:
+        if payout.status != "PAID":
+            payout.status = "FAILED"
+            payout.failure_reason = reason
+            payout.save(update_fields=["status", "failure_reason"])
+        return
+
+    invoice = _invoice_for_intent(intent)
+    if invoice is not None:
+        Payout.objects.create(
+            business_id=invoice.business_id,
+            invoice=invoice,
+            amount=_cents(intent["amount"]),
+            currency=intent["currency"].upper(),
+            stripe_payment_intent_id=intent["id"],
+            status="FAILED",
+            failure_reason=reason,
+            processed_at=timezone.now(),
+        )
+
+
+def handle_charge_refunded(charge):
+    """Mirror a refund made in Stripe onto the payout it belongs to."""
+    payment_intent_id = charge.get("payment_intent")
+    payout = payment_intent_id and _payout_for_intent(payment_intent_id)
+    if not payout:
+        return
+
+    refunds = (charge.get("refunds") or {}).get("data") or []
+    payout.is_refunded = True
+    payout.refunded_amount = _cents(charge["amount_refunded"])
+    payout.refunded_at = payout.refunded_at or timezone.now()
+    payout.status = "REFUNDED"
+    if refunds:
+        payout.stripe_refund_id = refunds[0]["id"]
+    payout.save(
+        update_fields=[
+            "is_refunded",
+            "refunded_amount",
+            "refunded_at",
+            "status",
+            "stripe_refund_id",
+        ]
+    )
+
+
+def handle_account_updated(account):
+    """Refresh the business bank account details of a connected account."""
+    external_accounts = (account.get("external_accounts") or {}).get("data")
+    if not external_accounts:
+        return
+
+    banking_info = (
+        BankingInformation.objects.select_related("business")
+        .filter(
+            stripe_connected_account_id=account["id"],
+            payment_method_type="BANK_ACCOUNT",
+        )
+        .first()
+    )
+    if banking_info is not None:
+        update_bank_account_details(banking_info, external_accounts[0])
+
+
+EVENT_HANDLERS = {
+    "payment_intent.succeeded": handle_payment_intent_succeeded,
+    "payment_intent.payment_failed": handle_payment_intent_failed,
+    "charge.refunded": handle_charge_refunded,
+    "account.updated": handle_account_updated,
+}
+
+
+def _apply_event(event):
+    """Apply a locked event and record the outcome; returns its summary key."""
+    handler = EVENT_HANDLERS.get(event.event_type)
+    event.attempts += 1
+    try:
+        with transaction.atomic():
+            if handler is not None:
+                handler(event.payload["data"]["object"])
+    except Exception as exc:
+        event.last_error = f"{type(exc).__name__}: {exc}"
+        if event.attempts >= MAX_ATTEMPTS:
+            event.status = "FAILED"
+            logger.error(
+                "Stripe event %s failed permanently: %s",
+                event.event_id,
+                event.last_error,
+            )
+        event.save(update_fields=["status", "attempts", "last_error"])
+        return "failed" if event.status == "FAILED" else "retried"
+
+    event.status = "PROCESSED" if handler is not None else "IGNORED"
+    event.processed_at = timezone.now()
+    event.last_error = ""
+    event.save(update_fields=["status", "attempts", "last_error", "processed_at"])
+    return "processed" if handler is not None else "ignored"
+
+
+def process_stripe_events(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Apply one batch of pending events in the order Stripe created them.
+
+    Each event is locked, re-checked and applied in its own transaction,
+    so overlapping runs never apply the same event twice. Failures are
+    retried on later batches and marked FAILED after MAX_ATTEMPTS. Returns
+    a ``{"processed", "ignored", "retried", "failed"}`` summary.
+    """
+    summary = {"processed": 0, "ignored": 0, "retried": 0, "failed": 0}
+    pending_ids = list(
+        StripeEvent.objects.filter(status="PENDING")
+        .order_by("stripe_created_at", "id")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+
+    for pk in pending_ids:
+        with transaction.atomic():
+            # Another worker holds the event or has already applied it.
+            event = (
+                StripeEvent.objects.select_for_update(skip_locked=True)
+                .filter(pk=pk, status="PENDING")
+                .first()
+            )
+            if event is None:
+                continue
+            summary[_apply_event(event)] += 1
+
+    return summary
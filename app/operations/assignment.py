@@ -0,0 +1,219 @@
+"""
+Workload-balanced assignment of unassigned jobs to team members.
+
+Each member's existing load is read with one aggregate query (open jobs
+per member and local day). Jobs are then assigned greedily in schedule
+order: members whose expertise or duties share a word with the job are
+preferred, and among candidates the one with the fewest jobs that day,
+then overall, wins. A per-day heap keeps each pick O(log members).
+"""
+
+import heapq
+import re
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.models import Job, TeamMember
+from core.utils import get_timezone
+
+
+OPEN_JOB_STATUSES = ("PENDING", "IN_PROGRESS")
+DEFAULT_MAX_JOBS_PER_DAY = 8
+ASSIGN_BATCH_SIZE = 500
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"and", "for", "the", "with", "all", "any", "job", "jobs", "service"}
+
+
+def skill_tokens(*texts):
+    """Return the lowercase words of ``texts`` worth matching on."""
+    tokens = set()
+    for text in texts:
+        tokens.update(
+            word
+            for word in _WORD_RE.findall((text or "").lower())
+            if len(word) > 2 and word not in _STOPWORDS
+        )
+    return tokens
+
+
+class WorkloadBalancer:
+    """
+    Pick the least loaded suitable member for a job on a given day.
+
+    ``members`` maps member ids to skill tokens and ``loads`` maps
+    ``(member_id, day)`` to the number of open jobs already scheduled.
+    Members at ``max_jobs_per_day`` are not given more work that day.
+    """
+
+    def __init__(self, members, loads, max_jobs_per_day=DEFAULT_MAX_JOBS_PER_DAY):
+        self.member_ids = sorted(members)
+        self.max_jobs_per_day = max_jobs_per_day
+        self.day_loads = defaultdict(int, loads)
+        self.total_loads = defaultdict(int)
+        for (member_id, _), count in loads.items():
+            self.total_loads[member_id] += count
+        self.skill_index = defaultdict(list)
+        for member_id in self.member_ids:
+            for token in members[member_id]:
+                self.skill_index[token].append(member_id)
+        self._heaps = {}
+
+    def _key(self, member_id, day):
+        return (
+            self.day_loads[(member_id, day)],
+            self.total_loads[member_id],
+            member_id,
+        )
+
+    def _least_loaded(self, day):
+        """Return the least loaded member with room on ``day``, or None."""
+        heap = self._heaps.get(day)
+        if heap is None:
+            heap = [self._key(member_id, day) for member_id in self.member_ids]
+            heapq.heapify(heap)
+            self._heaps[day] = heap
+        # Loads only grow, so a stale entry is re-pushed with its current key.
+        while heap:
+            entry = heap[0]
+            if entry[0] >= self.max_jobs_per_day:
+                return None
+            current = self._key(entry[2], day)
+            if entry == current:
+                return entry[2]
+            heapq.heapreplace(heap, current)
+        return None
+
+    def pick(self, day, tokens=()):
+        """Assign one job on ``day`` and return the chosen member id."""
+        skilled = {
+            member_id
+            for token in tokens
+            for member_id in self.skill_index.get(token, ())
+        }
+        candidates = [
+            self._key(member_id, day)
+            for member_id in skilled
+            if self.day_loads[(member_id, day)] < self.max_jobs_per_day
+        ]
+        member_id = min(candidates)[2] if candidates else self._least_loaded(day)
+        if member_id is None:
+            return None
+
+        self.day_loads[(member_id, day)] += 1
+        self.total_loads[member_id] += 1
+        if day in self._heaps:
+            heapq.heappush(self._heaps[day], self._key(member_id, day))
+        return member_id
+
+
+def _existing_loads(business, tz, first_day, last_day):
+    """Return ``{(member_id, day): open jobs}`` in one aggregate query."""
+    start = tz.localize(datetime.combine(first_day, time.min))
+    end = tz.localize(datetime.combine(last_day + timedelta(days=1), time.min))
+    rows = (
+        Job.objects.filter(
+            assigned_to__business=business,
+            status__in=OPEN_JOB_STATUSES,
+            scheduled_date__gte=start,
+            scheduled_date__lt=end,
+        )
+        .annotate(day=TruncDate("scheduled_date", tzinfo=tz))
+        .order_by()
+        .values_list("assigned_to_id", "day")
+        .annotate(count=Count("id"))
+    )
+    return {(member_id, day): count for member_id, day, count in rows}
+
+
+def auto_assign_jobs(
+    business,
+    job_ids=None,
+    max_jobs_per_day=DEFAULT_MAX_JOBS_PER_DAY,
+    dry_run=False,
+):
+    """
+    Assign the business's unassigned PENDING jobs to active team members.
+
+    Without ``job_ids`` every upcoming unassigned job is considered. Jobs
+    are locked while they are assigned, so concurrent runs skip each
+    other's rows. Returns a summary with the assignments made and the jobs
+    left unassigned because every member was at capacity.
+    """
+    tz = get_timezone(business.timezone)
+    with transaction.atomic():
+        jobs = Job.objects.filter(
+            service__business=business,
+            assigned_to__isnull=True,
+            status="PENDING",
+        )
+        if job_ids is not None:
+            jobs = jobs.filter(pk__in=job_ids)
+        else:
+            jobs = jobs.filter(scheduled_date__gte=timezone.now())
+        jobs = list(
+            jobs.select_for_update(skip_locked=True, of=("self",))
+            .select_related("service")
+            .only(
+                "id",
+                "title",
+                "description",
+                "scheduled_date",
+                "service__service_name",
+            )
+            .order_by("scheduled_date", "id")
+        )
+        summary = {
+            "dry_run": dry_run,
+            "assigned": 0,
+            "assignments": [],
+            "unassigned": [],
+        }
+        members = {
+            member_id: skill_tokens(expertise, job_duties)
+            for member_id, expertise, job_duties in TeamMember.objects.filter(
+                business=business,
+                is_active=True,
+                employee__is_active=True,
+            ).values_list("id", "expertise", "job_duties")
+        }
+        if not jobs or not members:
+            summary["unassigned"] = [job.id for job in jobs]
+            return summary
+
+        days = [timezone.localtime(job.scheduled_date, tz).date() for job in jobs]
+        balancer = WorkloadBalancer(
+            members,
+            _existing_loads(business, tz, days[0], days[-1]),
+            max_jobs_per_day,
+        )
+        now = timezone.now()
+        assigned = []
+        for job, day in zip(jobs, days):
+            member_id = balancer.pick(
+                day,
+                skill_tokens(job.title, job.description, job.service.service_name),
+            )
+            if member_id is None:
+                summary["unassigned"].append(job.id)
+                continue
+            job.assigned_to_id = member_id
+            job.updated_at = now
+            assigned.append(job)
+            summary["assignments"].append(
+                {"job": job.id, "assigned_to": member_id}
+            )
+
+        if not dry_run:
+            Job.objects.bulk_update(
+                assigned,
+                ["assigned_to", "updated_at"],
+                batch_size=ASSIGN_BATCH_SIZE,
+            )
+        summary["assigned"] = len(assigned)
+    return summary
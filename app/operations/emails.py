@@ -1,11 +1,11 @@
-from django.core.mail import send_mail
 from django.conf import settings
 
+from core.models import EmailOutbox
 from user.utils import generate_magic_login_token
 
 
 def send_quote_email(quote):
-    """Send quotation email to client."""
+    """Queue quotation email to client."""
     magic_token = generate_magic_login_token(quote.service.client.user)
     sign_link = f"{settings.FRONTEND_URL}/user/business/quote/sign/{quote.id}/?token={magic_token}"
 
@@ -22,17 +22,15 @@ def send_quote_email(quote):
         f"Thank you,\n{quote.service.business.name} Team"
     )
 
-    send_mail(
+    EmailOutbox.objects.enqueue(
         subject,
         message,
-        settings.DEFAULT_FROM_EMAIL,
         [quote.service.client.user.email],
-        fail_silently=False,
     )
 
 
 def send_service_questionnaire_email(service, questionnaire, magic_token=None):
-    """Send email to client with questionnaire magic link (no login required)."""
+    """Queue email to client with questionnaire magic link (no login required)."""
     if not magic_token:
         magic_token = generate_magic_login_token(service.client.user)
 
@@ -53,10 +51,8 @@ def send_service_questionnaire_email(service, questionnaire, magic_token=None):
         f"The {service.business.name} Team"
     )
 
-    send_mail(
+    EmailOutbox.objects.enqueue(
         subject,
         message,
-        settings.DEFAULT_FROM_EMAIL,
         [service.client.user.email],
-        fail_silently=False,
     )
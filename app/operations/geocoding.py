@@ -0,0 +1,99 @@
+"""
+Geocode cache for service addresses.
+
+Coordinates are looked up offline by the ``geocode_services`` command
+through the geocoder named in ``settings.GEOCODER``, never on the request
+path. The default ``NullGeocoder`` resolves nothing, so coordinates only
+appear once a real geocoder is configured or they are set through the API;
+until then services are left unattempted rather than stamped as misses.
+"""
+
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import Service
+
+
+DEFAULT_BATCH_SIZE = 100
+ADDRESS_FIELDS = (
+    "street_address",
+    "city",
+    "province_state",
+    "postal_code",
+    "country",
+)
+COORDINATE_PLACES = Decimal("0.000001")
+
+
+class NullGeocoder:
+    """Geocoder that knows no addresses."""
+
+    def geocode(self, address):
+        """Return ``(latitude, longitude)`` for ``address``, or None."""
+        return None
+
+
+def get_geocoder():
+    """Return the process-wide geocoder configured by ``GEOCODER``."""
+    return _load_geocoder(settings.GEOCODER)
+
+
+@lru_cache(maxsize=None)
+def _load_geocoder(path):
+    return import_string(path)()
+
+
+def format_address(service):
+    """Return the one-line address a geocoder is asked about."""
+    return ", ".join(
+        value
+        for value in (getattr(service, field) for field in ADDRESS_FIELDS)
+        if value
+    )
+
+
+def geocode_services(batch_size=DEFAULT_BATCH_SIZE, geocoder=None):
+    """
+    Geocode one batch of services never attempted since their address last
+    changed. Misses are stamped too, so they are not retried every run.
+    Nothing is attempted with the ``NullGeocoder``.
+
+    Returns a ``{"geocoded", "missed"}`` summary.
+    """
+    geocoder = geocoder or get_geocoder()
+    summary = {"geocoded": 0, "missed": 0}
+    if isinstance(geocoder, NullGeocoder):
+        return summary
+    services = list(
+        Service.objects.filter(latitude__isnull=True, geocoded_at__isnull=True)
+        .only("id", *ADDRESS_FIELDS)
+        .order_by("id")[:batch_size]
+    )
+    now = timezone.now()
+    for service in services:
+        location = geocoder.geocode(format_address(service))
+        service.geocoded_at = now
+        if location is None:
+            summary["missed"] += 1
+        else:
+            service.latitude, service.longitude = (
+                Decimal(str(value)).quantize(COORDINATE_PLACES) for value in location
+            )
+            summary["geocoded"] += 1
+    Service.objects.bulk_update(services, ["latitude", "longitude", "geocoded_at"])
+    return summary
+
+
+def reset_missed_geocodes():
+    """
+    Clear the stamp of every address that was looked up but not found, so
+    the next run tries it again. Returns how many services were reset.
+    """
+    return Service.objects.filter(
+        latitude__isnull=True,
+        geocoded_at__isnull=False,
+    ).update(geocoded_at=None)
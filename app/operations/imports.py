@@ -0,0 +1,211 @@
+"""
+Bulk import of clients from CSV or JSON rows.
+
+Rows are validated in Python, existing users are resolved with one
+``email__in`` query, and missing users and clients are inserted with
+``bulk_create``. The whole import runs in one transaction, so 5,000 rows
+cost a handful of queries instead of several per client.
+"""
+
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from core.models import Client, soft_delete_changed
+from core.tenancy import invalidate_tenant_context
+
+
+CLIENT_IMPORT_MAX_ROWS = 10000
+CLIENT_IMPORT_BATCH_SIZE = 1000
+CLIENT_IMPORT_FIELDS = ("name", "email", "phone")
+
+
+class ClientImportError(Exception):
+    """Raised when an import payload cannot be read at all."""
+
+
+def read_client_rows(data=None, file=None):
+    """
+    Return import rows as dicts from an uploaded CSV ``file`` or a list of
+    JSON objects in ``data``.
+
+    CSV headers are matched case-insensitively; unknown columns are ignored.
+    """
+    if file is not None:
+        try:
+            text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+            reader = csv.DictReader(text)
+            reader.fieldnames = [
+                (name or "").strip().lower() for name in reader.fieldnames or []
+            ]
+            rows = list(reader)
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise ClientImportError(f"Could not read CSV file: {exc}")
+        if not set(CLIENT_IMPORT_FIELDS[:2]) <= set(reader.fieldnames):
+            raise ClientImportError(
+                "CSV file must have name and email columns."
+            )
+    else:
+        rows = data
+        if not isinstance(rows, list) or not all(
+            isinstance(row, dict) for row in rows
+        ):
+            raise ClientImportError("Rows must be a list of objects.")
+
+    if not rows:
+        raise ClientImportError("No rows to import.")
+    if len(rows) > CLIENT_IMPORT_MAX_ROWS:
+        raise ClientImportError(
+            f"At most {CLIENT_IMPORT_MAX_ROWS} rows can be imported at once."
+        )
+    return rows
+
+
+def _clean_row(row, user_model):
+    """Return ``(values, errors)`` for one raw import row."""
+    values = {
+        field: str(row.get(field) or "").strip() for field in CLIENT_IMPORT_FIELDS
+    }
+    values["email"] = user_model.objects.normalize_email(values["email"])
+    errors = {}
+    for field in CLIENT_IMPORT_FIELDS:
+        max_length = user_model._meta.get_field(field).max_length
+        if len(values[field]) > max_length:
+            errors[field] = f"Ensure this field has no more than {max_length} characters."
+    if not values["name"]:
+        errors["name"] = "This field is required."
+    if not values["email"]:
+        errors["email"] = "This field is required."
+    elif "email" not in errors:
+        try:
+            validate_email(values["email"])
+        except ValidationError:
+            errors["email"] = "Enter a valid email address."
+    return values, errors
+
+
+def import_clients(business, rows):
+    """
+    Create users and clients of ``business`` for every valid row.
+
+    Existing users are linked rather than updated, and soft-deleted clients
+    of the business are restored. Returns a summary with one result per
+    input row, in order, whose status is ``created``, ``restored``,
+    ``existing`` or ``invalid``.
+    """
+    user_model = get_user_model()
+    results = []
+    valid = {}
+    for number, row in enumerate(rows, start=1):
+        values, errors = _clean_row(row, user_model)
+        if not errors and values["email"] in valid:
+            errors["email"] = "Duplicate of an earlier row."
+        result = {"row": number, "email": values["email"], "status": "invalid"}
+        if errors:
+            result["errors"] = errors
+        else:
+            valid[values["email"]] = (values, result)
+        results.append(result)
+
+    summary = {
+        "total": len(rows),
+        "users_created": 0,
+        "clients_created": 0,
+        "clients_restored": 0,
+        "existing": 0,
+        "invalid": len(rows) - len(valid),
+        "results": results,
+    }
+    if not valid:
+        return summary
+
+    with transaction.atomic():
+        user_ids = dict(
+            user_model.objects.filter(email__in=valid).values_list("email", "id")
+        )
+        new_users = [
+            user_model(
+                email=email,
+                name=values["name"],
+                phone=values["phone"],
+                role="CLIENT",
+                password=make_password(None),
+            )
+            for email, (values, _) in valid.items()
+            if email not in user_ids
+        ]
+        if new_users:
+            user_model.objects.bulk_create(
+                new_users,
+                batch_size=CLIENT_IMPORT_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts leaves primary keys unset, so read them back.
+            # Each unusable password is random, so it tells the rows this
+            # call inserted from ones a concurrent request created.
+            passwords = {user.email: user.password for user in new_users}
+            new_emails = set()
+            for email, user_id, password in user_model.objects.filter(
+                email__in=passwords
+            ).values_list("email", "id", "password"):
+                user_ids[email] = user_id
+                if password == passwords[email]:
+                    new_emails.add(email)
+            summary["users_created"] = len(new_emails)
+        else:
+            new_emails = set()
+
+        # Soft-deleted clients still hold the (business, user) pair.
+        existing = dict(
+            Client.all_objects.filter(
+                business=business,
+                user_id__in=user_ids.values(),
+            ).values_list("user_id", "is_deleted")
+        )
+        clients = []
+        restored_user_ids = []
+        for email, (_, result) in valid.items():
+            result["user_created"] = email in new_emails
+            user_id = user_ids[email]
+            if existing.get(user_id):
+                result["status"] = "restored"
+                restored_user_ids.append(user_id)
+            elif user_id in existing:
+                result["status"] = "existing"
+                summary["existing"] += 1
+            else:
+                result["status"] = "created"
+                clients.append(Client(business=business, user_id=user_id))
+
+        if restored_user_ids:
+            # Only the client row: its services stay as they were left.
+            restored_ids = list(
+                Client.all_objects.filter(
+                    business=business,
+                    user_id__in=restored_user_ids,
+                    is_deleted=True,
+                ).values_list("pk", flat=True)
+            )
+            summary["clients_restored"] = Client.all_objects.filter(
+                pk__in=restored_ids,
+            ).update(is_deleted=False, deleted_by=None, deleted_at=None)
+            soft_delete_changed.send(
+                sender=Client,
+                pks=restored_ids,
+                is_deleted=False,
+            )
+        Client.objects.bulk_create(
+            clients,
+            batch_size=CLIENT_IMPORT_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        summary["clients_created"] = len(clients)
+        # bulk_create sends no post_save, so drop cached scopes here.
+        invalidate_tenant_context(*(client.user_id for client in clients))
+
+    return summary
@@ -0,0 +1,49 @@
+"""
+Django command to fill the geocode cache of service addresses.
+"""
+from django.core.management.base import BaseCommand
+
+from operations.geocoding import (
+    DEFAULT_BATCH_SIZE,
+    geocode_services,
+    reset_missed_geocodes,
+)
+
+
+class Command(BaseCommand):
+    """Geocode every service whose address has not been looked up yet."""
+
+    help = "Store latitude/longitude for service addresses via GEOCODER."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Services to geocode per batch.",
+        )
+        parser.add_argument(
+            "--retry-missed",
+            action="store_true",
+            help="Look up again addresses earlier runs could not find.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        totals = {"geocoded": 0, "missed": 0}
+        if options["retry_missed"]:
+            reset_missed_geocodes()
+        while True:
+            summary = geocode_services(batch_size=options["batch_size"])
+            for key, value in summary.items():
+                totals[key] += value
+            if not any(summary.values()):
+                break
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Services geocoded: {geocoded}, not found: {missed}".format(
+                    **totals
+                )
+            )
+        )
@@ -0,0 +1,77 @@
+"""
+Django command to normalize job photos and build their renditions.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from operations.photos import DEFAULT_BATCH_SIZE, process_job_photos
+
+
+class Command(BaseCommand):
+    """Render pending job photos in a pool of worker processes."""
+
+    help = "Create thumbnail and medium renditions for uploaded job photos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Photos to claim per batch.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Image processes to run; 0 renders in this process.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait when no photos are pending.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no photos are pending instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        batch_size = options["batch_size"]
+        totals = {"ready": 0, "retried": 0, "failed": 0}
+        executor = (
+            ProcessPoolExecutor(max_workers=options["workers"])
+            if options["workers"]
+            else None
+        )
+
+        try:
+            while True:
+                summary = process_job_photos(
+                    batch_size=batch_size,
+                    executor=executor,
+                )
+                for key, value in summary.items():
+                    totals[key] += value
+
+                if any(summary.values()):
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Photos processed: {ready}, retried: {retried}, "
+                "failed: {failed}".format(**totals)
+            )
+        )
@@ -0,0 +1,226 @@
+"""
+Normalization and renditions for uploaded job photos.
+
+Uploads are stored as received and marked PENDING. The
+``process_job_photos`` worker then replaces each original with an
+orientation-corrected, metadata-free JPEG capped at ``MAX_DIMENSION`` and
+adds WebP thumbnail and medium renditions, so list views never download
+camera originals.
+"""
+
+import logging
+import os
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.models import JobPhoto
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 20
+MAX_ATTEMPTS = 3
+RETRY_DELAY = timedelta(minutes=5)
+CLAIM_LEASE = timedelta(minutes=10)
+
+MAX_DIMENSION = 2560
+ORIGINAL_QUALITY = 85
+# rendition name: (longest side in pixels, WebP quality)
+RENDITIONS = {
+    "thumbnail": (320, 75),
+    "medium": (1024, 80),
+}
+
+
+def _to_rgb(image):
+    """Flatten transparency onto white so the image can be saved as JPEG."""
+    if image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    ):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    return image
+
+
+def _encode(image, fmt, quality):
+    buffer = BytesIO()
+    image.save(buffer, format=fmt, quality=quality, optimize=fmt == "JPEG")
+    return buffer.getvalue()
+
+
+def render_photo(data):
+    """
+    Return ``{name: (bytes, (width, height))}`` for the normalized original
+    and every rendition of the image in ``data``.
+
+    Works on bytes only, so it can run in a separate worker process.
+    Re-encoding without ``exif``/``icc_profile`` drops all metadata,
+    including GPS coordinates from employees' phones.
+    """
+    with Image.open(BytesIO(data)) as image:
+        # Let the JPEG decoder downscale by DCT scaling instead of decoding
+        # every pixel of a 12 MP photo.
+        image.draft("RGB", (MAX_DIMENSION, MAX_DIMENSION))
+        image = _to_rgb(ImageOps.exif_transpose(image))
+
+    image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.LANCZOS)
+    results = {
+        "original": (_encode(image, "JPEG", ORIGINAL_QUALITY), image.size),
+    }
+    for name, (size, quality) in RENDITIONS.items():
+        rendition = image.copy()
+        rendition.thumbnail((size, size), Image.LANCZOS)
+        results[name] = (_encode(rendition, "WEBP", quality), rendition.size)
+    return results
+
+
+def _read(photo):
+    with photo.photo.open("rb") as file:
+        return file.read()
+
+
+def _render_all(photos, executor):
+    """Yield ``(photo, renditions, error)`` rendering in ``executor``."""
+    if executor is None:
+        for photo in photos:
+            try:
+                yield photo, render_photo(_read(photo)), None
+            except Exception as exc:
+                yield photo, None, exc
+        return
+
+    futures = []
+    for photo in photos:
+        try:
+            futures.append((photo, executor.submit(render_photo, _read(photo))))
+        except Exception as exc:
+            futures.append((photo, exc))
+    for photo, future in futures:
+        if isinstance(future, Exception):
+            yield photo, None, future
+            continue
+        try:
+            yield photo, future.result(), None
+        except Exception as exc:
+            yield photo, None, exc
+
+
+def photo_files(photo):
+    """Return ``(storage, name)`` of every stored file of ``photo``."""
+    return [
+        (file.storage, file.name)
+        for file in (photo.photo, photo.thumbnail, photo.medium)
+        if file
+    ]
+
+
+def delete_files(files):
+    """Delete ``(storage, name)`` pairs, e.g. after a photo was replaced."""
+    for storage, name in files:
+        storage.delete(name)
+
+
+def _save_renditions(photo, renditions):
+    """
+    Store the renditions and mark the photo READY. Returns False, leaving
+    the row alone, if the photo was replaced while it was being rendered.
+    """
+    old_name = photo.photo.name
+    stem = os.path.splitext(os.path.basename(old_name))[0]
+
+    content, (photo.width, photo.height) = renditions["original"]
+    photo.photo.save(f"{stem}.jpg", ContentFile(content), save=False)
+    for name in RENDITIONS:
+        content, (width, height) = renditions[name]
+        getattr(photo, name).save(
+            f"{stem}_{name}.webp",
+            ContentFile(content),
+            save=False,
+        )
+        setattr(photo, f"{name}_width", width)
+        setattr(photo, f"{name}_height", height)
+
+    photo.processing_status = "READY"
+    photo.processing_error = ""
+    photo.processed_at = timezone.now()
+    fields = [
+        "width",
+        "height",
+        "thumbnail_width",
+        "thumbnail_height",
+        "medium_width",
+        "medium_height",
+        "processing_status",
+        "processing_attempts",
+        "processing_error",
+        "processed_at",
+    ]
+    updated = JobPhoto.all_objects.filter(pk=photo.pk, photo=old_name).update(
+        photo=photo.photo.name,
+        thumbnail=photo.thumbnail.name,
+        medium=photo.medium.name,
+        **{field: getattr(photo, field) for field in fields},
+    )
+    if not updated:
+        delete_files(photo_files(photo))
+        return False
+    if old_name != photo.photo.name:
+        photo.photo.storage.delete(old_name)
+    return True
+
+
+def _record_failure(photo, exc):
+    """Schedule a retry or mark the photo FAILED, unless it was replaced."""
+    photo.processing_error = f"{type(exc).__name__}: {exc}"
+    if photo.processing_attempts >= MAX_ATTEMPTS:
+        photo.processing_status = "FAILED"
+        logger.error(
+            "Job photo %s could not be processed: %s",
+            photo.id,
+            photo.processing_error,
+        )
+    else:
+        photo.next_attempt_at = timezone.now() + RETRY_DELAY
+    JobPhoto.all_objects.filter(pk=photo.pk, photo=photo.photo.name).update(
+        processing_status=photo.processing_status,
+        processing_attempts=photo.processing_attempts,
+        processing_error=photo.processing_error,
+        next_attempt_at=photo.next_attempt_at,
+    )
+
+
+def process_job_photos(batch_size=DEFAULT_BATCH_SIZE, executor=None):
+    """
+    Render one claimed batch of pending photos.
+
+    Image work runs in ``executor`` (a process pool in the worker) or
+    inline when it is None; storage and database writes stay in the
+    calling thread. Returns a ``{"ready", "retried", "failed"}`` summary.
+    """
+    summary = {"ready": 0, "retried": 0, "failed": 0}
+    batch = JobPhoto.objects.claim_for_processing(batch_size, CLAIM_LEASE)
+
+    for photo, renditions, error in _render_all(batch, executor):
+        photo.processing_attempts += 1
+        if error is None:
+            try:
+                if not _save_renditions(photo, renditions):
+                    # Replaced while rendering; the new upload is pending.
+                    continue
+            except Exception as exc:
+                error = exc
+        if error is not None:
+            _record_failure(photo, error)
+            summary["failed" if photo.processing_status == "FAILED" else "retried"] += 1
+            continue
+        summary["ready"] += 1
+
+    return summary
@@ -0,0 +1,211 @@
+"""
+Compiled service questionnaires.
+
+``ServiceQuestionnaire.additional_questions_form`` is a list of questions
+(or ``{"questions": [...]}``) as built by the questionnaire editor::
+
+    {"text": "Room size", "type": "input", "inputType": "number",
+     "required": true}
+    {"text": "Floor", "type": "checkbox-single", "options": ["Oak", "Tile"]}
+
+Answers in ``Service.filled_questionnaire`` are keyed by question text.
+``compile_questionnaire`` turns a form into a ``QuestionnaireValidator``
+once; the per-question checks are plain closures, so validating a payload
+is a single pass with no form interpretation. Compiled validators are
+cached per questionnaire id and ``updated_at``.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+
+QUESTION_TYPES = ("input", "checkbox-single", "checkbox-multiple")
+INPUT_TYPES = ("text", "number")
+DEFAULT_MAX_LENGTH = 1000
+COMPILED_CACHE_SIZE = 512
+
+# The questionnaire form sends "-" for optional questions left blank.
+BLANK_ANSWERS = (None, "", "-")
+
+
+class QuestionnaireError(ValueError):
+    """Raised when a questionnaire form is malformed."""
+
+
+def question_list(form):
+    """Return the list of questions in ``form``, accepting both shapes."""
+    if isinstance(form, dict):
+        form = form.get("questions")
+    return form if isinstance(form, list) else []
+
+
+def _is_blank(value):
+    return value in BLANK_ANSWERS or value == []
+
+
+def _text_check(max_length):
+    def check(value):
+        if not isinstance(value, str):
+            return "Enter text."
+        if len(value) > max_length:
+            return f"Ensure this answer has no more than {max_length} characters."
+        return None
+    return check
+
+
+def _number_check(value):
+    if isinstance(value, bool):
+        return "Enter a number."
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return "Enter a number."
+    elif not isinstance(value, (int, float)):
+        return "Enter a number."
+    if not math.isfinite(value):
+        return "Enter a number."
+    return None
+
+
+def _single_choice_check(options):
+    def check(value):
+        if not isinstance(value, str) or value not in options:
+            return "Select one of the available options."
+        return None
+    return check
+
+
+def _multiple_choice_check(options):
+    def check(value):
+        if not isinstance(value, list):
+            return "Select a list of options."
+        for item in value:
+            if not isinstance(item, str) or item not in options:
+                return f"{item!r} is not one of the available options."
+        return None
+    return check
+
+
+def _compile_question(index, question):
+    where = f"Question {index + 1}"
+    if not isinstance(question, dict):
+        raise QuestionnaireError(f"{where} must be an object.")
+    text = question.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise QuestionnaireError(f"{where} needs text.")
+    question_type = question.get("type") or "input"
+    if question_type not in QUESTION_TYPES:
+        raise QuestionnaireError(f"{where} has unknown type {question_type!r}.")
+
+    if question_type == "input":
+        input_type = question.get("inputType") or "text"
+        if input_type not in INPUT_TYPES:
+            raise QuestionnaireError(
+                f"{where} has unknown input type {input_type!r}."
+            )
+        if input_type == "number":
+            check = _number_check
+        else:
+            max_length = question.get("maxLength", DEFAULT_MAX_LENGTH)
+            if (
+                isinstance(max_length, bool)
+                or not isinstance(max_length, int)
+                or max_length < 1
+            ):
+                raise QuestionnaireError(
+                    f"{where} maxLength must be a positive integer."
+                )
+            check = _text_check(max_length)
+    else:
+        options = question.get("options")
+        if (
+            not isinstance(options, list)
+            or not options
+            or not all(isinstance(option, str) for option in options)
+        ):
+            raise QuestionnaireError(f"{where} needs a list of text options.")
+        options = frozenset(options)
+        if question_type == "checkbox-single":
+            check = _single_choice_check(options)
+        else:
+            check = _multiple_choice_check(options)
+
+    return text, bool(question.get("required")), check
+
+
+class QuestionnaireValidator:
+    """Checks answer payloads against one compiled questionnaire."""
+
+    __slots__ = ("questions", "texts")
+
+    def __init__(self, questions):
+        self.questions = tuple(questions)
+        self.texts = frozenset(text for text, _, _ in self.questions)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def validate(self, answers):
+        """
+        Return ``{question text: message}`` for every invalid answer in
+        ``answers``; an empty dict means the payload is valid.
+        """
+        if not isinstance(answers, dict):
+            return {"non_field_errors": "Answers must be an object keyed by question."}
+        errors = {}
+        for text, required, check in self.questions:
+            value = answers.get(text)
+            if _is_blank(value):
+                if required:
+                    errors[text] = "This question is required."
+                continue
+            message = check(value)
+            if message is not None:
+                errors[text] = message
+        for text in answers.keys() - self.texts:
+            errors[text] = "Not a question in this questionnaire."
+        return errors
+
+
+def compile_questionnaire(form):
+    """Compile a questionnaire form, raising ``QuestionnaireError`` if malformed."""
+    if isinstance(form, dict):
+        form = form.get("questions")
+    if not isinstance(form, list):
+        raise QuestionnaireError("Questionnaire must be a list of questions.")
+    questions = [
+        _compile_question(index, question) for index, question in enumerate(form)
+    ]
+    seen = set()
+    for text, _, _ in questions:
+        if text in seen:
+            raise QuestionnaireError(f"Question {text!r} appears more than once.")
+        seen.add(text)
+    return QuestionnaireValidator(questions)
+
+
+_compiled = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def get_questionnaire_validator(questionnaire):
+    """
+    Return the compiled validator for a ``ServiceQuestionnaire``, compiling
+    it on first use. ``additional_questions_form`` is only read on a cache
+    miss, so callers may load the row with ``only("id", "updated_at")``.
+    """
+    key = (questionnaire.pk, questionnaire.updated_at)
+    with _compiled_lock:
+        validator = _compiled.get(key)
+        if validator is not None:
+            _compiled.move_to_end(key)
+            return validator
+
+    validator = compile_questionnaire(questionnaire.additional_questions_form)
+    with _compiled_lock:
+        _compiled[key] = validator
+        while len(_compiled) > COMPILED_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return validator
@@ -0,0 +1,96 @@
+"""
+Stop ordering for a technician's day.
+
+A great-circle distance matrix is computed once, then a nearest-neighbour
+tour is improved with 2-opt until no segment reversal shortens it. Routes
+are open paths that start at the first stop: there is no depot to return
+to. Plain lists keep this dependency-free; 50 stops take a few
+milliseconds.
+"""
+
+import math
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def distance_matrix(points):
+    """Return pairwise haversine distances in km between (lat, lon) points."""
+    radians = [(math.radians(lat), math.radians(lon)) for lat, lon in points]
+    cosines = [math.cos(lat) for lat, _ in radians]
+    size = len(points)
+    matrix = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        lat1, lon1 = radians[i]
+        row = matrix[i]
+        for j in range(i + 1, size):
+            lat2, lon2 = radians[j]
+            a = (
+                math.sin((lat2 - lat1) / 2) ** 2
+                + cosines[i] * cosines[j] * math.sin((lon2 - lon1) / 2) ** 2
+            )
+            distance = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+            row[j] = matrix[j][i] = distance
+    return matrix
+
+
+def path_length(order, matrix):
+    """Return the length of the open path visiting ``order``."""
+    return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+
+def nearest_neighbour(matrix, start=0):
+    """Return a path from ``start`` always moving to the closest unvisited stop."""
+    unvisited = set(range(len(matrix))) - {start}
+    order = [start]
+    while unvisited:
+        row = matrix[order[-1]]
+        closest = min(unvisited, key=row.__getitem__)
+        unvisited.remove(closest)
+        order.append(closest)
+    return order
+
+
+def two_opt(order, matrix):
+    """
+    Reverse path segments while that shortens the path; the first stop
+    stays fixed. Returns a new list.
+    """
+    order = list(order)
+    size = len(order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, size - 1):
+            a, b = order[i - 1], order[i]
+            row_a, row_b = matrix[a], matrix[b]
+            for j in range(i + 1, size):
+                c = order[j]
+                # Reversing order[i..j] swaps edges a-b and c-d for a-c and
+                # b-d; at the end of an open path there is no d.
+                if j + 1 < size:
+                    d = order[j + 1]
+                    delta = row_a[c] + row_b[d] - row_a[b] - matrix[c][d]
+                else:
+                    delta = row_a[c] - row_a[b]
+                if delta < -1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    b = order[i]
+                    row_b = matrix[b]
+                    improved = True
+    return order
+
+
+def plan_route(points):
+    """
+    Return ``(order, legs)`` for ``points``, starting from the first one.
+
+    ``order`` lists indexes into ``points`` and ``legs`` the distance in km
+    from the previous stop (0 for the first).
+    """
+    if not points:
+        return [], []
+    matrix = distance_matrix(points)
+    order = two_opt(nearest_neighbour(matrix), matrix)
+    legs = [0.0] + [matrix[a][b] for a, b in zip(order, order[1:])]
+    return order, legs
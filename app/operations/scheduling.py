@@ -0,0 +1,82 @@
+"""
+Recurring job schedules expanded in memory and inserted in bulk.
+
+Occurrences follow a small subset of RFC 5545 RRULEs (FREQ, INTERVAL,
+COUNT, UNTIL). They are computed on the business's local wall clock, so a
+9:00 weekly visit stays at 9:00 across daylight saving changes.
+"""
+
+from datetime import datetime, timedelta
+
+from django.db import transaction
+
+from core.models import Job
+from core.utils import add_months, get_timezone
+
+
+SCHEDULE_FREQUENCY_CHOICES = [
+    ("DAILY", "Daily"),
+    ("WEEKLY", "Weekly"),
+    ("MONTHLY", "Monthly"),
+]
+MAX_OCCURRENCES = 366
+MAX_SCHEDULED_JOBS = 100000
+SCHEDULE_BATCH_SIZE = 2000
+
+
+def occurrence_day(start_date, frequency, interval, index):
+    """Return the local date of occurrence number ``index`` (from 0)."""
+    if frequency == "MONTHLY":
+        return add_months(start_date, index * interval)
+    step = 7 if frequency == "WEEKLY" else 1
+    return start_date + timedelta(days=index * interval * step)
+
+
+def expand_occurrences(
+    start_date,
+    start_time,
+    tz_name,
+    frequency,
+    interval=1,
+    count=None,
+    until=None,
+):
+    """
+    Return the aware datetimes of a recurrence, oldest first.
+
+    Stops after ``count`` occurrences or on the last one on or before the
+    ``until`` date, and never returns more than ``MAX_OCCURRENCES``. Monthly
+    rules anchored on the 29th-31st fall on the last day of short months.
+    """
+    tz = get_timezone(tz_name)
+    limit = min(count or MAX_OCCURRENCES, MAX_OCCURRENCES)
+    occurrences = []
+    for index in range(limit):
+        day = occurrence_day(start_date, frequency, interval, index)
+        if until is not None and day > until:
+            break
+        occurrences.append(tz.localize(datetime.combine(day, start_time)))
+    return occurrences
+
+
+def schedule_jobs(services, occurrences_for, assigned_to=None, title="", description=""):
+    """
+    Create one PENDING job per service and occurrence in one transaction.
+
+    ``occurrences_for(service)`` returns the datetimes for a service, whose
+    business (and so timezone) must already be loaded. Returns the created
+    jobs.
+    """
+    jobs = [
+        Job(
+            service=service,
+            assigned_to=assigned_to,
+            title=title or service.service_name,
+            description=description or None,
+            scheduled_date=scheduled_date,
+        )
+        for service in services
+        for scheduled_date in occurrences_for(service)
+    ]
+    with transaction.atomic():
+        return Job.objects.bulk_create(jobs, batch_size=SCHEDULE_BATCH_SIZE)
@@ -4,6 +4,7 @@ Serializers for business APIs
 
 import json
 from core.utils import BusinessTimezoneMixin
+from django.conf import settings
 from django.utils.html import strip_tags
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema_field
@@ -21,6 +22,21 @@ from core.models import (
     Service,
     TeamMember,
 )
+from operations.assignment import DEFAULT_MAX_JOBS_PER_DAY
+from operations.geocoding import ADDRESS_FIELDS
+from operations.questionnaires import (
+    QuestionnaireError,
+    compile_questionnaire,
+    get_questionnaire_validator,
+    question_list,
+)
+from operations.scheduling import (
+    MAX_OCCURRENCES,
+    MAX_SCHEDULED_JOBS,
+    SCHEDULE_FREQUENCY_CHOICES,
+    expand_occurrences,
+    occurrence_day,
+)
 
 
 class BusinessSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
@@ -40,8 +56,7 @@ class BusinessSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
     @extend_schema_field(serializers.ListField(child=serializers.CharField()))
     def get_services_offered(self, obj):
         """Return a list of tag names for services_offered."""
-        return list(obj.services_offered.names()) \
-            if obj.services_offered else []
+        return list(obj.services_offered_names)
 
     def create(self, validated_data):
         tags = self.initial_data.get('services_offered')
@@ -123,8 +138,11 @@ class ClientSerializer(serializers.ModelSerializer):
         """
         Return client's active payment method details if available.
         """
-        banking_info = obj.banking_information.filter(is_active=True) \
-            .order_by('-created_at').first()
+        if hasattr(obj, 'active_banking_information'):
+            banking_info = next(iter(obj.active_banking_information), None)
+        else:
+            banking_info = obj.banking_information.filter(is_active=True) \
+                .order_by('-created_at').first()
 
         if not banking_info or banking_info.payment_method_type != "CARD":
             return "-"
@@ -180,6 +198,40 @@ class TeamMemberSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class ServiceTemplateLookup:
+    """
+    Lazily load active questionnaires and terms templates for the
+    businesses returned by ``get_business_ids`` into
+    ``(business_id, service_name)`` maps, so serializing many services
+    does not query per row.
+    """
+
+    def __init__(self, get_business_ids):
+        self.get_business_ids = get_business_ids
+        self._questionnaires = None
+        self._terms_templates = None
+
+    def _build_map(self, model):
+        lookup = {}
+        records = model.objects.filter(
+            business_id__in=self.get_business_ids(),
+            is_active=True,
+        ).order_by('id')
+        for record in records:
+            lookup.setdefault((record.business_id, record.service_name), record)
+        return lookup
+
+    def questionnaire(self, business_id, service_name):
+        if self._questionnaires is None:
+            self._questionnaires = self._build_map(ServiceQuestionnaire)
+        return self._questionnaires.get((business_id, service_name))
+
+    def terms_template(self, business_id, service_name):
+        if self._terms_templates is None:
+            self._terms_templates = self._build_map(ServiceTermsTemplate)
+        return self._terms_templates.get((business_id, service_name))
+
+
 class ServiceSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
     """Serializer for services with optimized validation."""
     quotations = serializers.SerializerMethodField()
@@ -201,22 +253,39 @@ class ServiceSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
             "price", "currency", "billing_cycle", "status", "tax_rate",
             "auto_generate_quote", "auto_generate_invoices",
             "street_address", "city", "country", "province_state",
-            "postal_code", "created_at", "updated_at",
+            "postal_code", "latitude", "longitude", "created_at", "updated_at",
         ]
         read_only_fields = ["created_at", "updated_at"]
 
     def get_quotations(self, obj):
         """Return related active quotes."""
+        if hasattr(obj, "active_quotes"):
+            return [
+                {
+                    "id": quote.id,
+                    "quote_number": quote.quote_number,
+                    "status": quote.status,
+                    "valid_until": quote.valid_until,
+                    "created_at": quote.created_at,
+                }
+                for quote in obj.active_quotes
+            ]
         return list(obj.service_quotes.filter(is_active=True).values(
             "id", "quote_number", "status", "valid_until", "created_at"
         ))
 
     def get_service_questionnaires(self, obj):
         """Return the active questionnaire for this service if exists."""
-        questionnaire = obj.business.service_questionnaires.filter(
-            service_name=obj.service_name,
-            is_active=True
-        ).first()
+        lookup = self.context.get("service_templates")
+        if lookup is not None:
+            questionnaire = lookup.questionnaire(
+                obj.business_id, obj.service_name
+            )
+        else:
+            questionnaire = obj.business.service_questionnaires.filter(
+                service_name=obj.service_name,
+                is_active=True
+            ).first()
         if questionnaire:
             return {
                 "id": questionnaire.id,
@@ -230,10 +299,14 @@ class ServiceSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
 
     def get_service_terms_template(self, obj):
         """Return the active general terms template for this service if exists."""
-        template = obj.business.service_terms_templates.filter(
-            service_name=obj.service_name,
-            is_active=True,
-        ).first()
+        lookup = self.context.get("service_templates")
+        if lookup is not None:
+            template = lookup.terms_template(obj.business_id, obj.service_name)
+        else:
+            template = obj.business.service_terms_templates.filter(
+                service_name=obj.service_name,
+                is_active=True,
+            ).first()
         if template:
             return {
                 "id": template.id,
@@ -241,12 +314,23 @@ class ServiceSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
             }
         return {}
 
+    def _validate_answers(self, questionnaire, answers):
+        """Return per-question errors for ``answers``."""
+        try:
+            validator = get_questionnaire_validator(questionnaire)
+        except QuestionnaireError:
+            # Forms saved before questionnaires were validated may not
+            # compile; accept answers to those as before.
+            return {}
+        return validator.validate(answers)
+
     def validate(self, data):
         """
         Validates:
         - client belongs to business
         - service_name is offered by business
         - questionnaire existence on creation
+        - submitted answers match the active questionnaire
         - cannot activate until questionnaire is filled
         - no duplicate address for same service_name within a business
         """
@@ -263,10 +347,7 @@ class ServiceSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
         errors = {}
 
         if business and service_name:
-            allowed_services = {
-                s.name for s in business.services_offered.all()
-            }
-            if service_name not in allowed_services:
+            if service_name not in business.services_offered_names:
                 errors["service_name"] = (
                     "This service is not offered by the selected business."
                 )
@@ -325,15 +406,31 @@ class ServiceSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
                     "has filled out the questionnaire."
                 )
 
-            if is_submitting_questionnaire:
-                has_questionnaire = business.service_questionnaires.filter(
-                    service_name=service_name,
-                    is_active=True,
-                ).exists()
-                if not has_questionnaire:
-                    errors["filled_questionnaire"] = (
-                        "No active questionnaire found for this service."
+            submitted_answers = data.get("filled_questionnaire")
+            if submitted_answers:
+                # The form is only loaded when its compiled validator is
+                # not cached yet.
+                questionnaire = (
+                    business.service_questionnaires.filter(
+                        service_name=service_name,
+                        is_active=True,
                     )
+                    .only("id", "updated_at")
+                    .first()
+                )
+                if questionnaire is None:
+                    if is_submitting_questionnaire:
+                        errors["filled_questionnaire"] = (
+                            "No active questionnaire found for this service."
+                        )
+                else:
+                    answer_errors = self._validate_answers(
+                        questionnaire, submitted_answers
+                    )
+                    if answer_errors:
+                        errors["filled_questionnaire"] = answer_errors
+
+            if is_submitting_questionnaire:
 
                 will_auto_generate_quote = data.get(
                     "auto_generate_quote",
@@ -404,9 +501,21 @@ class ServiceSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
                     "exists for this client."
                 )
 
+        if ("latitude" in data) != ("longitude" in data):
+            errors["latitude"] = "Set latitude and longitude together."
+
         if errors:
             raise serializers.ValidationError(errors)
 
+        # Manual coordinates count as geocoded; a new address clears them.
+        if "latitude" in data:
+            data["geocoded_at"] = timezone.now()
+        elif self.instance and any(
+            field in data and data[field] != getattr(self.instance, field)
+            for field in ADDRESS_FIELDS
+        ):
+            data.update(latitude=None, longitude=None, geocoded_at=None)
+
         return data
 
 
@@ -569,12 +678,17 @@ class ServiceQuestionnaireSerializer(serializers.ModelSerializer):
 
     def get_no_of_questions(self, obj):
         """Return the count of questions in the questionnaire."""
-        if (
-            obj.additional_questions_form and
-            isinstance(obj.additional_questions_form, list)
-        ):
-            return len(obj.additional_questions_form)
-        return 0
+        return len(question_list(obj.additional_questions_form))
+
+    def validate_additional_questions_form(self, value):
+        """Reject forms that cannot be compiled into a validator."""
+        if value is None:
+            return value
+        try:
+            compile_questionnaire(value)
+        except QuestionnaireError as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
 
 
 class JobSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
@@ -627,7 +741,7 @@ class JobSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
 
         if assigned_to and service:
             # Validate that assigned team member belongs to same business
-            if assigned_to.business != service.business:
+            if assigned_to.business_id != service.business_id:
                 errors["assigned_to"] = (
                     "Assigned team member must belong to the same "
                     "business as the service."
@@ -639,7 +753,160 @@ class JobSerializer(BusinessTimezoneMixin, serializers.ModelSerializer):
         return data
 
 
+class JobScheduleSerializer(serializers.Serializer):
+    """Validate a recurring schedule of jobs for one or more services."""
+
+    services = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+    )
+    assigned_to = serializers.PrimaryKeyRelatedField(
+        queryset=TeamMember.objects.filter(is_active=True),
+        required=False,
+        allow_null=True,
+    )
+    title = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    description = serializers.CharField(required=False, allow_blank=True)
+    start_date = serializers.DateField()
+    start_time = serializers.TimeField(
+        help_text="Wall-clock time in the business timezone."
+    )
+    frequency = serializers.ChoiceField(choices=SCHEDULE_FREQUENCY_CHOICES)
+    interval = serializers.IntegerField(min_value=1, default=1)
+    count = serializers.IntegerField(
+        min_value=1,
+        max_value=MAX_OCCURRENCES,
+        required=False,
+    )
+    until = serializers.DateField(required=False)
+
+    def validate(self, data):
+        """
+        Resolve every service in one query from the ``service_queryset``
+        context and check the assignee and schedule size once.
+        """
+        if ("count" in data) == ("until" in data):
+            raise serializers.ValidationError(
+                "Provide exactly one of count or until."
+            )
+        if "until" in data and data["until"] < data["start_date"]:
+            raise serializers.ValidationError(
+                {"until": "Must be on or after start_date."}
+            )
+        if "until" in data and occurrence_day(
+            data["start_date"],
+            data["frequency"],
+            data["interval"],
+            MAX_OCCURRENCES,
+        ) <= data["until"]:
+            raise serializers.ValidationError(
+                {
+                    "until": (
+                        f"At most {MAX_OCCURRENCES} occurrences can be "
+                        "scheduled; choose an earlier date."
+                    )
+                }
+            )
+
+        service_ids = set(data["services"])
+        services = list(
+            self.context["service_queryset"]
+            .filter(pk__in=service_ids)
+            .select_related("business")
+            .order_by("pk")
+        )
+        missing = service_ids - {service.pk for service in services}
+        if missing:
+            raise serializers.ValidationError(
+                {"services": f"Unknown services: {sorted(missing)}."}
+            )
+
+        assigned_to = data.get("assigned_to")
+        if assigned_to and any(
+            service.business_id != assigned_to.business_id for service in services
+        ):
+            raise serializers.ValidationError(
+                {
+                    "assigned_to": (
+                        "Assigned team member must belong to the same "
+                        "business as every service."
+                    )
+                }
+            )
+
+        per_service = len(
+            expand_occurrences(
+                data["start_date"],
+                data["start_time"],
+                "UTC",
+                data["frequency"],
+                data["interval"],
+                data.get("count"),
+                data.get("until"),
+            )
+        )
+        if per_service * len(services) > MAX_SCHEDULED_JOBS:
+            raise serializers.ValidationError(
+                f"At most {MAX_SCHEDULED_JOBS} jobs can be scheduled at once."
+            )
+
+        data["services"] = services
+        return data
+
+
+class JobAutoAssignSerializer(serializers.Serializer):
+    """Options for balancing unassigned jobs across team members."""
+
+    jobs = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        help_text="Jobs to assign; defaults to every upcoming unassigned job.",
+    )
+    max_jobs_per_day = serializers.IntegerField(
+        min_value=1,
+        default=DEFAULT_MAX_JOBS_PER_DAY,
+    )
+    dry_run = serializers.BooleanField(default=False)
+
+
+class JobPhotoRenditionSerializer(serializers.Serializer):
+    """Schema for one resized copy of a job photo."""
+
+    url = serializers.CharField()
+    width = serializers.IntegerField()
+    height = serializers.IntegerField()
+
+
 class JobPhotoSerializer(serializers.ModelSerializer):
+    renditions = serializers.SerializerMethodField()
+
+    def validate_photo(self, photo):
+        max_size = settings.JOB_PHOTO_MAX_UPLOAD_SIZE
+        if photo.size > max_size:
+            raise serializers.ValidationError(
+                f"Photos must be {max_size // (1024 * 1024)} MB or smaller."
+            )
+        return photo
+
+    @extend_schema_field(
+        serializers.DictField(child=JobPhotoRenditionSerializer())
+    )
+    def get_renditions(self, obj):
+        """Return thumbnail and medium URLs once the photo is processed."""
+        if obj.processing_status != "READY":
+            return None
+
+        request = self.context.get("request")
+        renditions = {}
+        for name in ("thumbnail", "medium"):
+            url = getattr(obj, name).url
+            renditions[name] = {
+                "url": request.build_absolute_uri(url) if request else url,
+                "width": getattr(obj, f"{name}_width"),
+                "height": getattr(obj, f"{name}_height"),
+            }
+        return renditions
+
     def validate(self, attrs):
         job = attrs.get("job") or getattr(self.instance, "job", None)
         photo_type = (
@@ -675,6 +942,15 @@ class JobPhotoSerializer(serializers.ModelSerializer):
             "job",
             "photo",
             "photo_type",
+            "width",
+            "height",
+            "processing_status",
+            "renditions",
+            "uploaded_at",
+        ]
+        read_only_fields = [
+            "width",
+            "height",
+            "processing_status",
             "uploaded_at",
         ]
-        read_only_fields = ["uploaded_at"]
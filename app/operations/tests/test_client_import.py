@@ -0,0 +1,195 @@
+"""Tests for the bulk client import endpoint."""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Client
+from operations.tests.test_operations_api import create_business
+
+
+CLIENT_IMPORT_URL = reverse("operations:client-bulk-import")
+
+
+class ClientImportTests(TestCase):
+    """Test importing clients in bulk."""
+
+    def setUp(self):
+        self.manager = get_user_model().objects.create_user(
+            "import-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.business = create_business(owner=self.manager)
+        self.api = APIClient()
+        self.api.force_authenticate(self.manager)
+
+    def test_json_rows_create_users_and_clients(self):
+        """Test new and existing users both become clients."""
+        existing = get_user_model().objects.create_user(
+            "known@example.com",
+            "test123",
+            name="Known",
+            role="CLIENT",
+        )
+        rows = [
+            {"name": "Ada", "email": "ada@EXAMPLE.com", "phone": "555-0100"},
+            {"name": "Other name", "email": "known@example.com"},
+        ]
+
+        res = self.api.post(CLIENT_IMPORT_URL, {"rows": rows}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["users_created"], 1)
+        self.assertEqual(res.data["clients_created"], 2)
+        self.assertEqual(
+            [(r["email"], r["status"], r["user_created"]) for r in res.data["results"]],
+            [
+                ("ada@example.com", "created", True),
+                ("known@example.com", "created", False),
+            ],
+        )
+        ada = get_user_model().objects.get(email="ada@example.com")
+        self.assertEqual((ada.name, ada.phone, ada.role), ("Ada", "555-0100", "CLIENT"))
+        self.assertFalse(ada.has_usable_password())
+        existing.refresh_from_db()
+        self.assertEqual(existing.name, "Known")
+        self.assertEqual(
+            Client.objects.filter(business=self.business).count(),
+            2,
+        )
+
+    def test_invalid_duplicate_and_existing_rows_reported(self):
+        """Test bad rows are reported without blocking valid ones."""
+        user = get_user_model().objects.create_user("client@example.com", "x")
+        Client.objects.create(business=self.business, user=user)
+        rows = [
+            {"name": "", "email": "not-an-email"},
+            {"name": "Client", "email": "client@example.com"},
+            {"name": "New", "email": "new@example.com"},
+            {"name": "New again", "email": "new@example.com"},
+        ]
+
+        res = self.api.post(CLIENT_IMPORT_URL, rows, format="json")
+
+        results = res.data["results"]
+        self.assertEqual(
+            [r["status"] for r in results],
+            ["invalid", "existing", "created", "invalid"],
+        )
+        self.assertEqual(set(results[0]["errors"]), {"name", "email"})
+        self.assertIn("Duplicate", results[3]["errors"]["email"])
+        self.assertEqual(res.data["invalid"], 2)
+        self.assertEqual(res.data["existing"], 1)
+        self.assertEqual(res.data["clients_created"], 1)
+
+    def test_soft_deleted_client_restored(self):
+        """Test importing a deleted client brings it back and says so."""
+        user = get_user_model().objects.create_user("gone@example.com", "x")
+        client = Client.objects.create(business=self.business, user=user)
+        client.soft_delete(user=self.manager)
+
+        res = self.api.post(
+            CLIENT_IMPORT_URL,
+            [{"name": "Gone", "email": "gone@example.com"}],
+            format="json",
+        )
+
+        self.assertEqual(res.data["results"][0]["status"], "restored")
+        self.assertEqual(res.data["clients_restored"], 1)
+        self.assertEqual(res.data["existing"], 0)
+        self.assertTrue(Client.objects.filter(pk=client.pk).exists())
+
+    def test_users_created_elsewhere_not_counted(self):
+        """Test users inserted by a concurrent import are not counted."""
+        user_model = get_user_model()
+        bulk_create = user_model.objects.bulk_create
+
+        def race_then_insert(users, **kwargs):
+            user_model.objects.create_user("raced@example.com", "x")
+            return bulk_create(users, **kwargs)
+
+        with patch.object(
+            user_model.objects,
+            "bulk_create",
+            side_effect=race_then_insert,
+        ):
+            res = self.api.post(
+                CLIENT_IMPORT_URL,
+                [
+                    {"name": "Raced", "email": "raced@example.com"},
+                    {"name": "Mine", "email": "mine@example.com"},
+                ],
+                format="json",
+            )
+
+        self.assertEqual(res.data["users_created"], 1)
+        self.assertEqual(
+            [r["user_created"] for r in res.data["results"]],
+            [False, True],
+        )
+        self.assertEqual(res.data["clients_created"], 2)
+
+    def test_csv_upload(self):
+        """Test a CSV file with a BOM and mixed-case headers is imported."""
+        content = "﻿Name,EMAIL,Phone\nCsv Client,csv@example.com,555\n"
+        upload = SimpleUploadedFile(
+            "clients.csv",
+            content.encode("utf-8"),
+            content_type="text/csv",
+        )
+
+        res = self.api.post(CLIENT_IMPORT_URL, {"file": upload}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["clients_created"], 1)
+        self.assertTrue(
+            Client.objects.filter(
+                business=self.business,
+                user__email="csv@example.com",
+                user__phone="555",
+            ).exists()
+        )
+
+    def test_csv_without_email_column_rejected(self):
+        """Test a CSV missing required columns returns 400."""
+        upload = SimpleUploadedFile("clients.csv", b"name\nNo Email\n")
+
+        res = self.api.post(CLIENT_IMPORT_URL, {"file": upload}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Test the import runs the same queries for 5 or 50 rows."""
+        counts = []
+        for prefix, size in (("small", 5), ("large", 50)):
+            rows = [
+                {"name": f"Client {i}", "email": f"{prefix}{i}@example.com"}
+                for i in range(size)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                res = self.api.post(CLIENT_IMPORT_URL, rows, format="json")
+            self.assertEqual(res.data["clients_created"], size)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_requires_business_owner(self):
+        """Test users without a business cannot import."""
+        employee = get_user_model().objects.create_user(
+            "import-employee@example.com",
+            "test123",
+            role="EMPLOYEE",
+        )
+        self.api.force_authenticate(employee)
+
+        res = self.api.post(CLIENT_IMPORT_URL, [{"name": "A"}], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,249 @@
+"""Tests for geocoding and technician day plans."""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytz
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Client, Job, Service, TeamMember
+from operations.routing import (
+    distance_matrix,
+    nearest_neighbour,
+    path_length,
+    plan_route,
+    two_opt,
+)
+from operations.tests.test_operations_api import create_business, service_detail_url
+
+
+DAY_PLAN_URL = reverse("operations:job-day-plan")
+
+# Stops along a line, listed out of order.
+LINE = [(51.0, -114.00), (51.0, -113.90), (51.0, -113.97), (51.0, -113.93)]
+
+
+class KnownAddressGeocoder:
+    """Geocoder that only knows addresses on Test Street."""
+
+    def geocode(self, address):
+        if "Test Street" in address:
+            return (51.044733, -114.071883)
+        return None
+
+
+class RoutingTests(TestCase):
+    """Test the route heuristics."""
+
+    def test_distance_matrix_is_symmetric_km(self):
+        """Test distances are great-circle kilometres."""
+        matrix = distance_matrix([(51.0, -114.0), (52.0, -114.0)])
+
+        self.assertAlmostEqual(matrix[0][1], 111.2, places=1)
+        self.assertEqual(matrix[0][1], matrix[1][0])
+        self.assertEqual(matrix[0][0], 0.0)
+
+    def test_two_opt_removes_crossing(self):
+        """Test 2-opt untangles a path that doubles back."""
+        matrix = distance_matrix(LINE)
+        tangled = [0, 1, 2, 3]
+
+        improved = two_opt(tangled, matrix)
+
+        self.assertEqual(improved, [0, 2, 3, 1])
+        self.assertLess(path_length(improved, matrix), path_length(tangled, matrix))
+
+    def test_plan_route_starts_at_first_stop(self):
+        """Test routes keep the first stop and report leg distances."""
+        order, legs = plan_route(LINE)
+
+        self.assertEqual(order, [0, 2, 3, 1])
+        self.assertEqual(legs[0], 0.0)
+        self.assertAlmostEqual(sum(legs), 7.0, places=0)
+        self.assertEqual(nearest_neighbour(distance_matrix(LINE)), order)
+
+    def test_plan_route_empty(self):
+        """Test an empty day has an empty route."""
+        self.assertEqual(plan_route([]), ([], []))
+
+
+class DayPlanTests(TestCase):
+    """Test the day-plan action and the geocode cache."""
+
+    def setUp(self):
+        self.manager = get_user_model().objects.create_user(
+            "plan-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.business = create_business(
+            owner=self.manager,
+            timezone="America/Edmonton",
+        )
+        self.business.services_offered.add("Lawn mowing")
+        self.client_record = Client.objects.create(
+            business=self.business,
+            user=get_user_model().objects.create_user(
+                "plan-client@example.com",
+                "test123",
+                role="CLIENT",
+            ),
+        )
+        self.employee = get_user_model().objects.create_user(
+            "plan-employee@example.com",
+            "test123",
+            role="EMPLOYEE",
+        )
+        self.member = TeamMember.objects.create(
+            business=self.business,
+            employee=self.employee,
+        )
+        self.day = date(2026, 5, 4)
+        self.api = APIClient()
+
+    def create_job(self, hour, location=None, **params):
+        latitude, longitude = location or (None, None)
+        service = Service.objects.create(
+            client=self.client_record,
+            business=self.business,
+            service_name="Lawn mowing",
+            start_date=self.day,
+            service_type="ONE_TIME",
+            price=Decimal("50.00"),
+            street_address=f"{hour} Test Street",
+            city="Calgary",
+            province_state="AB",
+            postal_code="T2T2T2",
+            latitude=latitude,
+            longitude=longitude,
+        )
+        scheduled = pytz.timezone("America/Edmonton").localize(
+            datetime.combine(self.day, datetime.min.time()) + timedelta(hours=hour)
+        )
+        return Job.objects.create(
+            service=service,
+            assigned_to=self.member,
+            title=f"Visit {hour}",
+            scheduled_date=scheduled,
+            **params,
+        )
+
+    def test_employee_day_is_ordered_by_route(self):
+        """Test an employee's jobs come back in driving order."""
+        jobs = [self.create_job(8 + index, point) for index, point in enumerate(LINE)]
+        unlocated = self.create_job(7)
+        self.create_job(13, LINE[0], status="COMPLETED")
+        self.create_job(25, LINE[0])  # 1:00 the next day
+        self.api.force_authenticate(self.employee)
+
+        res = self.api.get(DAY_PLAN_URL, {"date": self.day.isoformat()})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [stop["id"] for stop in res.data["jobs"]],
+            [jobs[0].id, jobs[2].id, jobs[3].id, jobs[1].id, unlocated.id],
+        )
+        self.assertEqual(res.data["unlocated"], [unlocated.id])
+        self.assertEqual(res.data["jobs"][0]["distance_from_previous_km"], 0.0)
+        self.assertIsNone(res.data["jobs"][-1]["distance_from_previous_km"])
+        self.assertAlmostEqual(res.data["total_distance_km"], 7.0, places=0)
+
+    def test_manager_must_name_team_member(self):
+        """Test managers pick whose day to plan."""
+        self.create_job(9, LINE[0])
+        self.api.force_authenticate(self.manager)
+
+        missing = self.api.get(DAY_PLAN_URL)
+        res = self.api.get(
+            DAY_PLAN_URL,
+            {"team_member": self.member.id, "date": self.day.isoformat()},
+        )
+
+        self.assertEqual(missing.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data["jobs"]), 1)
+
+    def test_other_business_member_not_found(self):
+        """Test managers cannot plan another business's technicians."""
+        other_manager = get_user_model().objects.create_user(
+            "plan-other@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.api.force_authenticate(other_manager)
+
+        res = self.api.get(DAY_PLAN_URL, {"team_member": self.member.id})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(GEOCODER="operations.tests.test_day_plan.KnownAddressGeocoder")
+    def test_geocode_command_fills_cache(self):
+        """Test the command stores hits and stamps misses."""
+        found = self.create_job(9).service
+        missed = self.create_job(10).service
+        Service.objects.filter(pk=missed.pk).update(street_address="1 Nowhere Road")
+        out = StringIO()
+
+        call_command("geocode_services", stdout=out)
+
+        found.refresh_from_db()
+        missed.refresh_from_db()
+        self.assertEqual(found.latitude, Decimal("51.044733"))
+        self.assertIsNotNone(missed.geocoded_at)
+        self.assertIsNone(missed.latitude)
+        self.assertIn("Services geocoded: 1, not found: 1", out.getvalue())
+
+    def test_null_geocoder_does_not_stamp_misses(self):
+        """Test services stay unattempted until a geocoder is configured."""
+        service = self.create_job(9).service
+
+        call_command("geocode_services", stdout=StringIO())
+
+        service.refresh_from_db()
+        self.assertIsNone(service.geocoded_at)
+
+    @override_settings(GEOCODER="operations.tests.test_day_plan.KnownAddressGeocoder")
+    def test_geocode_command_retries_misses(self):
+        """Test --retry-missed looks up stamped misses again."""
+        service = self.create_job(9).service
+        Service.objects.filter(pk=service.pk).update(geocoded_at=datetime.now(pytz.utc))
+
+        call_command("geocode_services", stdout=StringIO())
+        service.refresh_from_db()
+        self.assertIsNone(service.latitude)
+
+        call_command("geocode_services", "--retry-missed", stdout=StringIO())
+        service.refresh_from_db()
+        self.assertEqual(service.latitude, Decimal("51.044733"))
+
+    def test_day_window_follows_dst_change(self):
+        """Test the day ends at local midnight on a 23-hour day."""
+        self.day = date(2026, 3, 8)  # Clocks go forward in Edmonton.
+        late = self.create_job(23, LINE[0])
+        self.create_job(24, LINE[1])  # Midnight, the next day.
+        self.api.force_authenticate(self.employee)
+
+        res = self.api.get(DAY_PLAN_URL, {"date": self.day.isoformat()})
+
+        self.assertEqual([stop["id"] for stop in res.data["jobs"]], [late.id])
+
+    def test_address_change_clears_coordinates(self):
+        """Test editing the address drops the cached coordinates."""
+        service = self.create_job(9, LINE[0]).service
+        self.api.force_authenticate(self.manager)
+
+        res = self.api.patch(
+            service_detail_url(service.id),
+            {"street_address": "99 Moved Avenue"},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        service.refresh_from_db()
+        self.assertIsNone(service.latitude)
+        self.assertIsNone(service.geocoded_at)
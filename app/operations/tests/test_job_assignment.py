@@ -0,0 +1,194 @@
+"""Tests for workload-balanced job assignment."""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytz
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Client, Job, Service, TeamMember
+from operations.assignment import WorkloadBalancer, skill_tokens
+from operations.tests.test_operations_api import create_business
+
+
+AUTO_ASSIGN_URL = reverse("operations:job-auto-assign")
+
+
+class WorkloadBalancerTests(TestCase):
+    """Test the in-memory assignment strategy."""
+
+    day = date(2026, 3, 2)
+
+    def test_least_loaded_member_wins(self):
+        """Test work goes to whoever has the fewest jobs that day."""
+        balancer = WorkloadBalancer(
+            {1: set(), 2: set(), 3: set()},
+            {(1, self.day): 2, (2, self.day): 0, (3, self.day): 1},
+        )
+
+        picks = [balancer.pick(self.day) for _ in range(4)]
+
+        self.assertEqual(picks, [2, 2, 3, 1])
+
+    def test_total_load_breaks_ties(self):
+        """Test equal day loads fall back to the overall load."""
+        other_day = self.day + timedelta(days=1)
+        balancer = WorkloadBalancer({1: set(), 2: set()}, {(1, other_day): 3})
+
+        self.assertEqual(balancer.pick(self.day), 2)
+
+    def test_skilled_members_preferred(self):
+        """Test members sharing a skill word get the job first."""
+        balancer = WorkloadBalancer(
+            {1: skill_tokens("Window washing"), 2: skill_tokens("Lawn care")},
+            {(2, self.day): 5},
+        )
+
+        self.assertEqual(balancer.pick(self.day, skill_tokens("Lawn mowing")), 2)
+
+    def test_capacity_respected(self):
+        """Test nobody is given more than the daily maximum."""
+        balancer = WorkloadBalancer(
+            {1: skill_tokens("lawn"), 2: set()},
+            {},
+            max_jobs_per_day=1,
+        )
+        tokens = skill_tokens("lawn")
+
+        picks = [balancer.pick(self.day, tokens) for _ in range(3)]
+
+        self.assertEqual(picks, [1, 2, None])
+
+
+class AutoAssignApiTests(TestCase):
+    """Test the auto-assign action on jobs."""
+
+    def setUp(self):
+        self.manager = get_user_model().objects.create_user(
+            "assign-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.business = create_business(
+            owner=self.manager,
+            timezone="America/Toronto",
+        )
+        client = Client.objects.create(
+            business=self.business,
+            user=get_user_model().objects.create_user(
+                "assign-client@example.com",
+                "test123",
+                role="CLIENT",
+            ),
+        )
+        self.service = Service.objects.create(
+            client=client,
+            business=self.business,
+            service_name="Lawn mowing",
+            start_date=date.today(),
+            service_type="ONE_TIME",
+            price=Decimal("50.00"),
+            street_address="1 Assign Road",
+            city="Toronto",
+            province_state="ON",
+            postal_code="M5V2T6",
+        )
+        self.landscaper = self.create_member("landscaper", expertise="Lawn care")
+        self.cleaner = self.create_member("cleaner", expertise="Deep cleaning")
+        self.visit_time = pytz.timezone("America/Toronto").localize(
+            datetime.combine(timezone.localdate() + timedelta(days=3), datetime.min.time())
+            + timedelta(hours=10)
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.manager)
+
+    def create_member(self, name, **params):
+        return TeamMember.objects.create(
+            business=self.business,
+            employee=get_user_model().objects.create_user(
+                f"{name}@example.com",
+                "test123",
+                role="EMPLOYEE",
+            ),
+            **params,
+        )
+
+    def create_job(self, title="Visit", assigned_to=None, **params):
+        return Job.objects.create(
+            service=self.service,
+            assigned_to=assigned_to,
+            title=title,
+            scheduled_date=params.pop("scheduled_date", self.visit_time),
+            **params,
+        )
+
+    def test_jobs_balanced_by_skill_and_load(self):
+        """Test skilled members are used until they are at capacity."""
+        jobs = [self.create_job() for _ in range(3)]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.api.post(
+                AUTO_ASSIGN_URL,
+                {"max_jobs_per_day": 2},
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["assigned"], 3)
+        self.assertLess(len(queries), 10)
+        assignees = [
+            Job.objects.get(pk=job.pk).assigned_to_id for job in jobs
+        ]
+        self.assertEqual(
+            assignees,
+            [self.landscaper.id, self.landscaper.id, self.cleaner.id],
+        )
+
+    def test_existing_load_counted(self):
+        """Test open jobs already assigned count toward a member's load."""
+        Service.objects.filter(pk=self.service.pk).update(service_name="Gutters")
+        for _ in range(2):
+            self.create_job(assigned_to=self.landscaper)
+        self.create_job(assigned_to=self.cleaner, status="COMPLETED")
+        job = self.create_job(title="Cleanup")
+
+        res = self.api.post(AUTO_ASSIGN_URL, {"jobs": [job.id]}, format="json")
+
+        self.assertEqual(
+            res.data["assignments"],
+            [{"job": job.id, "assigned_to": self.cleaner.id}],
+        )
+
+    def test_dry_run_does_not_save(self):
+        """Test a dry run reports assignments without saving them."""
+        job = self.create_job()
+
+        res = self.api.post(AUTO_ASSIGN_URL, {"dry_run": True}, format="json")
+
+        self.assertEqual(res.data["assigned"], 1)
+        job.refresh_from_db()
+        self.assertIsNone(job.assigned_to)
+
+    def test_past_jobs_ignored_by_default(self):
+        """Test only upcoming jobs are picked when no ids are given."""
+        self.create_job(scheduled_date=timezone.now() - timedelta(days=1))
+
+        res = self.api.post(AUTO_ASSIGN_URL, {}, format="json")
+
+        self.assertEqual(res.data["assigned"], 0)
+        self.assertEqual(res.data["unassigned"], [])
+
+    def test_requires_business_owner(self):
+        """Test users without a business cannot auto-assign."""
+        self.api.force_authenticate(self.cleaner.employee)
+
+        res = self.api.post(AUTO_ASSIGN_URL, {}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,236 @@
+"""Tests for recurring job schedules."""
+
+from datetime import date, time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Client, Job, Service, TeamMember
+from operations.scheduling import expand_occurrences
+from operations.tests.test_operations_api import create_business
+
+
+JOB_SCHEDULE_URL = reverse("operations:job-bulk-schedule")
+
+
+class ExpandOccurrencesTests(TestCase):
+    """Test recurrence expansion."""
+
+    def test_weekly_keeps_local_time_across_dst(self):
+        """Test a 9:00 visit stays at 9:00 when the clocks change."""
+        occurrences = expand_occurrences(
+            date(2026, 10, 26),
+            time(9, 0),
+            "America/Toronto",
+            "WEEKLY",
+            count=3,
+        )
+
+        self.assertEqual(
+            [value.date() for value in occurrences],
+            [date(2026, 10, 26), date(2026, 11, 2), date(2026, 11, 9)],
+        )
+        self.assertEqual({value.hour for value in occurrences}, {9})
+        self.assertEqual(
+            [value.utcoffset().total_seconds() / 3600 for value in occurrences],
+            [-4, -5, -5],
+        )
+
+    def test_monthly_until_clamps_short_months(self):
+        """Test monthly rules on the 31st stop at the until date."""
+        occurrences = expand_occurrences(
+            date(2026, 1, 31),
+            time(8, 0),
+            "UTC",
+            "MONTHLY",
+            until=date(2026, 4, 30),
+        )
+
+        self.assertEqual(
+            [value.date() for value in occurrences],
+            [
+                date(2026, 1, 31),
+                date(2026, 2, 28),
+                date(2026, 3, 31),
+                date(2026, 4, 30),
+            ],
+        )
+
+    def test_daily_interval(self):
+        """Test the interval skips days."""
+        occurrences = expand_occurrences(
+            date(2026, 1, 1),
+            time(8, 0),
+            "UTC",
+            "DAILY",
+            interval=3,
+            count=3,
+        )
+
+        self.assertEqual(
+            [value.day for value in occurrences],
+            [1, 4, 7],
+        )
+
+
+class BulkScheduleApiTests(TestCase):
+    """Test the bulk-schedule action on jobs."""
+
+    def setUp(self):
+        self.manager = get_user_model().objects.create_user(
+            "schedule-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.business = create_business(
+            owner=self.manager,
+            timezone="America/Toronto",
+        )
+        client = Client.objects.create(
+            business=self.business,
+            user=get_user_model().objects.create_user(
+                "schedule-client@example.com",
+                "test123",
+                role="CLIENT",
+            ),
+        )
+        self.services = [
+            Service.objects.create(
+                client=client,
+                business=self.business,
+                service_name=f"Weekly cleaning {index}",
+                start_date=date(2026, 1, 1),
+                service_type="SUBSCRIPTION",
+                billing_cycle="MONTHLY",
+                price=Decimal("100.00"),
+                street_address="1 Schedule Street",
+                city="Toronto",
+                province_state="ON",
+                postal_code="M5V2T6",
+            )
+            for index in range(3)
+        ]
+        self.member = TeamMember.objects.create(
+            business=self.business,
+            employee=get_user_model().objects.create_user(
+                "schedule-employee@example.com",
+                "test123",
+                role="EMPLOYEE",
+            ),
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.manager)
+
+    def payload(self, **params):
+        defaults = {
+            "services": [service.id for service in self.services],
+            "assigned_to": self.member.id,
+            "start_date": "2026-01-05",
+            "start_time": "09:30",
+            "frequency": "WEEKLY",
+            "count": 52,
+        }
+        defaults.update(params)
+        return defaults
+
+    def test_year_of_weekly_jobs_created(self):
+        """Test one job per service and week is created in bulk."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.api.post(JOB_SCHEDULE_URL, self.payload(), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["created"], 156)
+        self.assertLess(len(queries), 12)
+        jobs = Job.objects.filter(service=self.services[0]).order_by("scheduled_date")
+        self.assertEqual(jobs.count(), 52)
+        first = jobs[0]
+        self.assertEqual(first.title, "Weekly cleaning 0")
+        self.assertEqual(first.assigned_to, self.member)
+        self.assertEqual(first.status, "PENDING")
+        self.assertEqual(
+            first.scheduled_date.isoformat(),
+            "2026-01-05T14:30:00+00:00",
+        )
+        if connection.features.can_return_rows_from_bulk_insert:
+            self.assertEqual(
+                set(res.data["ids"]),
+                set(Job.objects.values_list("id", flat=True)),
+            )
+
+    def test_other_business_service_rejected(self):
+        """Test managers cannot schedule jobs for another business."""
+        other_owner = get_user_model().objects.create_user(
+            "schedule-other@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        other_business = create_business(owner=other_owner, slug="other-schedule")
+        self.services[0].business = other_business
+        self.services[0].save()
+
+        res = self.api.post(JOB_SCHEDULE_URL, self.payload(), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("services", res.data)
+        self.assertFalse(Job.objects.exists())
+
+    def test_assignee_from_other_business_rejected(self):
+        """Test the assignee must work for every service's business."""
+        other_business = create_business(
+            owner=get_user_model().objects.create_user(
+                "schedule-owner2@example.com",
+                "test123",
+                role="MANAGER",
+            ),
+            slug="assignee-business",
+        )
+        self.member.business = other_business
+        self.member.save()
+
+        res = self.api.post(JOB_SCHEDULE_URL, self.payload(), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("assigned_to", res.data)
+
+    def test_count_or_until_required(self):
+        """Test exactly one end condition must be given."""
+        payload = self.payload(until="2026-06-30")
+
+        res = self.api.post(JOB_SCHEDULE_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_inactive_service_rejected(self):
+        """Test jobs cannot be scheduled on inactive services."""
+        self.services[1].is_active = False
+        self.services[1].save()
+
+        res = self.api.post(JOB_SCHEDULE_URL, self.payload(), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("services", res.data)
+        self.assertFalse(Job.objects.exists())
+
+    def test_until_beyond_occurrence_limit_rejected(self):
+        """Test an until date past MAX_OCCURRENCES is refused, not cut short."""
+        payload = self.payload(frequency="DAILY", until="2027-06-30")
+        del payload["count"]
+
+        res = self.api.post(JOB_SCHEDULE_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("until", res.data)
+
+    def test_employee_cannot_schedule(self):
+        """Test only managers and admins can bulk schedule."""
+        self.api.force_authenticate(self.member.employee)
+
+        res = self.api.post(JOB_SCHEDULE_URL, self.payload(), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -6,7 +6,6 @@ import tempfile
 from io import BytesIO
 from datetime import date, timedelta
 from decimal import Decimal
-from types import SimpleNamespace
 from unittest.mock import patch
 
 from django.test import TestCase
@@ -33,6 +32,7 @@ from core.models import (
     ServiceTermsTemplate,
     TeamMember,
 )
+from core.tests.helpers import count_queries, create_client_services
 
 from operations.serializers import BusinessSerializer, QuoteSerializer
 
@@ -662,16 +662,13 @@ class WorkflowRegressionTests(TestCase):
 
     @patch("operations.views.emails.send_quote_email")
     @patch("operations.views.emails.send_service_questionnaire_email")
-    @patch("finance.views.stripe.PaymentIntent.create")
     def test_full_happy_path_creates_quote_invoice_payment_payout_and_job(
         self,
-        mock_payment_intent_create,
         mock_questionnaire_email,
         mock_quote_email,
     ):
         """Test manager/client flow from service setup through paid payout."""
         self.create_questionnaire_and_terms()
-        mock_payment_intent_create.return_value = SimpleNamespace(id="pi_success")
         self.client.force_authenticate(self.manager)
 
         service_res = self.client.post(SERVICES_URL, self.service_payload())
@@ -1051,3 +1048,76 @@ class WorkflowRegressionTests(TestCase):
         self.assertEqual(first_sign_res.status_code, status.HTTP_200_OK)
         second_sign_res = self.sign_quote_as_client(quote)
         self.assertEqual(second_sign_res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ServiceListQueryCountTests(TestCase):
+    """Test service and quote lists run a bounded number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = get_user_model().objects.create_user(
+            "query-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.business = create_business(owner=self.manager)
+        self.business.services_offered.add("Flooring", "Painting")
+        for service_name in ["Flooring", "Painting"]:
+            ServiceQuestionnaire.objects.create(
+                business=self.business,
+                service_name=service_name,
+                additional_questions_form=[{"text": "Room size"}],
+            )
+            ServiceTermsTemplate.objects.create(
+                business=self.business,
+                service_name=service_name,
+                content=f"{service_name} terms.",
+            )
+        self.client.force_authenticate(self.manager)
+
+    def create_services(self, count):
+        for service in create_client_services(
+            self.business, count, ("Painting", "Flooring")
+        ):
+            Quote.objects.create(
+                service=service,
+                valid_until=date.today() + timedelta(days=2),
+            )
+
+    def test_service_list_query_count_is_bounded(self):
+        """Test listing more services does not add queries."""
+        self.create_services(2)
+        small_queries, _ = count_queries(self, SERVICES_URL)
+
+        self.create_services(20)
+        large_queries, res = count_queries(self, SERVICES_URL)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(len(res.data), 22)
+        row = res.data[0]
+        service = Service.objects.get(id=row["id"])
+        self.assertEqual(row["client_name"], service.client.user.name)
+        self.assertEqual(len(row["quotations"]), 1)
+        self.assertEqual(
+            row["service_questionnaires"]["id"],
+            ServiceQuestionnaire.objects.get(
+                service_name=service.service_name
+            ).id,
+        )
+        self.assertEqual(
+            row["service_terms_template"]["content"],
+            f"{service.service_name} terms.",
+        )
+
+    def test_quote_list_query_count_is_bounded(self):
+        """Test listing more quotes does not add queries."""
+        self.create_services(2)
+        small_queries, _ = count_queries(self, QUOTES_URL)
+
+        self.create_services(20)
+        large_queries, res = count_queries(self, QUOTES_URL)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(len(res.data), 22)
+        self.assertEqual(res.data[0]["client"]["payment_method"], "CARD")
+        self.assertEqual(len(res.data[0]["service_data"]["quotations"]), 1)
@@ -0,0 +1,285 @@
+"""Tests for job photo normalization and renditions."""
+
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Client, Job, JobPhoto, Service, TeamMember
+from operations.photos import (
+    MAX_ATTEMPTS,
+    MAX_DIMENSION,
+    process_job_photos,
+    render_photo,
+)
+from operations.tests.test_operations_api import JOB_PHOTOS_URL, create_business
+
+
+def image_bytes(size=(4000, 3000), fmt="JPEG", mode="RGB", exif=None):
+    buffer = BytesIO()
+    image = Image.new(mode, size, "red")
+    params = {"exif": exif.tobytes()} if exif is not None else {}
+    image.save(buffer, format=fmt, **params)
+    return buffer.getvalue()
+
+
+def rotated_exif():
+    """Return EXIF saying "rotate 90° clockwise" plus a GPS block."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x8825] = {1: "N", 2: (51.0, 2.0, 30.0)}
+    return exif
+
+
+class RenderPhotoTests(TestCase):
+    """Test the pure image processing step."""
+
+    def test_original_is_rotated_capped_and_stripped(self):
+        """Test EXIF orientation is applied and metadata dropped."""
+        renditions = render_photo(image_bytes(exif=rotated_exif()))
+
+        content, size = renditions["original"]
+        self.assertEqual(size, (1920, MAX_DIMENSION))
+        with Image.open(BytesIO(content)) as original:
+            self.assertEqual(original.format, "JPEG")
+            self.assertEqual(original.size, size)
+            self.assertEqual(dict(original.getexif()), {})
+            self.assertNotIn("icc_profile", original.info)
+
+    def test_renditions_are_small_webp(self):
+        """Test thumbnail and medium renditions keep the aspect ratio."""
+        renditions = render_photo(image_bytes())
+
+        self.assertEqual(renditions["thumbnail"][1], (320, 240))
+        self.assertEqual(renditions["medium"][1], (1024, 768))
+        content, _ = renditions["thumbnail"]
+        with Image.open(BytesIO(content)) as thumbnail:
+            self.assertEqual(thumbnail.format, "WEBP")
+
+    def test_transparent_png_flattened(self):
+        """Test transparent uploads are flattened for JPEG output."""
+        renditions = render_photo(
+            image_bytes(size=(200, 100), fmt="PNG", mode="RGBA")
+        )
+
+        self.assertEqual(renditions["original"][1], (200, 100))
+        self.assertEqual(renditions["thumbnail"][1], (200, 100))
+
+
+class ProcessJobPhotosTests(TestCase):
+    """Test the photo worker and the rendition API fields."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.owner = get_user_model().objects.create_user(
+            "photos-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.employee = get_user_model().objects.create_user(
+            "photos-employee@example.com",
+            "test123",
+            role="EMPLOYEE",
+        )
+        business = create_business(owner=self.owner, slug="photos-business")
+        client = Client.objects.create(
+            business=business,
+            user=get_user_model().objects.create_user(
+                "photos-client@example.com",
+                "test123",
+                role="CLIENT",
+            ),
+        )
+        service = Service.objects.create(
+            client=client,
+            business=business,
+            service_name="Flooring",
+            start_date=date.today(),
+            service_type="ONE_TIME",
+            price=Decimal("100.00"),
+            status="ACTIVE",
+            street_address="123 Test Street",
+            city="Calgary",
+            province_state="AB",
+            postal_code="T2T2T2",
+        )
+        self.job = Job.objects.create(
+            service=service,
+            assigned_to=TeamMember.objects.create(
+                business=business,
+                employee=self.employee,
+            ),
+            title="Flooring Visit",
+            scheduled_date=timezone.now() + timedelta(days=1),
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.employee)
+
+    def create_photo(self, content=None, photo_type="BEFORE"):
+        return JobPhoto.objects.create(
+            job=self.job,
+            photo_type=photo_type,
+            photo=SimpleUploadedFile("upload.png", content or image_bytes()),
+        )
+
+    def test_pending_photos_get_renditions(self):
+        """Test the worker replaces the original and adds renditions."""
+        photo = self.create_photo()
+        upload_name = photo.photo.name
+
+        summary = process_job_photos()
+
+        self.assertEqual(summary, {"ready": 1, "retried": 0, "failed": 0})
+        photo.refresh_from_db()
+        self.assertEqual(photo.processing_status, "READY")
+        self.assertEqual((photo.width, photo.height), (MAX_DIMENSION, 1920))
+        self.assertEqual(
+            (photo.thumbnail_width, photo.thumbnail_height),
+            (320, 240),
+        )
+        self.assertTrue(photo.photo.name.endswith(".jpg"))
+        self.assertTrue(photo.medium.name.endswith("_medium.webp"))
+        self.assertFalse(photo.photo.storage.exists(upload_name))
+        self.assertTrue(photo.thumbnail.storage.exists(photo.thumbnail.name))
+
+    def test_images_rendered_in_executor(self):
+        """Test a batch can be rendered through a worker pool."""
+        self.create_photo(photo_type="BEFORE")
+        self.create_photo(photo_type="AFTER")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            summary = process_job_photos(executor=executor)
+
+        self.assertEqual(summary["ready"], 2)
+
+    def test_unreadable_upload_retried_then_failed(self):
+        """Test broken uploads back off and are marked failed."""
+        photo = self.create_photo(content=b"not an image")
+
+        with self.assertLogs("operations.photos", level="ERROR"):
+            for _ in range(MAX_ATTEMPTS):
+                JobPhoto.objects.update(next_attempt_at=timezone.now())
+                process_job_photos()
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.processing_status, "FAILED")
+        self.assertEqual(photo.processing_attempts, MAX_ATTEMPTS)
+        self.assertIn("UnidentifiedImageError", photo.processing_error)
+
+    def test_replacing_photo_deletes_old_files(self):
+        """Test a replacement drops the old files and stale dimensions."""
+        photo = self.create_photo()
+        process_job_photos()
+        photo.refresh_from_db()
+        old_files = [photo.photo.name, photo.thumbnail.name, photo.medium.name]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.api.patch(
+                reverse("operations:jobphoto-detail", args=[photo.id]),
+                {"photo": SimpleUploadedFile("new.png", image_bytes((800, 600)))},
+                format="multipart",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        photo.refresh_from_db()
+        self.assertEqual(photo.processing_status, "PENDING")
+        self.assertIsNone(photo.width)
+        self.assertIsNone(photo.thumbnail_width)
+        self.assertFalse(photo.thumbnail)
+        for name in old_files:
+            self.assertFalse(photo.photo.storage.exists(name))
+        self.assertTrue(photo.photo.storage.exists(photo.photo.name))
+
+    def test_photo_replaced_while_rendering_is_not_overwritten(self):
+        """Test the worker leaves a photo replaced mid-render alone."""
+        photo = self.create_photo()
+        replacement = SimpleUploadedFile("new.png", image_bytes((800, 600)))
+
+        def render_then_replace(data):
+            renditions = render_photo(data)
+            other = JobPhoto.objects.get(pk=photo.pk)
+            other.photo.save("new.png", replacement)
+            return renditions
+
+        with patch(
+            "operations.photos.render_photo",
+            side_effect=render_then_replace,
+        ):
+            summary = process_job_photos()
+
+        self.assertEqual(summary["ready"], 0)
+        photo.refresh_from_db()
+        self.assertEqual(photo.processing_status, "PENDING")
+        self.assertIn("new", photo.photo.name)
+        self.assertFalse(photo.thumbnail)
+
+    def test_api_exposes_renditions_once_ready(self):
+        """Test list responses carry rendition URLs after processing."""
+        photo = self.create_photo()
+
+        pending = self.api.get(JOB_PHOTOS_URL)
+        process_job_photos()
+        ready = self.api.get(JOB_PHOTOS_URL)
+
+        self.assertIsNone(pending.data[0]["renditions"])
+        self.assertEqual(pending.data[0]["processing_status"], "PENDING")
+        renditions = ready.data[0]["renditions"]
+        photo.refresh_from_db()
+        self.assertTrue(
+            renditions["thumbnail"]["url"].endswith(photo.thumbnail.url)
+        )
+        self.assertEqual(renditions["medium"]["width"], 1024)
+
+    @override_settings(JOB_PHOTO_MAX_UPLOAD_SIZE=1024)
+    def test_upload_over_size_cap_rejected(self):
+        """Test uploads larger than the cap are refused."""
+        res = self.api.post(
+            JOB_PHOTOS_URL,
+            {
+                "job": self.job.id,
+                "photo_type": "BEFORE",
+                "photo": SimpleUploadedFile(
+                    "huge.jpg",
+                    image_bytes(),
+                    content_type="image/jpeg",
+                ),
+            },
+            format="multipart",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("photo", res.data)
+        self.assertFalse(JobPhoto.objects.exists())
+
+    def test_command_prints_summary(self):
+        """Test process_job_photos drains pending photos and reports."""
+        self.create_photo()
+        out = StringIO()
+
+        call_command(
+            "process_job_photos",
+            "--once",
+            "--workers",
+            "0",
+            stdout=out,
+        )
+
+        self.assertIn("Photos processed: 1", out.getvalue())
@@ -0,0 +1,189 @@
+"""Tests for compiled questionnaires and answer validation."""
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Client, Service, ServiceQuestionnaire
+from operations.questionnaires import (
+    QuestionnaireError,
+    compile_questionnaire,
+    get_questionnaire_validator,
+)
+from operations.tests.test_operations_api import (
+    SERVICE_QUESTIONNAIRES_URL,
+    create_business,
+    service_detail_url,
+)
+
+
+FORM = [
+    {"text": "Room size", "type": "input", "inputType": "number", "required": True},
+    {"text": "Notes", "type": "input", "maxLength": 10},
+    {"text": "Floor", "type": "checkbox-single", "options": ["Oak", "Tile"]},
+    {
+        "text": "Rooms",
+        "type": "checkbox-multiple",
+        "options": ["Kitchen", "Bath"],
+        "required": True,
+    },
+]
+
+
+class CompileQuestionnaireTests(TestCase):
+    """Test compiling forms and validating answers."""
+
+    def setUp(self):
+        self.validator = compile_questionnaire(FORM)
+
+    def test_valid_answers(self):
+        """Test well-formed answers, including skipped optional ones."""
+        errors = self.validator.validate(
+            {"Room size": "12.5", "Notes": "-", "Floor": "Oak", "Rooms": ["Bath"]}
+        )
+
+        self.assertEqual(errors, {})
+        self.assertEqual(len(self.validator), 4)
+
+    def test_errors_reported_per_question(self):
+        """Test each bad answer gets its own message."""
+        errors = self.validator.validate(
+            {
+                "Room size": "big",
+                "Notes": "far too long",
+                "Floor": "Carpet",
+                "Rooms": [],
+                "Colour": "Blue",
+            }
+        )
+
+        self.assertEqual(
+            set(errors),
+            {"Room size", "Notes", "Floor", "Rooms", "Colour"},
+        )
+        self.assertEqual(errors["Rooms"], "This question is required.")
+
+    def test_malformed_forms_rejected(self):
+        """Test unknown types, missing options and duplicates fail to compile."""
+        for form in (
+            {"text": "Room size"},
+            [{"text": "Room size", "type": "slider"}],
+            [{"text": "Floor", "type": "checkbox-single"}],
+            [{"text": "Room size"}, {"text": "Room size"}],
+        ):
+            with self.subTest(form=form):
+                with self.assertRaises(QuestionnaireError):
+                    compile_questionnaire(form)
+
+    def test_wrapped_form_and_default_type(self):
+        """Test {"questions": [...]} forms and untyped questions compile."""
+        validator = compile_questionnaire({"questions": [{"text": "Room size"}]})
+
+        self.assertEqual(validator.validate({"Room size": "Large"}), {})
+
+
+class QuestionnaireAnswerApiTests(TestCase):
+    """Test answers are checked when a client submits a questionnaire."""
+
+    def setUp(self):
+        self.manager = get_user_model().objects.create_user(
+            "answers-manager@example.com",
+            "test123",
+            role="MANAGER",
+        )
+        self.client_user = get_user_model().objects.create_user(
+            "answers-client@example.com",
+            "test123",
+            role="CLIENT",
+        )
+        self.business = create_business(owner=self.manager)
+        self.business.services_offered.add("Flooring")
+        self.questionnaire = ServiceQuestionnaire.objects.create(
+            business=self.business,
+            service_name="Flooring",
+            additional_questions_form=FORM,
+        )
+        self.service = Service.objects.create(
+            client=Client.objects.create(
+                business=self.business,
+                user=self.client_user,
+            ),
+            business=self.business,
+            service_name="Flooring",
+            start_date=date.today(),
+            price=Decimal("100.00"),
+            auto_generate_quote=False,
+            street_address="123 Answers Street",
+            city="Calgary",
+            province_state="AB",
+            postal_code="T2T2T2",
+        )
+        self.api = APIClient()
+
+    def test_invalid_answers_rejected_per_question(self):
+        """Test invalid answers come back keyed by question."""
+        self.api.force_authenticate(self.client_user)
+
+        res = self.api.patch(
+            service_detail_url(self.service.id),
+            {"filled_questionnaire": {"Room size": "big", "Rooms": ["Bath"]}},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["filled_questionnaire"]["Room size"],
+            "Enter a number.",
+        )
+        self.service.refresh_from_db()
+        self.assertIsNone(self.service.filled_questionnaire)
+
+    def test_valid_answers_saved(self):
+        """Test a valid payload is stored."""
+        self.api.force_authenticate(self.client_user)
+        answers = {"Room size": "20", "Rooms": ["Kitchen", "Bath"]}
+
+        res = self.api.patch(
+            service_detail_url(self.service.id),
+            {"filled_questionnaire": answers},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.service.refresh_from_db()
+        self.assertEqual(self.service.filled_questionnaire, answers)
+
+    def test_validator_cached_until_questionnaire_changes(self):
+        """Test compiled validators are reused per id and updated_at."""
+        row = ServiceQuestionnaire.objects.only("id", "updated_at")
+        first = get_questionnaire_validator(row.get(pk=self.questionnaire.pk))
+
+        with self.assertNumQueries(1):
+            cached = get_questionnaire_validator(row.get(pk=self.questionnaire.pk))
+        self.assertIs(cached, first)
+
+        self.questionnaire.additional_questions_form = [{"text": "Room size"}]
+        self.questionnaire.save()
+        updated = get_questionnaire_validator(self.questionnaire)
+        self.assertEqual(len(updated), 1)
+
+    def test_malformed_form_rejected_on_create(self):
+        """Test managers cannot save a form that does not compile."""
+        self.api.force_authenticate(self.manager)
+
+        res = self.api.post(
+            SERVICE_QUESTIONNAIRES_URL,
+            {
+                "business": self.business.id,
+                "service_name": "Flooring",
+                "additional_questions_form": [{"text": "Floor", "type": "dropdown"}],
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("additional_questions_form", res.data)
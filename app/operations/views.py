@@ -2,18 +2,22 @@
 Views for operations APIs.
 """
 
-from datetime import timedelta
+from datetime import date, datetime, timedelta
 
+from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 from rest_framework import status, viewsets
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied, ValidationError
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from core.authentication import CachedTokenAuthentication
+from core.exports import ExportMixin
 from core.models import (
+    BankingInformation,
     Business,
     Client,
     Invoice,
@@ -25,7 +29,15 @@ from core.models import (
     Service,
     Quote,
 )
+from core.tenancy import get_tenant_context
+from core.utils import get_timezone
+from finance.billing import initial_billing_period_start
 from operations import serializers, paginations, emails
+from operations.assignment import OPEN_JOB_STATUSES, auto_assign_jobs
+from operations.imports import ClientImportError, import_clients, read_client_rows
+from operations.photos import delete_files, photo_files
+from operations.routing import plan_route
+from operations.scheduling import expand_occurrences, schedule_jobs
 
 
 def get_active_service_terms_template(service):
@@ -36,6 +48,26 @@ def get_active_service_terms_template(service):
     ).first()
 
 
+def prefetch_active_quotes(lookup="service_quotes"):
+    """Prefetch a service's active quotes into ``active_quotes``."""
+    return Prefetch(
+        lookup,
+        queryset=Quote.objects.filter(is_active=True).order_by("id"),
+        to_attr="active_quotes",
+    )
+
+
+def prefetch_active_banking_information(lookup="banking_information"):
+    """Prefetch a client's active banking records, newest first."""
+    return Prefetch(
+        lookup,
+        queryset=BankingInformation.objects.filter(is_active=True).order_by(
+            "-created_at"
+        ),
+        to_attr="active_banking_information",
+    )
+
+
 def create_auto_invoice_for_service(service):
     """Create an invoice when a service is invoice-eligible."""
     if (
@@ -65,6 +97,10 @@ def create_auto_invoice_for_service(service):
         tax_amount=tax_amount,
         total_amount=service.price + tax_amount,
         notes="Auto-generated invoice.",
+        billing_period_start=initial_billing_period_start(
+            service,
+            timezone.localdate(),
+        ),
     )
 
 
@@ -73,7 +109,7 @@ class BusinessViewSet(viewsets.ModelViewSet):
 
     serializer_class = serializers.BusinessSerializer
     queryset = Business.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -125,10 +161,14 @@ class BusinessViewSet(viewsets.ModelViewSet):
 class ClientViewSet(viewsets.ModelViewSet):
     """View for manage clients APIs."""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = serializers.ClientSerializer
-    queryset = Client.objects.filter(is_active=True)
+    queryset = (
+        Client.objects.filter(is_active=True)
+        .select_related("user")
+        .prefetch_related(prefetch_active_banking_information())
+    )
     pagination_class = paginations.ClientPagination
 
     def get_queryset(self):
@@ -139,29 +179,62 @@ class ClientViewSet(viewsets.ModelViewSet):
         if user.role == "ADMIN":
             return qs
         if user.role == "MANAGER":
-            return qs.filter(business__owner=user).order_by("-id")
+            tenant = get_tenant_context(self.request)
+            return qs.filter(business_id__in=tenant.business_ids).order_by("-id")
         return qs.none()
 
     def perform_create(self, serializer):
         """Assign business and user to the client for authenticated user."""
-        business = Business.objects.filter(owner=self.request.user).first()
-        if not business:
+        business_id = get_tenant_context(self.request).business_id
+        if not business_id:
             raise ValueError("You must own a business to create a client.")
 
         user_id = self.request.data.get("user")
         if not user_id:
             raise ValueError("Client must have a user assigned.")
 
-        serializer.save(business=business, user_id=user_id)
+        serializer.save(business_id=business_id, user_id=user_id)
 
     def perform_destroy(self, instance):
         instance.soft_delete(user=self.request.user)
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-import",
+        parser_classes=[JSONParser, MultiPartParser, FormParser],
+    )
+    def bulk_import(self, request):
+        """
+        Import clients from an uploaded CSV ``file`` or JSON ``rows`` with
+        name, email and phone, returning a per-row report.
+        """
+        business = get_tenant_context(request).get_business()
+        if not business:
+            return Response(
+                {"detail": "You must own a business to import clients."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = request.data
+        try:
+            rows = read_client_rows(
+                data=data.get("rows") if isinstance(data, dict) else data,
+                file=request.FILES.get("file"),
+            )
+        except ClientImportError as exc:
+            return Response(
+                {"detail": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(import_clients(business, rows), status=status.HTTP_200_OK)
+
 
 class TeamMemberViewSet(viewsets.ModelViewSet):
     """View for manage team member APIs."""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     queryset = (
         TeamMember.objects.filter(is_active=True)
@@ -176,26 +249,53 @@ class TeamMemberViewSet(viewsets.ModelViewSet):
         if user.role == "ADMIN":
             return qs
         if user.role == "MANAGER":
-            return qs.filter(business__owner=user).order_by("-id")
+            tenant = get_tenant_context(self.request)
+            return qs.filter(business_id__in=tenant.business_ids).order_by("-id")
         return qs.none()
 
     def perform_destroy(self, instance):
         instance.soft_delete(user=self.request.user)
 
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(ExportMixin, viewsets.ModelViewSet):
     """View for manage services APIs."""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = serializers.ServiceSerializer
+    export_filename = "services"
+    export_columns = [
+        ("Service", "service_name"),
+        ("Client", "client__user__name"),
+        ("Client email", "client__user__email"),
+        ("Type", "service_type"),
+        ("Status", "status"),
+        ("Billing cycle", "billing_cycle"),
+        ("Currency", "currency"),
+        ("Price", "price"),
+        ("Start date", "start_date"),
+        ("End date", "end_date"),
+        ("Street address", "street_address"),
+        ("City", "city"),
+        ("Province/State", "province_state"),
+        ("Postal code", "postal_code"),
+        ("Country", "country"),
+        ("Created at", "created_at"),
+    ]
 
     queryset = (
         Service.objects.filter(is_active=True)
-        .select_related("client", "business")
+        .select_related("client__user", "business")
         .order_by("-id")
     )
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["service_templates"] = serializers.ServiceTemplateLookup(
+            lambda: self.get_queryset().values("business_id")
+        )
+        return context
+
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         prev_filled_questionnaire = instance.filled_questionnaire
@@ -271,17 +371,23 @@ class ServiceViewSet(viewsets.ModelViewSet):
         user = self.request.user
         qs = super().get_queryset()
 
+        # Prefetched quotes are only safe to serve on read-only actions;
+        # writes must see quotes created or changed during the request.
+        if self.action in ("list", "retrieve"):
+            qs = qs.prefetch_related(prefetch_active_quotes())
+
         client_id = self.request.query_params.get("client")
         if client_id:
             qs = qs.filter(client_id=client_id)
 
         if user.role == "MANAGER":
-            qs = qs.filter(business__owner=user)
+            qs = qs.filter(business_id__in=get_tenant_context(self.request).business_ids)
         elif user.role == "CLIENT":
-            qs = qs.filter(client__user=user)
+            qs = qs.filter(client_id__in=get_tenant_context(self.request).client_ids)
 
         return qs
 
+    @transaction.atomic
     def perform_create(self, serializer):
         """Create service and send questionnaire email to client."""
         service = serializer.save()
@@ -304,20 +410,42 @@ class ServiceViewSet(viewsets.ModelViewSet):
 class QuoteViewSet(viewsets.ModelViewSet):
     """View for manage quote APIs."""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = serializers.QuoteSerializer
-    queryset = Quote.objects.filter(is_active=True).select_related("service")
+    queryset = (
+        Quote.objects.filter(is_active=True)
+        .select_related("service__client__user", "service__business")
+    )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["service_templates"] = serializers.ServiceTemplateLookup(
+            lambda: self.get_queryset().values("service__business_id")
+        )
+        return context
 
     def get_queryset(self):
         user = self.request.user
         qs = super().get_queryset()
+        if self.action in ("list", "retrieve"):
+            qs = qs.prefetch_related(
+                prefetch_active_quotes("service__service_quotes"),
+                prefetch_active_banking_information(
+                    "service__client__banking_information"
+                ),
+            )
         if user.role == "ADMIN":
             return qs
+        tenant = get_tenant_context(self.request)
         if user.role == "MANAGER":
-            return qs.filter(service__business__owner=user).order_by("-id")
+            return qs.filter(
+                service__business_id__in=tenant.business_ids,
+            ).order_by("-id")
         if user.role == "CLIENT":
-            return qs.filter(service__client__user=user).order_by("-id")
+            return qs.filter(
+                service__client_id__in=tenant.client_ids,
+            ).order_by("-id")
         return qs.none()
 
     def perform_destroy(self, instance):
@@ -358,9 +486,10 @@ class QuoteViewSet(viewsets.ModelViewSet):
         """Send quote details and signing link to the client."""
         quote = self.get_object()
         try:
-            emails.send_quote_email(quote)
-            quote.status = "SENT"
-            quote.save(update_fields=["status"])
+            with transaction.atomic():
+                emails.send_quote_email(quote)
+                quote.status = "SENT"
+                quote.save(update_fields=["status"])
             return Response(
                 {"detail": "Quote sent successfully."},
                 status=status.HTTP_200_OK,
@@ -434,7 +563,7 @@ class QuoteViewSet(viewsets.ModelViewSet):
 class ServiceQuestionnaireViewSet(viewsets.ModelViewSet):
     """View for manage service questionnaires APIs."""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     queryset = ServiceQuestionnaire.objects.all().select_related("business")
     serializer_class = serializers.ServiceQuestionnaireSerializer
@@ -444,10 +573,13 @@ class ServiceQuestionnaireViewSet(viewsets.ModelViewSet):
         qs = super().get_queryset()
         if user.role == "ADMIN":
             return qs
+        tenant = get_tenant_context(self.request)
         if user.role == "MANAGER":
-            return qs.filter(business__owner=user).order_by("-id")
+            return qs.filter(business_id__in=tenant.business_ids).order_by("-id")
         if user.role == "CLIENT":
-            return qs.filter(business__clients__user=user).order_by("-id")
+            return qs.filter(
+                business_id__in=tenant.client_business_ids,
+            ).order_by("-id")
         return qs.none()
 
     def perform_destroy(self, instance):
@@ -457,7 +589,7 @@ class ServiceQuestionnaireViewSet(viewsets.ModelViewSet):
 class ServiceTermsTemplateViewSet(viewsets.ModelViewSet):
     """View for managing service terms template APIs."""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     queryset = ServiceTermsTemplate.objects.all().select_related("business")
     serializer_class = serializers.ServiceTermsTemplateSerializer
@@ -468,7 +600,8 @@ class ServiceTermsTemplateViewSet(viewsets.ModelViewSet):
         if user.role == "ADMIN":
             return qs.order_by("-id")
         if user.role == "MANAGER":
-            return qs.filter(business__owner=user).order_by("-id")
+            tenant = get_tenant_context(self.request)
+            return qs.filter(business_id__in=tenant.business_ids).order_by("-id")
         return qs.none()
 
     def perform_create(self, serializer):
@@ -489,7 +622,7 @@ class ServiceTermsTemplateViewSet(viewsets.ModelViewSet):
 class JobViewSet(viewsets.ModelViewSet):
     """ViewSet for managing jobs related to services."""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = serializers.JobSerializer
     queryset = Job.objects.select_related(
@@ -505,12 +638,13 @@ class JobViewSet(viewsets.ModelViewSet):
         user = self.request.user
         qs = super().get_queryset()
 
+        tenant = get_tenant_context(self.request)
         if user.role == "MANAGER":
-            qs = qs.filter(service__business__owner=user)
+            qs = qs.filter(service__business_id__in=tenant.business_ids)
         elif user.role == "CLIENT":
-            qs = qs.filter(service__client__user=user)
+            qs = qs.filter(service__client_id__in=tenant.client_ids)
         elif user.role == "EMPLOYEE":
-            qs = qs.filter(assigned_to__employee=user)
+            qs = qs.filter(assigned_to_id__in=tenant.team_member_ids)
 
         return qs
 
@@ -522,11 +656,176 @@ class JobViewSet(viewsets.ModelViewSet):
     def perform_destroy(self, instance):
         instance.soft_delete(user=self.request.user)
 
+    @action(detail=False, methods=["post"], url_path="bulk-schedule")
+    def bulk_schedule(self, request):
+        """
+        Create the jobs of a recurrence rule for every listed service and
+        return their ids.
+        """
+        user = request.user
+        if user.role not in ("ADMIN", "MANAGER"):
+            raise PermissionDenied("Only managers can schedule jobs.")
+
+        service_queryset = Service.objects.filter(is_active=True)
+        if user.role == "MANAGER":
+            service_queryset = service_queryset.filter(
+                business_id__in=get_tenant_context(request).business_ids,
+            )
+        serializer = serializers.JobScheduleSerializer(
+            data=request.data,
+            context={"request": request, "service_queryset": service_queryset},
+        )
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        # Services of one business share their occurrences.
+        occurrences = {}
+
+        def occurrences_for(service):
+            tz_name = service.business.timezone
+            if tz_name not in occurrences:
+                occurrences[tz_name] = expand_occurrences(
+                    data["start_date"],
+                    data["start_time"],
+                    tz_name,
+                    data["frequency"],
+                    data["interval"],
+                    data.get("count"),
+                    data.get("until"),
+                )
+            return occurrences[tz_name]
+
+        jobs = schedule_jobs(
+            data["services"],
+            occurrences_for,
+            assigned_to=data.get("assigned_to"),
+            title=data.get("title", ""),
+            description=data.get("description", ""),
+        )
+        return Response(
+            {"created": len(jobs), "ids": [job.pk for job in jobs]},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["get"], url_path="day-plan")
+    def day_plan(self, request):
+        """
+        Return a technician's open jobs for ``date`` (business-local, today
+        by default) in driving order. ``team_member`` defaults to the
+        employee's own membership; jobs without coordinates come last.
+        """
+        user = request.user
+        tenant = get_tenant_context(request)
+        members = TeamMember.objects.select_related("business")
+        if user.role == "MANAGER":
+            members = members.filter(business_id__in=tenant.business_ids)
+        elif user.role != "ADMIN":
+            members = members.filter(pk__in=tenant.team_member_ids)
+        member_id = request.query_params.get("team_member")
+        if member_id:
+            if not member_id.isdigit():
+                return Response(
+                    {"detail": "team_member must be an id."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            members = members.filter(pk=member_id)
+        elif user.role in ("ADMIN", "MANAGER"):
+            return Response(
+                {"detail": "team_member is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        member = members.order_by("id").first()
+        if member is None:
+            return Response(
+                {"detail": "Team member not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        tz = get_timezone(member.business.timezone)
+        day = request.query_params.get("date")
+        try:
+            day = (
+                date.fromisoformat(day)
+                if day
+                else timezone.localtime(timezone.now(), tz).date()
+            )
+        except ValueError:
+            return Response(
+                {"detail": "date must be YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        start = tz.localize(datetime.combine(day, datetime.min.time()))
+        # Localize the next midnight too: days are 23 or 25 hours long
+        # when DST starts or ends.
+        end = tz.localize(
+            datetime.combine(day + timedelta(days=1), datetime.min.time())
+        )
+        jobs = list(
+            self.get_queryset()
+            .filter(
+                assigned_to=member,
+                status__in=OPEN_JOB_STATUSES,
+                scheduled_date__gte=start,
+                scheduled_date__lt=end,
+            )
+            .order_by("scheduled_date", "id")
+        )
+        located = [job for job in jobs if job.service.latitude is not None]
+        unlocated = [job for job in jobs if job.service.latitude is None]
+        order, legs = plan_route(
+            [(job.service.latitude, job.service.longitude) for job in located]
+        )
+        ordered = [located[index] for index in order] + unlocated
+        legs = legs + [None] * len(unlocated)
+
+        stops = self.get_serializer(ordered, many=True).data
+        for number, (stop, leg) in enumerate(zip(stops, legs), start=1):
+            stop["stop"] = number
+            stop["distance_from_previous_km"] = (
+                round(leg, 2) if leg is not None else None
+            )
+        return Response(
+            {
+                "date": day,
+                "team_member": member.id,
+                "total_distance_km": round(sum(legs[:len(located)]), 2),
+                "jobs": stops,
+                "unlocated": [job.id for job in unlocated],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["post"], url_path="auto-assign")
+    def auto_assign(self, request):
+        """
+        Assign unassigned jobs to the least loaded matching team members
+        of the manager's business.
+        """
+        business = get_tenant_context(request).get_business()
+        if not business:
+            return Response(
+                {"detail": "You must own a business to assign jobs."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = serializers.JobAutoAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        summary = auto_assign_jobs(
+            business,
+            job_ids=data.get("jobs"),
+            max_jobs_per_day=data["max_jobs_per_day"],
+            dry_run=data["dry_run"],
+        )
+        return Response(summary, status=status.HTTP_200_OK)
+
 
 class JobPhotoViewSet(viewsets.ModelViewSet):
     """ViewSet for managing before/after photos attached to jobs."""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = serializers.JobPhotoSerializer
     parser_classes = [MultiPartParser, FormParser]
@@ -547,12 +846,13 @@ class JobPhotoViewSet(viewsets.ModelViewSet):
         if job_id:
             qs = qs.filter(job_id=job_id)
 
+        tenant = get_tenant_context(self.request)
         if user.role == "MANAGER":
-            qs = qs.filter(job__service__business__owner=user)
+            qs = qs.filter(job__service__business_id__in=tenant.business_ids)
         elif user.role == "CLIENT":
-            qs = qs.filter(job__service__client__user=user)
+            qs = qs.filter(job__service__client_id__in=tenant.client_ids)
         elif user.role == "EMPLOYEE":
-            qs = qs.filter(job__assigned_to__employee=user)
+            qs = qs.filter(job__assigned_to_id__in=tenant.team_member_ids)
 
         return qs
 
@@ -569,5 +869,27 @@ class JobPhotoViewSet(viewsets.ModelViewSet):
             job.completed_at = timezone.now()
             job.save(update_fields=["status", "completed_at", "updated_at"])
 
+    def perform_update(self, serializer):
+        if "photo" not in serializer.validated_data:
+            serializer.save()
+            return
+        old_files = photo_files(serializer.instance)
+        # A replaced photo needs new renditions from the worker.
+        serializer.save(
+            processing_status="PENDING",
+            processing_attempts=0,
+            processing_error="",
+            next_attempt_at=timezone.now(),
+            width=None,
+            height=None,
+            thumbnail=None,
+            thumbnail_width=None,
+            thumbnail_height=None,
+            medium=None,
+            medium_width=None,
+            medium_height=None,
+        )
+        transaction.on_commit(lambda: delete_files(old_files))
+
     def perform_destroy(self, instance):
         instance.soft_delete(user=self.request.user)
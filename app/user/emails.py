@@ -1,10 +1,12 @@
 from django.contrib.auth import get_user_model
-from django.core.mail import EmailMessage, send_mail
+from django.core.mail import EmailMessage
 from django.conf import settings
 
+from core.models import EmailOutbox
+
 
 def send_registration_email(user, token):
-    """Send email verification to a newly registered user."""
+    """Queue email verification for a newly registered user."""
     verification_link = f"{settings.FRONTEND_URL}/sign-in?token={token}"
 
     subject = "Welcome to Contractorz – Please Verify Your Email"
@@ -22,15 +24,11 @@ def send_registration_email(user, token):
         "Contractorz Team"
     )
 
-    send_mail(
-        subject=subject,
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-    )
+    EmailOutbox.objects.enqueue(subject, message, [user.email])
 
 
 def send_password_reset_email(user, token):
+    """Queue a password reset link for the user."""
     reset_link = f"{settings.FRONTEND_URL}/reset-password?token={token}"
     subject = "Reset Your Password - Contractorz"
     message = (
@@ -44,12 +42,7 @@ def send_password_reset_email(user, token):
         "Contractorz Team"
     )
 
-    send_mail(
-        subject=subject,
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-    )
+    EmailOutbox.objects.enqueue(subject, message, [user.email])
 
 
 def send_contact_submission_email(contact_data):
@@ -12,7 +12,7 @@ from io import BytesIO
 from rest_framework.test import APIClient
 from rest_framework import status
 from PIL import Image
-from core.models import FAQ
+from core.models import FAQ, EmailOutbox
 
 
 CREATE_USER_URL = reverse('user:create')
@@ -49,6 +49,23 @@ class PublicUserApiTests(TestCase):
         self.assertTrue(user.check_password(payload['password']))
         self.assertNotIn('password', res.data)
 
+    def test_create_user_queues_verification_email(self):
+        """Test registration queues the email instead of sending it."""
+        payload = {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+            'name': 'Test Name',
+            'phone': '1234567890',
+            'role': 'USER',
+        }
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = EmailOutbox.objects.get()
+        self.assertEqual(queued.to, [payload['email']])
+        self.assertEqual(queued.status, "PENDING")
+
     def test_user_with_email_exists_error(self):
         """Test error returned if user with email exists."""
         payload = {
@@ -17,6 +17,12 @@ urlpatterns = [
     ),
     path('token/', views.CreateTokenView.as_view(), name='token'),
     path('me/', views.ManageUserView.as_view(), name='me'),
+    path("logout/", views.LogoutView.as_view(), name="logout"),
+    path(
+        "tokens/revoke/",
+        views.RevokeTokensView.as_view(),
+        name="revoke-tokens",
+    ),
     path(
         "password-reset/request/",
         views.RequestPasswordResetView.as_view(),
@@ -3,20 +3,24 @@ Views for the user API.
 """
 
 from django.contrib.auth import get_user_model
-from django.utils import timezone
+from django.db import transaction
 
 
-from rest_framework import generics, authentication, permissions, status
-from rest_framework.authentication import TokenAuthentication
+from rest_framework import generics, permissions, status
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
-from core.models import FAQ
+from core.authentication import (
+    CachedTokenAuthentication,
+    record_login,
+    revoke_token,
+    revoke_user_tokens,
+)
+from core.models import AuthToken, FAQ
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
@@ -45,6 +49,7 @@ class CreateUserView(generics.CreateAPIView):
 
     serializer_class = UserSerializer
 
+    @transaction.atomic
     def perform_create(self, serializer):
         user = serializer.save()
         token = generate_email_token(user)
@@ -88,19 +93,19 @@ class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        token = Token.objects.get(key=response.data["token"])
-        user = token.user
-        user.last_login = timezone.now()
-        user.save(update_fields=["last_login"])
-        return response
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data["user"]
+        token = AuthToken.objects.issue(user)
+        record_login(user)
+        return Response({"token": token.key})
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
 
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
@@ -157,16 +162,57 @@ class ResetPasswordView(generics.GenericAPIView):
 
         user.set_password(new_password)
         user.save()
+        # Sessions opened with the old password end with it.
+        revoke_user_tokens(user.pk)
 
         return Response(
             {"detail": "Password reset successfully."}, status=status.HTTP_200_OK
         )
 
 
+class LogoutView(APIView):
+    """Revoke the token the request was authenticated with."""
+
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        revoke_token(request.auth.key)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class RevokeTokensView(APIView):
+    """
+    Revoke every auth token of the authenticated user, logging them out on
+    all devices. Staff may pass ``user`` to revoke another user's tokens.
+    """
+
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        user_id = request.data.get("user")
+        if user_id is None:
+            user_id = request.user.pk
+        elif not request.user.is_staff:
+            return Response(
+                {"detail": "Only staff can revoke other users' tokens."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        elif not str(user_id).isdigit():
+            return Response(
+                {"detail": "user must be a user id."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        revoked = revoke_user_tokens(int(user_id))
+        return Response({"revoked": revoked}, status=status.HTTP_200_OK)
+
+
 class CheckUserExistsView(generics.GenericAPIView):
     """Check if a user exists by email, authenticated only."""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = CheckUserExistsSerializer
 
@@ -197,9 +243,8 @@ class MagicLoginView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        auth_token, _ = Token.objects.get_or_create(user=user)
-        user.last_login = timezone.now()
-        user.save(update_fields=["last_login"])
+        auth_token = AuthToken.objects.issue(user)
+        record_login(user)
 
         return Response({"token": auth_token.key}, status=status.HTTP_200_OK)
 